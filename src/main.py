@@ -13,6 +13,9 @@ logging.basicConfig(format="[%(asctime)s] [%(levelname)s] [%(name)s]: %(message)
 
 parser = argparse.ArgumentParser(prog="helper-bot")
 parser.add_argument("-ns", "--no-sync", action="store_true")
+parser.add_argument("-wd", "--watch-db", action="store_true")
+parser.add_argument("-fi", "--flush-interval", type=float, default=60.0)
+parser.add_argument("-bs", "--batch-size", type=int, default=500)
 args = parser.parse_args()
 
 
@@ -27,9 +30,12 @@ async def main():
         allowed_mentions=allowed_mentions,
         modules=MODULES,
         sync_commands=(not args.no_sync),
+        watch_database=args.watch_db,
+        db_flush_interval=args.flush_interval,
+        db_batch_size=args.batch_size,
     )
 
-    await bot.start(token=BOT_TOKEN)
+    await bot.serve(BOT_TOKEN)
 
 
 if __name__ == "__main__":
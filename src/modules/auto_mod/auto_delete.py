@@ -7,8 +7,9 @@ import discord
 from discord import Embed, app_commands
 from discord.ext import commands
 
-from resources.constants import ADMIN_ROLES, BLOXLINK_GUILD, RED
+from resources.constants import BLOXLINK_GUILD, RED
 from resources.helper_bot import HelperBot
+from resources.message_pipeline import MessageContext
 
 NAME_REGEX = re.compile(r"(image|\d|\d_[a-zA-Z0-9]{7,})\.(jpg|jpeg|png|webm|gif|mov|mp4|gifv)")
 _logger = logging.getLogger(__name__)
@@ -20,26 +21,26 @@ class AutoDeleteCryptoSpam(commands.GroupCog, name="automod_delete_crypto"):
         self.bot: HelperBot = bot
         super().__init__()
 
-    @commands.Cog.listener("on_message")
-    async def message_handler(self, message: discord.Message):
-        if (
-            message.author.bot
-            or not message.guild
-            or not type(message.author) == discord.Member
-            or not message.attachments
-            or not message.guild.id == BLOXLINK_GUILD
-        ):
-            return
+    async def cog_load(self):
+        self.bot.message_pipeline.register("automod_delete_crypto", self.message_handler, priority=10)
+
+    async def cog_unload(self):
+        self.bot.message_pipeline.unregister("automod_delete_crypto")
+
+    async def message_handler(self, context: MessageContext) -> bool:
+        message = context.message
+        if not message.attachments or not context.guild.id == BLOXLINK_GUILD:
+            return False
 
         # Log single msg attachments (to use for reference for common formats.)
         # Some spambots only post 1 image, using this as a baseline.
         if len(message.attachments) == 1 and NAME_REGEX.search(message.attachments[0].filename) is not None:
             _logger.info(message.attachments[0].filename)
-            return
+            return False
 
         # Filter out if there is less than 3 images.
         if len(message.attachments) < 3:
-            return
+            return False
 
         check = []
         for item in message.attachments:
@@ -50,16 +51,13 @@ class AutoDeleteCryptoSpam(commands.GroupCog, name="automod_delete_crypto"):
         _logger.info(filenames)
 
         if not all(check):
-            return
+            return False
 
-        volunteers_role = ADMIN_ROLES["hq_volunteers"]
-        dev_role = ADMIN_ROLES["dev"]
-        author_roles = [x.id for x in message.author.roles]
-        if volunteers_role in author_roles or dev_role in author_roles:
+        if context.bypasses_automation:
             # Let helpers & admins bypass it.
-            return
+            return False
 
-        log_channels = await self.bot.db.get_log_channels(guild_id=str(message.guild.id))
+        log_channels = await self.bot.db.get_log_channels(guild_id=str(context.guild.id))
         if not log_channels:
             log_channels = {}
         log_channel = log_channels.get("moderation", "")
@@ -83,12 +81,15 @@ class AutoDeleteCryptoSpam(commands.GroupCog, name="automod_delete_crypto"):
             await message.delete()
 
         _logger.info("Removed user %s", message.author.id)
-        await message.author.ban(delete_message_days=1, reason="Image spam for crypto - compromised account.")
+        await context.author.ban(delete_message_days=1, reason="Image spam for crypto - compromised account.")
         await asyncio.sleep(0.5)
-        await message.author.unban(
+        await context.author.unban(
             reason="Softban - user removed for crypto image spam - compromised account."
         )
 
+        # The message is gone, nothing else should act on it.
+        return True
+
 
 async def setup(bot: HelperBot):
     await bot.add_cog(AutoDeleteCryptoSpam(bot))
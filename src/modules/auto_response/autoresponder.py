@@ -1,19 +1,20 @@
+import asyncio
 import logging
-import math
 import unicodedata
 from datetime import datetime, timezone
 from typing import Optional
 
+import attrs
 import discord
 from discord import app_commands
 from discord.ext import commands
+from pymongo.errors import PyMongoError
 from textdistance import Sorensen
 
 import resources.responder_parsing as resp_parsing
 from resources.checks import is_staff
 from resources.constants import (
     ACTIVE_EMOTE,
-    ADMIN_ROLES,
     BLOXLINK_DAB,
     BLOXLINK_DEAD,
     BLOXLINK_DETECTIVE,
@@ -29,104 +30,123 @@ from resources.constants import (
 from resources.exceptions import InvalidTriggerFormat
 from resources.helper_bot import HelperBot
 from resources.helper_bot import instance as bot_instance
+from resources.message_pipeline import MessageContext
 from resources.models.autoresponse import AutoResponse
 from resources.models.interaction_data import MessageComponentData
 from resources.utils.base_embeds import ErrorEmbed, StandardEmbed
+from resources.utils.collection_watcher import CollectionChange
+from resources.utils.paged_listing import Page, PagedListing
 from resources.utils.timed_user_cooldown import TimedUserCooldown
 
 from .modals import MessageEditModal, NewResponderModal
-from .shared_cache import autoresponder_channels, stored_trigger_map
+from .shared_cache import (
+    apply_config_change,
+    apply_responder_change,
+    ensure_trigger_map,
+    is_allowlisted,
+    load_allowlist_channels,
+    remove_responder,
+    retry_allowlist_load,
+    set_allowlist_channels,
+    stored_trigger_map,
+    trigger_map_version,
+    trigger_matcher,
+    upsert_responder,
+)
 
 MAX_ITEMS_PER_PAGE = 10
 COOLDOWN_DURATION = 30
 
 
+async def _load_responders() -> list[AutoResponse]:
+    return [
+        AutoResponse.from_database(x)
+        async for batch in bot_instance.db.iter_autoresponse_batches()
+        for x in batch
+    ]
+
+
+# Every responder sorted by name for the all command, rebuilt when a responder changes.
+responder_listing = PagedListing(
+    _load_responders, version=trigger_map_version, page_size=MAX_ITEMS_PER_PAGE, key=lambda ar: ar.name
+)
+
+
 @app_commands.guild_only()
 class Autoresponder(commands.GroupCog, name="autoresponder"):
     def __init__(self, bot):
         self.bot: HelperBot = bot
         self.cooldown = TimedUserCooldown(COOLDOWN_DURATION)
+        # Retries loading the allowlist channels if that failed when the cog was loaded.
+        self._allowlist_retry: Optional[asyncio.Task] = None
         super().__init__()
 
-    async def interaction_check(self, interaction: discord.Interaction) -> bool:  # type: ignore
-        # type ignored because it is freaking out about return types and overrides.
-        return await is_staff(interaction)
-
-    @commands.Cog.listener("on_message")
-    async def message_handler(self, message: discord.Message):
-        if message.author.bot or not message.guild or not type(message.author) == discord.Member:
-            return
-
-        volunteers_role = ADMIN_ROLES["hq_volunteers"]
-        dev_role = ADMIN_ROLES["dev"]
-        author_roles = [x.id for x in message.author.roles]
-        if volunteers_role in author_roles or dev_role in author_roles:
-            return
-
-        # Ignore messages that start with the bot prefix (.)
-        # Could false positive on a chat command otherwise.
-        if message.content.startswith(str(self.bot.command_prefix)):
-            return
+    async def cog_load(self):
+        self.bot.db.watcher.subscribe("auto_response", apply_responder_change)
+        self.bot.db.watcher.subscribe("config", self.on_config_change)
 
-        if not stored_trigger_map:
-            # Update local map.
-            logging.info("Updating the stored trigger map...")
-            auto_responses = await self.bot.db.get_all_autoresponses()
-            auto_responses = [AutoResponse.from_database(x) for x in auto_responses]
+        # Loaded up front so that no message has to wait on a config read.
+        try:
+            await load_allowlist_channels(self.bot.db)
+        except PyMongoError:
+            logging.exception("Could not load the auto responder channels, retrying in the background.")
+            self._allowlist_retry = asyncio.create_task(retry_allowlist_load(self.bot.db))
+        self.bot.message_pipeline.allowlist_check = is_allowlisted
+        self.bot.message_pipeline.register("autoresponder", self.message_handler, priority=20)
 
-            for ar in auto_responses:
-                for tr in ar.message_triggers:
-                    stored_trigger_map[tr] = ar
+    async def cog_unload(self):
+        self.bot.db.watcher.unsubscribe("auto_response", apply_responder_change)
+        self.bot.db.watcher.unsubscribe("config", self.on_config_change)
 
-            logging.info(
-                f"Stored trigger map updated. There are now {len(stored_trigger_map)} values in the map. - {id(stored_trigger_map)}"
-            )
+        if self._allowlist_retry is not None:
+            self._allowlist_retry.cancel()
+            self._allowlist_retry = None
 
-        guild_id = str(message.guild.id)
-        channel_id = str(message.channel.id)
-        if autoresponder_channels.get(guild_id) is None:
-            # Update local dict.
-            logging.info(f"Updating stored auto responder channel map for guild {guild_id}...")
-            data = await self.bot.db.get_all_allowlist_channels(guild_id)
-            channels = data.get("responder_channels", []) if data else []
+        self.bot.message_pipeline.allowlist_check = None
+        self.bot.message_pipeline.unregister("autoresponder")
 
-            autoresponder_channels[guild_id] = set(channels)
-
-            logging.info(
-                f"Stored autoresponder channel list updated. There are now {len(autoresponder_channels)} guilds in the set."
-            )
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:  # type: ignore
+        # type ignored because it is freaking out about return types and overrides.
+        return await is_staff(interaction)
 
-        if channel_id not in autoresponder_channels[guild_id]:
-            return
+    async def on_config_change(self, change: CollectionChange):
+        apply_config_change(change)
+        if change.operation == "invalidate":
+            await load_allowlist_channels(self.bot.db)
 
-        for key, val in stored_trigger_map.items():
-            if not val.enabled:
-                # keep checking the rest for a match.
-                continue
-
-            check_match = resp_parsing.search_message_match(message=message.content, initial_trigger=key)
-            if not check_match:
-                continue
-
-            # We only ignore on a match since it applies cooldown after checking and not on cooldown.
-            # consider doing a channel cooldown instead/additionally?
-            user_on_cooldown = self.cooldown.check_for_user(user_id=message.author.id)
-            if user_on_cooldown:
-                logging.info(f"Not responding to {message.author.name} as they are on cooldown.")
-                return
-
-            reply_msg = await message.reply(
-                content=(
-                    f"{val.response_message}\n"
-                    "-# This is an automated reply! If this doesn't make sense, please ask for a volunteer!"
-                )
+    async def message_handler(self, context: MessageContext) -> bool:
+        # Ignore messages that start with the bot prefix (.)
+        # Could false positive on a chat command otherwise.
+        if context.bypasses_automation or context.is_command or not context.allowlisted:
+            return False
+
+        message = context.message
+        await ensure_trigger_map(self.bot.db)
+
+        val = trigger_matcher.match(context.normalized_content)
+        if val is None:
+            return False
+
+        # We only ignore on a match since it applies cooldown after checking and not on cooldown.
+        # consider doing a channel cooldown instead/additionally?
+        user_on_cooldown = self.cooldown.check_for_user(user_id=message.author.id)
+        if user_on_cooldown:
+            logging.info(f"Not responding to {message.author.name} as they are on cooldown.")
+            return False
+
+        reply_msg = await message.reply(
+            content=(
+                f"{val.response_message}\n"
+                "-# This is an automated reply! If this doesn't make sense, please ask for a volunteer!"
             )
+        )
 
-            if val.auto_deletion != 0:
-                await message.delete(delay=val.auto_deletion)
-                await reply_msg.delete(delay=val.auto_deletion)
+        if val.auto_deletion != 0:
+            await message.delete(delay=val.auto_deletion)
+            await reply_msg.delete(delay=val.auto_deletion)
 
-            break
+        # Later stages (the developer ping warning) still see the message, as with separate listeners.
+        return False
 
     ####
     ####################---------AUTOFILL-----------########################
@@ -136,8 +156,8 @@ class Autoresponder(commands.GroupCog, name="autoresponder"):
         valid_names = []
 
         if not stored_trigger_map:
-            auto_responses = await self.bot.db.get_all_autoresponses()
-            valid_names = [AutoResponse.from_database(ar).name for ar in auto_responses]
+            auto_responses = await self.bot.db.get_all_autoresponses(projection=[])
+            valid_names = [ar["_id"] for ar in auto_responses]
         else:
             valid_names = list(set(ar.name for ar in stored_trigger_map.values()))
 
@@ -231,18 +251,14 @@ class Autoresponder(commands.GroupCog, name="autoresponder"):
 
     @app_commands.command(name="all", description="View all set automatic responses")
     async def view_all(self, ctx: discord.Interaction):
-        auto_responses = await self.bot.db.get_all_autoresponses()
-        auto_responses = [AutoResponse.from_database(x) for x in auto_responses]
-        if not auto_responses:
+        page = await responder_listing.page(0)
+        if not page.total:
             return await ctx.response.send_message(
                 content="There are no auto responders set! Try making one with /autoresponder create",
                 ephemeral=True,
             )
 
-        auto_responses.sort(key=(lambda y: y.name))
-
-        # Determine max # of pages
-        max_pages = math.ceil(len(auto_responses) / MAX_ITEMS_PER_PAGE)
+        max_pages = page.page_count
         # Build generic buttons into a view
         view = discord.ui.View(timeout=None)
 
@@ -264,16 +280,12 @@ class Autoresponder(commands.GroupCog, name="autoresponder"):
         view.add_item(right_button)
 
         # Get the embed & send.
-        embed = Autoresponder.build_view_page(str(ctx.user.display_avatar), auto_responses, 0)
+        embed = Autoresponder.build_view_page(str(ctx.user.display_avatar), page)
         await ctx.response.send_message(embed=embed, view=view)
 
     @staticmethod
-    def build_view_page(avatar_url: str, all_items: list[AutoResponse], page_num: int = 0):
-        max_pages = math.ceil(len(all_items) / MAX_ITEMS_PER_PAGE)
-
-        # Grab the 10 elements that we care about
-        offset = page_num * MAX_ITEMS_PER_PAGE
-        selected_items = all_items[offset : offset + MAX_ITEMS_PER_PAGE]
+    def build_view_page(avatar_url: str, page: Page[AutoResponse]):
+        selected_items = page.items
 
         # Build the embed.
         embed = StandardEmbed(title="All Auto Responders")
@@ -291,7 +303,7 @@ class Autoresponder(commands.GroupCog, name="autoresponder"):
         )
 
         # footer
-        embed.set_footer(text=f"Page {page_num + 1}/{max_pages}", icon_url=avatar_url)
+        embed.set_footer(text=f"Page {page.index + 1}/{page.page_count}", icon_url=avatar_url)
 
         # return the entire embed
         return embed
@@ -302,11 +314,9 @@ class Autoresponder(commands.GroupCog, name="autoresponder"):
         # We already know data is a valid entity by this point, typing system doesn't know that though
         data = MessageComponentData(**ctx.data)  # pyright: ignore[reportCallIssue]
 
-        custom_id_data = data.custom_id.split(":")
-        custom_id_data.pop(0)
-        original_author_id = custom_id_data[0]
-        new_page_index = int(custom_id_data[1])
-        max_pages = int(custom_id_data[2])
+        original_author_id, new_page_index, max_pages = data.parsed_custom_id.args
+        new_page_index = int(new_page_index)
+        max_pages = int(max_pages)
 
         if not ctx.message:
             logging.error("Execution failed in view_all_button_handler because there's no message.")
@@ -352,11 +362,8 @@ class Autoresponder(commands.GroupCog, name="autoresponder"):
         view.add_item(left_button)
         view.add_item(right_button)
 
-        auto_responses = await bot_instance.db.get_all_autoresponses()
-        auto_responses = [AutoResponse.from_database(x) for x in auto_responses]
-        auto_responses.sort(key=(lambda y: y.name))
-
-        embed = Autoresponder.build_view_page(str(ctx.user.display_avatar), auto_responses, new_page_index)
+        page = await responder_listing.page(new_page_index)
+        embed = Autoresponder.build_view_page(str(ctx.user.display_avatar), page)
         await ctx.response.edit_message(embed=embed, view=view)
 
     @app_commands.command(name="view", description="View a specific automatic response")
@@ -416,8 +423,7 @@ class Autoresponder(commands.GroupCog, name="autoresponder"):
 
         await self.bot.db.delete_autoresponse(name=name)
 
-        logging.info(f"Clearing stored trigger map - responder {name} deleted. - {id(stored_trigger_map)}")
-        stored_trigger_map.clear()
+        remove_responder(ar.name)
 
         await ctx.response.send_message(
             f"Success! The responder associated with the name `{name}` was removed.", embed=embed
@@ -443,8 +449,7 @@ class Autoresponder(commands.GroupCog, name="autoresponder"):
         embed.set_footer(text="Bloxlink Helper", icon_url=ctx.user.display_avatar)
         embed.color = GREEN if ar.enabled else RED
 
-        logging.info(f"Clearing stored trigger map - responder {name} toggled. - {id(stored_trigger_map)}")
-        stored_trigger_map.clear()
+        upsert_responder(ar)
 
         await ctx.response.send_message(
             f"Success! The responder associated with the name `{name}` was {'enabled' if ar.enabled else 'disabled'}.",
@@ -506,7 +511,7 @@ class Autoresponder(commands.GroupCog, name="autoresponder"):
 
         try:
             trigger = unicodedata.normalize("NFKC", trigger)
-            resp_parsing.validate_trigger_string(trigger)
+            resp_parsing.compile_trigger(trigger)
         except InvalidTriggerFormat as err:
             embed = ErrorEmbed(title=f"{BLOXLINK_DEAD} Invalid Trigger String")
             embed.add_field(name="Error", value=str(err))
@@ -522,10 +527,7 @@ class Autoresponder(commands.GroupCog, name="autoresponder"):
         ar.message_triggers.append(trigger)
         await self.bot.db.update_autoresponse(name=name, message_triggers=ar.message_triggers)
 
-        logging.info(
-            f"Clearing stored trigger map - responder {name} trigger added. - {id(stored_trigger_map)}"
-        )
-        stored_trigger_map.clear()
+        upsert_responder(ar)
 
         embed = StandardEmbed(footer_icon_url=str(ctx.user.display_avatar))
         embed.title = f"{BLOXLINK_HAPPY} Success! Auto responder `{name}` has been updated."
@@ -563,10 +565,7 @@ class Autoresponder(commands.GroupCog, name="autoresponder"):
 
             ar.message_triggers.remove(trigger)
             await self.bot.db.update_autoresponse(name=name, message_triggers=ar.message_triggers)
-            logging.info(
-                f"Clearing stored trigger map - responder {name} trigger deleted. - {id(stored_trigger_map)}"
-            )
-            stored_trigger_map.clear()
+            upsert_responder(ar)
 
             embed = StandardEmbed(footer_icon_url=str(ctx.user.display_avatar))
             embed.title = f"{BLOXLINK_HAPPY}: Success! Auto responder `{name}` has been updated."
@@ -591,10 +590,7 @@ class Autoresponder(commands.GroupCog, name="autoresponder"):
         # We already know data is a valid entity by this point, typing system doesn't know that though
         data = MessageComponentData(**ctx.data)  # pyright: ignore[reportCallIssue]
 
-        custom_id_data = data.custom_id.split(":")
-        custom_id_data.pop(0)
-        original_author_id = custom_id_data[0]
-        responder_name = custom_id_data[1]
+        original_author_id, responder_name = data.parsed_custom_id.args
 
         if not ctx.message:
             # python pls give me a null aware operator.
@@ -652,6 +648,8 @@ class Autoresponder(commands.GroupCog, name="autoresponder"):
         major_output = list(set.intersection(*major_output))
         await bot_instance.db.update_autoresponse(name=responder_name, message_triggers=major_output)
 
+        upsert_responder(attrs.evolve(ar, message_triggers=major_output))
+
         formatted_selections = [f"- `{x}`" for x in selections]
         output_str = "\n".join(formatted_selections)
 
@@ -688,10 +686,10 @@ class Autoresponder(commands.GroupCog, name="autoresponder"):
             )
 
         await self.bot.db.update_autoresponse(name, author=str(ctx.user.id), auto_deletion=duration)
-        logging.info(
-            f"Clearing stored trigger map - responder {name} timeout edited. - {id(stored_trigger_map)}"
-        )
-        stored_trigger_map.clear()
+
+        ar.author = str(ctx.user.id)
+        ar.auto_deletion = duration
+        upsert_responder(ar)
 
         response = (
             "Message and reply do not auto delete after responding."
@@ -721,13 +719,11 @@ class Autoresponder(commands.GroupCog, name="autoresponder"):
         added = True
         if channels and str(channel.id) in channels:
             added = False
-            await self.bot.db.remove_allowlist_channel(str(ctx.guild_id), str(channel.id))
-            # Clear the entire dict, would be probably poor if we were in hundreds or thousands of guilds
-            # but we ain't so this is fine lol
-            autoresponder_channels.clear()
+            channels = await self.bot.db.remove_allowlist_channel(str(ctx.guild_id), str(channel.id))
         else:
-            await self.bot.db.add_allowlist_channel(str(ctx.guild_id), str(channel.id))
-            autoresponder_channels.clear()
+            channels = await self.bot.db.add_allowlist_channel(str(ctx.guild_id), str(channel.id))
+
+        set_allowlist_channels(ctx.guild_id, channels)  # type: ignore
 
         embed = StandardEmbed(footer_icon_url=str(ctx.user.display_avatar))
         embed.title = f"{BLOXLINK_HAPPY} Success!"
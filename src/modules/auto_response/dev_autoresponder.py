@@ -4,6 +4,7 @@ from discord.ext import commands
 
 from resources.constants import ADMIN_ROLES
 from resources.helper_bot import HelperBot
+from resources.message_pipeline import MessageContext
 
 
 @app_commands.guild_only()
@@ -14,50 +15,47 @@ class DevAutoresponder(commands.GroupCog, name="dev_autoresponder"):
         self.bot: HelperBot = bot
         super().__init__()
 
-    @commands.Cog.listener("on_message")
-    async def message_handler(self, message: discord.Message):
-        if (
-            message.author.bot
-            or not message.guild
-            or not type(message.author) == discord.Member
-            or not message.reference
-            or not message.mentions
-        ):
-            return
+    async def cog_load(self):
+        # After the auto responder, so it never waits on the fetches below. See MessagePipeline.
+        self.bot.message_pipeline.register("dev_autoresponder", self.message_handler, priority=30)
+
+    async def cog_unload(self):
+        self.bot.message_pipeline.unregister("dev_autoresponder")
+
+    async def message_handler(self, context: MessageContext) -> bool:
+        message = context.message
+        if not message.reference or not message.mentions or context.bypasses_automation:
+            # Let helpers & admins bypass it.
+            return False
 
         referenced_message = message.reference.cached_message or await message.channel.fetch_message(
             message.reference.message_id  # type: ignore
         )
         if not referenced_message:
             # could not find the referenced message.
-            return
+            return False
 
-        volunteers_role = ADMIN_ROLES["hq_volunteers"]
         dev_role = ADMIN_ROLES["dev"]
-        author_roles = [x.id for x in message.author.roles]
-        if volunteers_role in author_roles or dev_role in author_roles:
-            # Let helpers & admins bypass it.
-            return
 
         referenced_author = referenced_message.author
         if type(referenced_author) == discord.User:
             # Convert to member
-            referenced_author = message.guild.get_member(
+            referenced_author = context.guild.get_member(
                 referenced_message.author.id
-            ) or await message.guild.fetch_member(referenced_message.author.id)
+            ) or await context.guild.fetch_member(referenced_message.author.id)
 
         if referenced_author is None:
             # Failed to convert to member
-            return
+            return False
 
         if referenced_author.id not in [x.id for x in message.mentions]:
             # message contained a mention, but it likely is not on the message reply
-            return
+            return False
 
         ref_author_roles = [x.id for x in referenced_author.roles]  # type: ignore
         if dev_role not in ref_author_roles:
             # allow other people to reply to each other
-            return
+            return False
 
         reply_msg = await message.reply(
             content=(
@@ -70,6 +68,7 @@ class DevAutoresponder(commands.GroupCog, name="dev_autoresponder"):
 
         await message.delete(delay=self.TIME_TO_DELETE)
         await reply_msg.delete(delay=self.TIME_TO_DELETE)
+        return True
 
 
 async def setup(bot: HelperBot):
@@ -1,6 +1,7 @@
 import logging
 import unicodedata
 
+import attrs
 import discord
 
 import resources.responder_parsing as resp_parsing
@@ -10,7 +11,7 @@ from resources.helper_bot import HelperBot
 from resources.models.autoresponse import AutoResponse
 from resources.utils.base_embeds import ErrorEmbed, StandardEmbed
 
-from .shared_cache import stored_trigger_map
+from .shared_cache import get_cached_responder, upsert_responder
 
 
 class MessageEditModal(discord.ui.Modal, title="Update Message"):
@@ -44,10 +45,9 @@ class MessageEditModal(discord.ui.Modal, title="Update Message"):
             author=author_id,
         )
 
-        logging.info(
-            f"Clearing stored trigger map - responder {responder_name} message updated. - {id(stored_trigger_map)}"
-        )
-        stored_trigger_map.clear()
+        cached = get_cached_responder(responder_name)
+        if cached is not None:
+            upsert_responder(attrs.evolve(cached, response_message=self.response_msg.value, author=author_id))
 
         ar = AutoResponse(name=responder_name, response_message=self.response_msg.value, author=author_id)
         embed = StandardEmbed(footer_icon_url=str(interaction.user.display_avatar))
@@ -88,7 +88,7 @@ class NewResponderModal(discord.ui.Modal, title="New Auto Response"):
         auto_delete = int(custom_data[2])
 
         normalized_trigger_string = unicodedata.normalize("NFKC", self.trigger_string.value)
-        resp_parsing.validate_trigger_string(normalized_trigger_string)
+        resp_parsing.compile_trigger(normalized_trigger_string)
 
         if type(interaction.client) is not HelperBot:
             logging.error("Client wasn't the same as the main instance.")
@@ -103,11 +103,6 @@ class NewResponderModal(discord.ui.Modal, title="New Auto Response"):
             auto_deletion=auto_delete,
         )
 
-        logging.info(
-            f"Clearing stored trigger map - responder {responder_name} newly created. - {id(stored_trigger_map)}"
-        )
-        stored_trigger_map.clear()
-
         ar = AutoResponse(
             name=responder_name,
             response_message=self.response_msg.value,
@@ -115,6 +110,8 @@ class NewResponderModal(discord.ui.Modal, title="New Auto Response"):
             message_triggers=[normalized_trigger_string],
             auto_deletion=auto_delete,
         )
+        # Names are stored lowercase in the database.
+        upsert_responder(attrs.evolve(ar, name=responder_name.lower()))
 
         await interaction.response.send_message(
             (
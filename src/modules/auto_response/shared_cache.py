@@ -1,4 +1,248 @@
+import asyncio
+import logging
+from typing import Iterable
+
+from pymongo.errors import PyMongoError
+
+from resources.helper_bot import MongoDB
 from resources.models.autoresponse import AutoResponse
+from resources.responder_parsing import TriggerMatcher
+from resources.utils.collection_watcher import CollectionChange
+from resources.utils.single_flight import SingleFlight
 
 stored_trigger_map: dict[str, AutoResponse] = dict()
-autoresponder_channels: dict[str, set] = dict()
+# Guild ID -> IDs of the channels the auto responder is allowed in. Every guild is loaded at startup.
+autoresponder_channels: dict[int, frozenset[int]] = dict()
+
+# Built from the enabled responders in stored_trigger_map whenever that map is reloaded.
+trigger_matcher: TriggerMatcher[AutoResponse] = TriggerMatcher()
+
+_loads: SingleFlight[str, None] = SingleFlight()
+# Bumped on every cache write, so a load that raced with a write knows its data may be stale.
+_trigger_map_version = 0
+# Folds single responder edits into the trigger matcher's automaton, off the message path.
+_compaction: asyncio.Task | None = None
+# Guilds whose channels changed while the allowlist was being loaded, None when no load is running.
+_allowlist_changed_during_load: set[int] | None = None
+
+
+async def ensure_trigger_map(db: MongoDB):
+    """Load the stored trigger map if it is empty. Concurrent callers share a single database read."""
+    if not stored_trigger_map:
+        await _loads.run("triggers", lambda: _load_trigger_map(db))
+
+
+async def load_allowlist_channels(db: MongoDB):
+    """Load the auto responder channels of every guild with one query, replacing what is cached."""
+    await _loads.run("channels", lambda: _load_allowlist_channels(db))
+
+
+async def retry_allowlist_load(db: MongoDB, *, initial_delay: float = 5.0, max_delay: float = 300.0):
+    """Keep trying to load the allowlist channels until it works, backing off between attempts.
+
+    Meant to run in the background after the load at startup failed. Until it succeeds, no channel is
+    allowlisted.
+    """
+    delay = initial_delay
+    while True:
+        await asyncio.sleep(delay)
+        try:
+            await load_allowlist_channels(db)
+            return
+        except PyMongoError:
+            logging.exception(f"Loading the auto responder channels failed again, retrying in {delay}s.")
+            delay = min(delay * 2, max_delay)
+
+
+def is_allowlisted(guild_id: int, channel_id: int) -> bool:
+    """Check if the auto responder is allowed to respond in a channel. Never reads the database."""
+    channels = autoresponder_channels.get(guild_id)
+    return channels is not None and channel_id in channels
+
+
+def set_allowlist_channels(guild_id: int | str, channels: Iterable[int | str]):
+    """Replace the cached channels for one guild after they were saved to the database."""
+    guild_id = int(guild_id)
+    autoresponder_channels[guild_id] = frozenset(int(channel_id) for channel_id in channels)
+
+    if _allowlist_changed_during_load is not None:
+        _allowlist_changed_during_load.add(guild_id)
+
+
+async def _load_trigger_map(db: MongoDB):
+    logging.info("Updating the stored trigger map...")
+    version = _trigger_map_version
+
+    # Read in batches, so the raw documents of a batch can be freed once it's converted.
+    new_map: dict[str, AutoResponse] = {}
+    async for batch in db.iter_autoresponse_batches():
+        for data in batch:
+            ar = AutoResponse.from_database(data)
+            for tr in ar.message_triggers:
+                new_map[tr] = ar
+
+    if version != _trigger_map_version:
+        # A responder changed while we were reading. Leave the map empty so the next message loads it again.
+        logging.info("Discarding stored trigger map update, a responder was changed during the load.")
+        return
+
+    # No awaits from here on, so no other task can see a half updated map.
+    stored_trigger_map.clear()
+    stored_trigger_map.update(new_map)
+    trigger_matcher.rebuild((tr, ar) for tr, ar in stored_trigger_map.items() if ar.enabled)
+
+    logging.info(
+        f"Stored trigger map updated. There are now {len(stored_trigger_map)} values in the map. - {id(stored_trigger_map)}"
+    )
+
+
+async def _load_allowlist_channels(db: MongoDB):
+    global _allowlist_changed_during_load
+
+    logging.info("Updating stored auto responder channel map...")
+    _allowlist_changed_during_load = set()
+    try:
+        guild_channels = await db.get_allowlist_channels_by_guild()
+    finally:
+        changed, _allowlist_changed_during_load = _allowlist_changed_during_load, None
+
+    new_channels = {
+        int(guild_id): frozenset(int(channel_id) for channel_id in channels)
+        for guild_id, channels in guild_channels.items()
+    }
+    # Guilds changed during the read may have been read before the change, the cache already has them right.
+    for guild_id in changed:
+        new_channels[guild_id] = autoresponder_channels[guild_id]
+
+    autoresponder_channels.clear()
+    autoresponder_channels.update(new_channels)
+
+    logging.info(
+        f"Stored autoresponder channel list updated. There are now {len(autoresponder_channels)} guilds in the set."
+    )
+
+
+def get_cached_responder(name: str) -> AutoResponse | None:
+    """Find a responder in the stored trigger map by its name."""
+    name = name.lower()
+    return next((ar for ar in stored_trigger_map.values() if ar.name.lower() == name), None)
+
+
+def upsert_responder(ar: AutoResponse):
+    """Update the cached triggers for a single responder after it was saved to the database.
+
+    Does nothing if the stored trigger map hasn't been loaded yet, since the next load will include it.
+
+    Args:
+        ar (AutoResponse): The responder as it is now saved, with an exhaustive list of its triggers.
+    """
+    _bump_version()
+    if not stored_trigger_map:
+        return
+
+    _remove_triggers(ar.name, keep=set(ar.message_triggers))
+
+    for tr in ar.message_triggers:
+        stored_trigger_map[tr] = ar
+        if ar.enabled:
+            trigger_matcher.upsert(tr, ar)
+        else:
+            trigger_matcher.discard(tr)
+
+    _schedule_compaction()
+    logging.info(f"Updated stored trigger map for responder {ar.name}. - {id(stored_trigger_map)}")
+
+
+def remove_responder(name: str):
+    """Remove every cached trigger for a responder after it was deleted from the database."""
+    _bump_version()
+    if not stored_trigger_map:
+        return
+
+    _remove_triggers(name)
+    _schedule_compaction()
+    logging.info(f"Removed responder {name} from the stored trigger map. - {id(stored_trigger_map)}")
+
+
+def apply_responder_change(change: CollectionChange):
+    """Keep the trigger cache in line with a change made to the auto_response collection elsewhere."""
+    match change.operation:
+        case "upsert":
+            upsert_responder(AutoResponse.from_database(dict(change.document or {})))
+        case "delete":
+            remove_responder(str(change.document_id))
+        case "invalidate":
+            _bump_version()
+            stored_trigger_map.clear()
+            trigger_matcher.rebuild([])
+
+
+def apply_config_change(change: CollectionChange):
+    """Keep the allowlist channel cache in line with a change made to the config collection elsewhere.
+
+    An invalidate leaves the cache as it is, the caller has to reload it with load_allowlist_channels.
+    """
+    match change.operation:
+        case "upsert":
+            set_allowlist_channels(
+                str(change.document_id), (change.document or {}).get("responder_channels", [])
+            )
+        case "delete":
+            set_allowlist_channels(str(change.document_id), [])
+
+
+def _remove_triggers(name: str, *, keep: set[str] | None = None):
+    name = name.lower()
+    keep = keep or set()
+
+    removed = [tr for tr, ar in stored_trigger_map.items() if ar.name.lower() == name and tr not in keep]
+    for tr in removed:
+        del stored_trigger_map[tr]
+        trigger_matcher.discard(tr)
+
+        # Another responder could share this trigger string, it gets it back like it would on a full reload.
+        fallback = next(
+            (
+                ar
+                for ar in stored_trigger_map.values()
+                if ar.name.lower() != name and tr in ar.message_triggers
+            ),
+            None,
+        )
+        if fallback is not None:
+            stored_trigger_map[tr] = fallback
+            if fallback.enabled:
+                trigger_matcher.upsert(tr, fallback)
+
+
+def _schedule_compaction():
+    global _compaction
+
+    if _compaction is not None and not _compaction.done():
+        # The running compaction loops until nothing is left to fold in.
+        return
+
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        # No event loop (scripts and tests), matching works without it.
+        return
+    _compaction = loop.create_task(_compact_trigger_matcher())
+
+
+async def _compact_trigger_matcher():
+    try:
+        while trigger_matcher.needs_compaction:
+            await trigger_matcher.compact()
+    except Exception:
+        logging.exception("Compacting the trigger matcher failed, edits are still matched without it.")
+
+
+def trigger_map_version() -> int:
+    """Changes whenever a responder is saved, deleted or reloaded, whether or not the trigger map is loaded."""
+    return _trigger_map_version
+
+
+def _bump_version():
+    global _trigger_map_version
+    _trigger_map_version += 1
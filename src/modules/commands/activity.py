@@ -1,17 +1,18 @@
 import typing
 from datetime import datetime, timezone
 
-import discord
 from discord import app_commands
 from discord.ext import commands
 from discord.ext.commands import Context, check
 
 from resources.checks import is_cm, is_hr
-from resources.constants import ADMIN_ROLES, BLURPLE, SUPPORT_CHANNEL, TRIAL_ROLE
+from resources.constants import BLURPLE, SUPPORT_CHANNEL
 from resources.exceptions import HelperError
 from resources.helper_bot import HelperBot
 from resources.helper_bot import instance as bot
+from resources.message_pipeline import MessageContext, StaffTier
 from resources.utils.base_embeds import StandardEmbed
+from resources.utils.user_resolver import UserResolver
 
 
 class DateConverter(commands.Converter):
@@ -101,26 +102,24 @@ class DateConverter(commands.Converter):
 class Activity(commands.Cog):
     def __init__(self, bot):
         self.bot: HelperBot = bot
+        self.user_resolver = UserResolver(bot)
         super().__init__()
 
-    @commands.Cog.listener("on_message")
-    async def message_listener(self, message: discord.Message):
-        if (
-            message.author.bot
-            or not message.guild
-            or not type(message.author) == discord.Member
-            or message.channel.id != SUPPORT_CHANNEL
-            or message.content.startswith(str(bot.command_prefix))
-        ):
-            return
+    async def cog_load(self):
+        # Runs first since it only counts messages, and every staff message should be counted.
+        self.bot.message_pipeline.register("activity", self.message_listener, priority=0)
+
+    async def cog_unload(self):
+        self.bot.message_pipeline.unregister("activity")
 
-        author_roles = set([role.id for role in message.author.roles])
-        staff_roles = set(ADMIN_ROLES.values())
+    async def message_listener(self, context: MessageContext):
+        if context.message.channel.id != SUPPORT_CHANNEL or context.is_command:
+            return
 
-        if TRIAL_ROLE in author_roles:
-            await bot.db.update_staff_metric(str(message.author.id), "trial", incr_message=True)
-        elif author_roles.intersection(staff_roles):
-            await bot.db.update_staff_metric(str(message.author.id), "volunteer", incr_message=True)
+        if context.staff_tier is StaffTier.TRIAL:
+            bot.db.update_staff_metric(str(context.author.id), "trial", incr_message=True)
+        elif context.staff_tier is StaffTier.VOLUNTEER:
+            bot.db.update_staff_metric(str(context.author.id), "volunteer", incr_message=True)
 
     @commands.hybrid_group(name="activity")
     @check(is_hr)
@@ -182,10 +181,10 @@ class Activity(commands.Cog):
         else:
             await ctx.defer(ephemeral=True)
 
+            names = await self.user_resolver.resolve_names(int(user.id) for user in metric_list)
             for user in metric_list:
-                duser = bot.get_user(int(user.id)) or await bot.fetch_user(int(user.id))
                 desc_output.append(
-                    f"<@{user.id}> ({duser.name}): "
+                    f"<@{user.id}> ({names.get(int(user.id), 'unknown user')}): "
                     f"`{user.messages}` message{'s' if user.messages != 1 else ''}; "
                     f"`{user.tags}` tag{'s' if user.tags != 1 else ''} ran"
                 )
@@ -1,7 +1,6 @@
 from datetime import datetime
 
 import discord
-import requests
 from discord.ext.commands import Context, check
 
 from resources.checks import is_dev, is_hr, is_staff_or_trial
@@ -9,6 +8,9 @@ from resources.constants import BLOXLINK_DEAD, BLOXLINK_GUILD, BLURPLE, RED, TEA
 from resources.exceptions import HelperError
 from resources.helper_bot import instance as bot
 from resources.secrets import BLOXLINK_API_KEY  # pyright: ignore[reportAttributeAccessIssue]
+from resources.utils.bloxlink_api import BloxlinkAPI
+
+bloxlink_api = BloxlinkAPI(bot.aiohttp, BLOXLINK_API_KEY, BLOXLINK_GUILD)
 
 
 @bot.command("api", description="Fetch information via Bloxlink API.")
@@ -57,7 +59,12 @@ async def api_menu(interaction: discord.Interaction, user: discord.Member):
         )
         return
 
-    response_embed, response_buttons = await api_request_handler(user.id)
+    try:
+        response_embed, response_buttons = await api_request_handler(user.id)
+    except HelperError as err:
+        await interaction.response.send_message(content=str(err), ephemeral=True)
+        return
+
     response_embed.set_footer(text="Bloxlink Helper", icon_url=interaction.user.display_avatar)
 
     await interaction.response.send_message(
@@ -69,16 +76,13 @@ async def api_menu(interaction: discord.Interaction, user: discord.Member):
 
 
 async def api_request_handler(user_id: int) -> tuple:
-    url = f"https://api.blox.link/v4/public/guilds/{BLOXLINK_GUILD}/discord-to-roblox/{user_id}"
+    url = bloxlink_api.discord_to_roblox_url(user_id)
 
     embed = discord.Embed()
     embed.timestamp = datetime.now()
     embed.color = BLURPLE
 
-    async with bot.aiohttp.get(url, headers={"Authorization": BLOXLINK_API_KEY}) as api_req:
-        response = await api_req.json()
-
-    # TODO: Bring back handling/catching?
+    response = await bloxlink_api.discord_to_roblox(user_id)
 
     if response.get("resolved") is not None:
         del response["resolved"]
@@ -1,14 +1,14 @@
 import traceback
 from datetime import datetime
 
-import aiohttp
 import discord
 from discord.ext import commands
 
 from resources.constants import BLOXLINK_DETECTIVE, BLURPLE
 from resources.helper_bot import instance as bot
+from resources.utils.group_lookup import GroupLookup
 
-INFO_URL = "https://groups.roblox.com/v1/groups/{0}"
+group_lookup = GroupLookup(bot.aiohttp)
 
 
 class GroupIDConverter(commands.Converter):
@@ -52,34 +52,9 @@ class GroupIDConverter(commands.Converter):
 )
 @discord.app_commands.describe(group="The group ID or group URL you are looking up.")
 async def groupapi(ctx: commands.Context, group: GroupIDConverter):
-    # Query Roblox for group data.
-    info_data: dict | None = None
-    rank_data: dict | None = None
-    thumbnail_data: dict | None = None
-
-    info_url = INFO_URL.format(group)
-
-    async with bot.aiohttp.get(info_url) as info_req:
-        info_data = await info_req.json()
-    async with bot.aiohttp.get(f"{info_url}/roles") as rank_req:
-        rank_data = await rank_req.json()
-
-    # Get group icon.
-    async with bot.aiohttp.get(
-        "https://thumbnails.roblox.com/v1/groups/icons",
-        params={
-            "groupIds": [group],
-            "size": "420x420",
-            "format": "Png",
-            "isCircular": "false",
-        },  # type: ignore
-    ) as req:
-        thumbnail_data = await req.json()
+    group_info = await group_lookup.get(group)  # type: ignore
 
     desc_builder = []
-    name = "Invalid group."
-    members = 0
-    owner = "N/A"
 
     embed = discord.Embed(
         color=BLURPLE,
@@ -88,46 +63,31 @@ async def groupapi(ctx: commands.Context, group: GroupIDConverter):
     )
 
     # Build basic group info content
-    if info_data:
-        name = info_data.get("name", name)
-        members = info_data.get("memberCount", 0)
-
-        owner_data = info_data.get("owner", {})
-        if owner_data:
-            owner = owner_data.get("username", owner)
-
-    desc_builder.append(f"> **Name:** {name}")
-    desc_builder.append(f"> **Owner:** {owner}")
-    desc_builder.append(f"> **Member Count:** {members}")
+    desc_builder.append(f"> **Name:** {group_info.name}")
+    desc_builder.append(f"> **Owner:** {group_info.owner}")
+    desc_builder.append(f"> **Member Count:** {group_info.member_count}")
     desc_builder.append(" ")
 
     # Build rank data fields
-    if rank_data:
+    if group_info.ranks is not None:
         field_one = []
         field_two = []
 
         desc_builder.append(f"**Group Ranks:**")
 
-        ranks = rank_data.get("roles", [])
-        rank_count = len(ranks)
-        for i, rank in enumerate(ranks):
-            rank_name = rank.get("name", "Invalid Name")
-            rank_id = rank.get("rank", -1)
-
+        rank_count = len(group_info.ranks)
+        for i, rank in enumerate(group_info.ranks):
             if i < (rank_count / 2):
-                field_one.append(f"`{rank_id:<3d}`: {rank_name}")
+                field_one.append(f"`{rank.rank:<3d}`: {rank.name}")
             else:
-                field_two.append(f"`{rank_id:<3d}`: {rank_name}")
+                field_two.append(f"`{rank.rank:<3d}`: {rank.name}")
 
         embed.add_field(name="", value="\n".join(field_one), inline=True)
         embed.add_field(name="", value="\n".join(field_two), inline=True)
 
     # Set thumbnail of embed.
-    if thumbnail_data is not None:
-        thumbnail_data = thumbnail_data.get("data", [])
-        # Empty array is given for invalid IDs.
-        if thumbnail_data:
-            embed.set_thumbnail(url=thumbnail_data[0]["imageUrl"])
+    if group_info.icon_url:
+        embed.set_thumbnail(url=group_info.icon_url)
 
     embed.set_footer(text="Bloxlink Helper", icon_url=ctx.author.display_avatar)
     embed.description = "\n".join(desc_builder)
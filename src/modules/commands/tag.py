@@ -1,5 +1,4 @@
 import asyncio
-import math
 from datetime import datetime, timedelta
 
 import discord
@@ -12,7 +11,6 @@ from discord.ext.commands import (
     MissingRequiredArgument,
     check,
 )
-from textdistance import Sorensen
 
 from resources.checks import is_staff, is_staff_or_trial
 from resources.constants import (
@@ -28,41 +26,58 @@ from resources.constants import (
 )
 from resources.exceptions import HelperError
 from resources.helper_bot import instance as bot
+from resources.models.interaction_data import CustomID
+from resources.utils.name_index import NameIndex
+from resources.utils.paged_listing import Page, PagedListing
 
 MAX_TAGS_PER_PAGE = 20
+MAX_SEARCH_RESULTS = 25
+
+
+async def _load_tag_names() -> list[str]:
+    return [tag["_id"] for tag in await bot.db.get_all_tags(projection=[])]
+
+
+# Sorted tag names for tag all. Without the tag cache there's no version, so every page reads the database.
+_tag_listing = PagedListing(
+    _load_tag_names,
+    version=lambda: bot.db.tag_cache.version if bot.db.tag_cache.loaded else None,
+    page_size=MAX_TAGS_PER_PAGE,
+)
 
 # ------------ TAG AUTOCOMPLETE HANDLERS ------------
 
 
-async def tag_name_autocomplete(interaction: discord.Interaction, user_input: str):
-    tags = await bot.db.get_all_tags()
-    valid_names = []
-    for tag in tags:
-        valid_names.append(tag["_id"])
-        valid_names.extend(tag.get("aliases", []))
+# Rebuilt from the tag cache whenever its version changes.
+_name_index = NameIndex()
+_alias_index = NameIndex()
+_indexed_version: int | None = None
 
-    if user_input == "":
-        return [app_commands.Choice(name=name, value=name) for name in valid_names][:25]
 
-    valid_names = [
-        item for item in valid_names if Sorensen().similarity(user_input, item) > 0.65 or user_input in item
-    ]
-    return [app_commands.Choice(name=name, value=name) for name in valid_names][:25]
+async def _refresh_name_indexes():
+    global _indexed_version
 
+    tag_cache = bot.db.tag_cache
+    if tag_cache.loaded and _indexed_version == tag_cache.version:
+        return
 
-async def tag_alias_autocomplete(interaction: discord.Interaction, user_input: str):
-    tags = await bot.db.get_all_tags()
-    valid_names = []
-    for tag in tags:
-        valid_names.extend(tag.get("aliases", []))
+    tags = await bot.db.get_all_tags(projection=["aliases"])
+    aliases = [alias for tag in tags for alias in tag.get("aliases", [])]
+    _name_index.rebuild([*(tag["_id"] for tag in tags), *aliases])
+    _alias_index.rebuild(aliases)
 
-    if user_input == "":
-        return [app_commands.Choice(name=name, value=name) for name in valid_names][:25]
+    # Without the cache the tags came from the database, so they're fetched again next time.
+    _indexed_version = tag_cache.version if tag_cache.loaded else None
 
-    valid_names = [
-        item for item in valid_names if Sorensen().similarity(user_input, item) > 0.65 or user_input in item
-    ]
-    return [app_commands.Choice(name=name, value=name) for name in valid_names][:25]
+
+async def tag_name_autocomplete(interaction: discord.Interaction, user_input: str):
+    await _refresh_name_indexes()
+    return [app_commands.Choice(name=name, value=name) for name in _name_index.search(user_input, 25)]
+
+
+async def tag_alias_autocomplete(interaction: discord.Interaction, user_input: str):
+    await _refresh_name_indexes()
+    return [app_commands.Choice(name=name, value=name) for name in _alias_index.search(user_input, 25)]
 
 
 # ------------ TAG COMMANDS ------------
@@ -109,10 +124,7 @@ async def tag_base(ctx: Context, name: str, *, message: str = "0"):
             reference=ctx.message.reference,  # type: ignore
         )  # type: ignore
 
-    await bot.db.update_tag(
-        tag["_id"],
-        use_count=tag["use_count"] + 1,
-    )
+    bot.db.incr_tag_use(tag["_id"])
 
     # Update staff metrics - only when used in a valid channel in bloxlink guild.
     # TODO: Move this to its own method somewhere to be called instead of this copy pasted code.
@@ -122,9 +134,9 @@ async def tag_base(ctx: Context, name: str, *, message: str = "0"):
     author_roles = set([role.id for role in ctx.author.roles])  # type: ignore
     staff_roles = set(ADMIN_ROLES.values())
     if TRIAL_ROLE in author_roles:
-        await bot.db.update_staff_metric(str(ctx.author.id), "trial", incr_tags=True)
+        bot.db.update_staff_metric(str(ctx.author.id), "trial", incr_tags=True)
     elif author_roles.intersection(staff_roles):
-        await bot.db.update_staff_metric(str(ctx.author.id), "volunteer", incr_tags=True)
+        bot.db.update_staff_metric(str(ctx.author.id), "volunteer", incr_tags=True)
 
 
 @tag_base.command("add", description="Add a tag to the tag list.", aliases=["create"])
@@ -242,13 +254,9 @@ async def tag_info(ctx: Context, name: str = "0"):
 
 @tag_base.command("all", description="View all the tags in the tag list.")
 async def view_tag(ctx: Context):
-    # Get tags from the db, get their names, then sort alphabetically
-    tag_list = await bot.db.get_all_tags()
-    tag_names = [tag["_id"] for tag in tag_list]
-    tag_names.sort(reverse=False)
-
-    # Determine max # of pages
-    max_pages = math.ceil(len(tag_names) / MAX_TAGS_PER_PAGE)
+    # Tag names come sorted alphabetically from the listing snapshot
+    page = await _tag_listing.page(0)
+    max_pages = page.page_count
 
     # Build generic buttons into a view
     view = ui.View(timeout=None)
@@ -271,21 +279,18 @@ async def view_tag(ctx: Context):
     view.add_item(right_button)
 
     # Get the embed & send.
-    embed = await build_page(ctx.author.display_avatar.url, tag_names, 0)
+    embed = await build_page(ctx.author.display_avatar.url, page)
     await ctx.reply(embed=embed, view=view)
 
 
 @tag_base.command("search", description="Look up some tags based on a given query string.")
 @check(is_staff_or_trial)
-async def tag_search(ctx: Context, query: str = "0"):
+async def tag_search(ctx: Context, *, query: str = "0"):
     ## if name is empty, raise error
     if query == "0":
         raise HelperError("You forgot the search query!")
 
-    tag_list = await bot.db.get_all_tags()
-    matching_tags = [
-        tag["_id"] for tag in tag_list if query.lower().strip() in tag["content"].lower().strip()
-    ]
+    matching_tags = await bot.db.search_tags(query, limit=MAX_SEARCH_RESULTS)
 
     output = (
         "*Found tag names with this content:*\n" + "\n".join(matching_tags)
@@ -436,16 +441,12 @@ async def alias_command_errors(ctx: Context, error: CommandError):
 
 @bot.register_button_handler("tag_all")
 async def view_tag_buttons(interaction: discord.Interaction):
-    custom_id = interaction.data["custom_id"]  # type: ignore
-    custom_data = custom_id.split(":")
-
-    # Remove tag_all text
-    custom_data.pop(0)
+    custom_id = CustomID.parse(interaction.data["custom_id"])  # type: ignore
 
     # Get all other useful info from the custom id
-    author_id = custom_data[0]
-    new_page = int(custom_data[1])
-    max_pages = int(custom_data[2])
+    author_id, new_page, max_pages = custom_id.args
+    new_page = int(new_page)
+    max_pages = int(max_pages)
 
     # Only listen to the author of the command
     if str(author_id) != str(interaction.user.id):
@@ -490,21 +491,13 @@ async def view_tag_buttons(interaction: discord.Interaction):
     view.add_item(left_button)
     view.add_item(right_button)
 
-    # Get tags from the db, get their names, then sort alphabetically
-    tag_list = await bot.db.get_all_tags()
-    tag_names = [tag["_id"] for tag in tag_list]
-    tag_names.sort(reverse=False)
-
-    new_page = await build_page(interaction.user.display_avatar.url, tag_names, new_page)
-    await interaction.response.edit_message(embed=new_page, view=view)
-
+    page = await _tag_listing.page(new_page)
+    embed = await build_page(interaction.user.display_avatar.url, page)
+    await interaction.response.edit_message(embed=embed, view=view)
 
-async def build_page(avatar_url: str, items: list[str], page_num: int = 0):
-    max_pages = math.ceil(len(items) / MAX_TAGS_PER_PAGE)
 
-    # Grab the 20 elements that we care about
-    offset = page_num * MAX_TAGS_PER_PAGE
-    tag_names = items[offset : offset + MAX_TAGS_PER_PAGE]
+async def build_page(avatar_url: str, page: Page[str]):
+    tag_names = page.items
 
     # Build the embed.
     embed_tags = discord.Embed(
@@ -528,7 +521,7 @@ async def build_page(avatar_url: str, items: list[str], page_num: int = 0):
     embed_tags.add_field(name="", value="\n".join(field_two), inline=True)
 
     # footer
-    embed_tags.set_footer(text=f"Page {page_num + 1}/{max_pages}", icon_url=avatar_url)
+    embed_tags.set_footer(text=f"Page {page.index + 1}/{page.page_count}", icon_url=avatar_url)
 
     # return the entire embed
     return embed_tags
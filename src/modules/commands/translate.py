@@ -2,12 +2,14 @@ from datetime import datetime
 
 import discord
 from discord.ext.commands import Context, check
-from googletrans import Translator
 
 from resources.checks import is_staff_or_trial
 from resources.constants import BLOXLINK_HAPPY, BLURPLE
 from resources.exceptions import HelperError
 from resources.helper_bot import instance as bot
+from resources.utils.translation import TranslationService
+
+translator = TranslationService()
 
 
 @bot.command("translate", description="Translate text to different languages.", aliases=["tr"])
@@ -19,8 +21,7 @@ async def translate(ctx: Context, *, translate_string: str = "0"):
             "Missing argument `translate_string`. Please provide the string you would like to translate."
         )
 
-    translator = Translator()
-    translation = translator.translate(translate_string, dest="en")
+    translation = await translator.translate(translate_string, dest="en")
     translation_src = translation.src
     success_embed = discord.Embed()
     success_embed.title = f"{BLOXLINK_HAPPY} Translation Complete"
@@ -43,8 +44,7 @@ async def translate_menu(interaction: discord.Interaction, message: discord.Mess
         )
         return
 
-    translator = Translator()
-    translation = translator.translate(message.content, dest="en")
+    translation = await translator.translate(message.content, dest="en")
 
     success_embed = discord.Embed()
     success_embed.title = f"{BLOXLINK_HAPPY} Translation Complete"
@@ -65,3 +65,7 @@ async def translate_menu(interaction: discord.Interaction, message: discord.Mess
 
 async def setup(bot):
     bot.tree.add_command(translate_menu)
+
+
+async def teardown(bot):
+    translator.close()
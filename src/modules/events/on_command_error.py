@@ -69,10 +69,7 @@ async def on_command_error(ctx: Context, error: CommandError):
                     reference=ctx.message.reference,  # type: ignore
                 )  # type: ignore
 
-                await bot.db.update_tag(
-                    name,
-                    use_count=match_command["use_count"] + 1,
-                )
+                bot.db.incr_tag_use(match_command["_id"])
 
                 # Update staff metrics - only when used in a valid channel in bloxlink guild.
                 # TODO: Move this to its own method somewhere to be called instead of this copy pasted code.
@@ -82,9 +79,9 @@ async def on_command_error(ctx: Context, error: CommandError):
                 author_roles = set([role.id for role in ctx.author.roles])  # type: ignore
                 staff_roles = set(ADMIN_ROLES.values())
                 if TRIAL_ROLE in author_roles:
-                    await bot.db.update_staff_metric(str(ctx.author.id), "trial", incr_tags=True)
+                    bot.db.update_staff_metric(str(ctx.author.id), "trial", incr_tags=True)
                 elif author_roles.intersection(staff_roles):
-                    await bot.db.update_staff_metric(str(ctx.author.id), "volunteer", incr_tags=True)
+                    bot.db.update_staff_metric(str(ctx.author.id), "volunteer", incr_tags=True)
 
             return
 
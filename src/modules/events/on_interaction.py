@@ -19,13 +19,13 @@ async def on_interaction(interaction: Interaction):
             # Only really doing this cuz discord.py buries the actual type and these are basically dicts to us anyway.
             mcd = MessageComponentData(**interaction.data)  # type:ignore[reportArgumentType]
 
+            # Handlers are registered by the segment before the first ":", so only one can match.
+            prefix = mcd.parsed_custom_id.prefix
+            handler = None
+
             match mcd.component_type:
                 case ComponentType.button.value:
-                    for name, handler in bot.button_handlers.items():
-                        if not mcd.custom_id.startswith(name):
-                            continue
-
-                        await handler(interaction)
+                    handler = bot.button_handlers.get(prefix)
 
                 case (
                     ComponentType.string_select.value
@@ -34,11 +34,10 @@ async def on_interaction(interaction: Interaction):
                     | ComponentType.mentionable_select.value
                     | ComponentType.channel_select.value
                 ):
-                    for name, handler in bot.select_menu_handlers.items():
-                        if not mcd.custom_id.startswith(name):
-                            continue
+                    handler = bot.select_menu_handlers.get(prefix)
 
-                        await handler(interaction)
+            if handler is not None:
+                await handler(interaction)
 
         case InteractionType.application_command:
             pass
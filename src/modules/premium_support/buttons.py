@@ -4,6 +4,7 @@ from discord import AllowedMentions, ButtonStyle, ChannelType, Embed, Interactio
 
 from resources.constants import BLURPLE
 from resources.helper_bot import instance as bot
+from resources.models.interaction_data import CustomID
 
 
 @bot.register_button_handler("premium_support")
@@ -113,11 +114,9 @@ async def lock_button_handler(interaction: Interaction):
     if channel.type is ChannelType.private_thread:
         await channel.edit(archived=True, locked=True)
 
-    custom_id = interaction.data["custom_id"]  # type: ignore
-    if ":" in custom_id:
-        split = custom_id.split(":")
-        channel_id = split[1]
-        message_id = split[2]
+    custom_id = CustomID.parse(interaction.data["custom_id"])  # type: ignore
+    if len(custom_id.args) == 2:
+        channel_id, message_id = custom_id.args
 
         await bot.http.delete_message(channel_id=channel_id, message_id=message_id)
 
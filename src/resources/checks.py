@@ -12,6 +12,14 @@ from resources.constants import (
     WHITELISTED_USERS,
 )
 from resources.helper_bot import instance as bot
+from resources.utils.ttl_cache import TTLCache
+
+# User ID -> their role IDs in the Bloxlink guild, or None if they aren't in it.
+# There's no members intent, so role changes aren't pushed to us. The short TTL bounds how long a removed
+# staff role keeps passing the checks, while still covering a burst of commands.
+STAFF_ROLE_TTL = 30
+_bloxlink_roles: TTLCache[int, frozenset[int] | None] = TTLCache(STAFF_ROLE_TTL, max_size=4096)
+_MISSING = object()
 
 
 def developer_bypass(func):
@@ -28,60 +36,91 @@ def developer_bypass(func):
 @developer_bypass
 async def is_staff(ctx: Context | Interaction) -> bool:
     """Determine if the current user is Bloxlink staff or not."""
-    author = ctx.author if isinstance(ctx, Context) else ctx.user
-
-    if not ctx.guild:
+    roles = await _staff_roles(ctx)
+    if roles is None:
         return False
 
-    # Get roles from the Bloxlink guild (if you can)
-    # Updates the author argument accordingly.
-    if ctx.guild.id != BLOXLINK_GUILD:
-        try:
-            bloxlink_guild = bot.get_guild(BLOXLINK_GUILD) or await bot.fetch_guild(BLOXLINK_GUILD)
-            author = bloxlink_guild.get_member(author.id) or await bloxlink_guild.fetch_member(author.id)
-        except (Forbidden, HTTPException, NotFound):
-            # Fallback to roles in the current guild. Author is not updated.
-            pass
+    admin_roles = set(ADMIN_ROLES.values())
 
-    if not isinstance(author, Member):
-        # Because guild is true by here, this call is redundant. Just for Pylance/Pyright.
+    return len(roles.intersection(admin_roles)) != 0
+
+
+@developer_bypass
+async def is_staff_or_trial(ctx: Context | Interaction) -> bool:
+    """Determine if the current user is a trial, Bloxlink staff, or neither."""
+    roles = await _staff_roles(ctx)
+    if roles is None:
         return False
 
-    roles = {role.id for role in author.roles}
+    if TRIAL_ROLE in roles:
+        return True
 
     admin_roles = set(ADMIN_ROLES.values())
 
     return len(roles.intersection(admin_roles)) != 0
 
 
-@developer_bypass
-async def is_staff_or_trial(ctx: Context | Interaction) -> bool:
-    """Determine if the current user is a trial, Bloxlink staff, or neither."""
+async def _staff_roles(ctx: Context | Interaction) -> frozenset[int] | None:
+    """Get the role IDs to check staff permissions against, or None if they can't be checked here.
+
+    Roles come from the Bloxlink guild when possible, otherwise from the current guild.
+    Memoized for the lifetime of an interaction, so stacked checks only look them up once.
+    """
+    interaction = ctx if isinstance(ctx, Interaction) else ctx.interaction
+    if interaction is not None and "staff_roles" in interaction.extras:
+        return interaction.extras["staff_roles"]
+
+    roles = await _lookup_staff_roles(ctx)
+    if interaction is not None:
+        interaction.extras["staff_roles"] = roles
+
+    return roles
+
+
+async def _lookup_staff_roles(ctx: Context | Interaction) -> frozenset[int] | None:
     author = ctx.author if isinstance(ctx, Context) else ctx.user
 
     if not ctx.guild:
-        return False
+        return None
 
-    # Get roles from the Bloxlink guild (if you can)
-    # Updates the author argument accordingly.
-    if ctx.guild.id != BLOXLINK_GUILD:
-        try:
-            bloxlink_guild = bot.get_guild(BLOXLINK_GUILD) or await bot.fetch_guild(BLOXLINK_GUILD)
-            author = bloxlink_guild.get_member(author.id) or await bloxlink_guild.fetch_member(author.id)
-        except (Forbidden, HTTPException, NotFound):
-            # Fallback to roles in the current guild. Author is not updated.
-            pass
+    if ctx.guild.id == BLOXLINK_GUILD:
+        if not isinstance(author, Member):
+            # Because guild is true by here, this call is redundant. Just for Pylance/Pyright.
+            return None
 
-    if not isinstance(author, Member):
-        # Because guild is true by here, this call is redundant. Just for Pylance/Pyright.
-        return False
+        # Roles from the current guild are always up to date, so refresh the cache with them.
+        roles = frozenset(role.id for role in author.roles)
+        _bloxlink_roles.set(author.id, roles)
+        return roles
 
-    roles = {role.id for role in author.roles}
+    # Get roles from the Bloxlink guild (if you can).
+    roles = _bloxlink_roles.get(author.id, _MISSING)
+    if roles is _MISSING:
+        roles = await _fetch_bloxlink_roles(author.id)
 
-    if TRIAL_ROLE in roles:
-        return True
+    if roles is not None:
+        return roles
 
-    return await is_staff(ctx)
+    # Fallback to roles in the current guild.
+    if not isinstance(author, Member):
+        return None
+    return frozenset(role.id for role in author.roles)
+
+
+async def _fetch_bloxlink_roles(user_id: int) -> frozenset[int] | None:
+    try:
+        bloxlink_guild = bot.get_guild(BLOXLINK_GUILD) or await bot.fetch_guild(BLOXLINK_GUILD)
+        member = bloxlink_guild.get_member(user_id) or await bloxlink_guild.fetch_member(user_id)
+    except NotFound:
+        # Not in the Bloxlink guild, which is worth remembering too.
+        _bloxlink_roles.set(user_id, None)
+        return None
+    except (Forbidden, HTTPException):
+        return None
+
+    roles = frozenset(role.id for role in member.roles)
+    _bloxlink_roles.set(user_id, roles)
+    return roles
 
 
 async def is_dev(ctx: Context | Interaction) -> bool:
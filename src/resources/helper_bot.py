@@ -1,21 +1,37 @@
+import asyncio
 import logging
 import os
+import signal
 from datetime import datetime, timedelta, timezone
-from typing import Any, Literal, Optional, Type
+from typing import Any, AsyncIterator, Literal, Optional, Type
 
 import aiohttp
+import attrs
 import certifi
 import discord
 from discord.app_commands import CommandTree
 from discord.ext import commands
 from motor import motor_asyncio
+from pymongo import ASCENDING, IndexModel, ReturnDocument, UpdateOne
+from pymongo.errors import PyMongoError
 
 from resources.constants import DEVELOPMENT_GUILDS, TEAM_CENTER_GUILD
+from resources.message_pipeline import MessagePipeline
 from resources.models.database import MonthlyVolunteerMetrics
+from resources.utils.collection_watcher import CollectionChange, CollectionWatcher
+from resources.utils.counter_buffer import CounterBuffer
+from resources.utils.tag_cache import TagCache
 
 instance: "HelperBot" = None  # type: ignore
 logger = logging.getLogger()
 
+# Indexes that the MongoDB queries rely on, per collection. Created at startup if they don't exist yet.
+# Everything else is looked up by _id.
+INDEXES: dict[str, list[IndexModel]] = {
+    # Multikey, tags are looked up by their name or any of their aliases.
+    "tags": [IndexModel([("aliases", ASCENDING)], name="aliases")],
+}
+
 
 class HelperBot(commands.Bot):
     def __init__(
@@ -29,6 +45,9 @@ class HelperBot(commands.Bot):
         description: Optional[str] = None,
         intents: discord.Intents,
         sync_commands: bool = True,
+        watch_database: bool = False,
+        db_flush_interval: float = 60.0,
+        db_batch_size: int = 500,
         **options: Any,
     ) -> None:
         """Initialize the Helper Bot class.
@@ -41,10 +60,18 @@ class HelperBot(commands.Bot):
             help_command (Optional[commands.HelpCommand], optional): See discord.py docs. Defaults to None.
             tree_cls (Type[CommandTree], optional): See discord.py docs. Defaults to CommandTree.
             description (Optional[str], optional): See discord.py docs. Defaults to None.
+            sync_commands (bool, optional): Sync slash commands with Discord on startup. Defaults to True.
+            watch_database (bool, optional): Keep caches up to date with changes made to the database by
+                other processes. Defaults to False.
+            db_flush_interval (float, optional): Seconds between writes of buffered counters (like tag
+                uses) to the database. Defaults to 60.
+            db_batch_size (int, optional): Documents per batch when whole collections are read, like when
+                the caches are loaded. Defaults to 500.
         """
         global instance
 
         self.sync_commands = sync_commands
+        self.watch_database = watch_database
 
         super().__init__(
             command_prefix,
@@ -61,16 +88,30 @@ class HelperBot(commands.Bot):
         self.button_handlers = {}
         self.select_menu_handlers = {}
 
+        # Cogs register stages with this instead of adding their own on_message listeners.
+        self.message_pipeline = MessagePipeline(str(command_prefix))
+        self.add_listener(self.message_pipeline.dispatch, "on_message")
+
         self.aiohttp = aiohttp.ClientSession()
+        # Close started by a stop signal, kept so it isn't garbage collected mid shutdown.
+        self._shutdown_task: Optional[asyncio.Task] = None
 
         if mongodb_url:
-            self.db = MongoDB(mongodb_url)
+            self.db = MongoDB(mongodb_url, flush_interval=db_flush_interval, batch_size=db_batch_size)
         else:
             logger.error("NO MONGODB URL WAS FOUND.")
 
         instance = self
 
     async def setup_hook(self):
+        await self.db.ensure_indexes()
+        try:
+            await self.db.load_tag_cache()
+        except PyMongoError:
+            # Tag reads go to the database while the cache isn't loaded, the rest of the bot doesn't need it.
+            logger.exception("Could not load the tag cache, tags will be read from the database.")
+        self.db.start_buffers()
+
         # Load commands and cogs. Reads directories under "src/modules", specifically the ones
         # passed as the "modules" parameter.
         for module in self.modules:
@@ -115,6 +156,52 @@ class HelperBot(commands.Bot):
         else:
             logging.warning("Commands were not synced with Discord.")
 
+        if self.watch_database:
+            logging.info("Watching the database for changes...")
+            self.db.watcher.start()
+
+    async def serve(self, token: str):
+        """Run the bot until it is closed or the process is told to stop, then shut it down cleanly.
+
+        SIGTERM (docker stop) and SIGINT (Ctrl-C) close the bot, so buffered counters are written out
+        before the process exits.
+
+        Args:
+            token (str): The bot token to log in with.
+        """
+        loop = asyncio.get_running_loop()
+        handled_signals = []
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            try:
+                loop.add_signal_handler(sig, self._on_stop_signal, sig)
+                handled_signals.append(sig)
+            except (NotImplementedError, RuntimeError):
+                # Not supported on Windows, or outside the main thread.
+                logger.warning(f"Could not handle {sig.name}, the bot won't shut down cleanly on it.")
+
+        try:
+            async with self:
+                await self.start(token)
+        finally:
+            for sig in handled_signals:
+                loop.remove_signal_handler(sig)
+            if self._shutdown_task is not None:
+                await self._shutdown_task
+
+    def _on_stop_signal(self, sig: signal.Signals):
+        if self._shutdown_task is not None:
+            logger.info(f"Received {sig.name}, already shutting down.")
+            return
+
+        logger.info(f"Received {sig.name}, shutting down.")
+        self._shutdown_task = asyncio.create_task(self.close())
+
+    async def close(self):
+        if hasattr(self, "db"):
+            await self.db.watcher.stop()
+            await self.db.flush_buffers()
+        await super().close()
+
     @property
     def uptime(self) -> timedelta:
         """The current uptime of the bot as a timedelta."""
@@ -124,8 +211,10 @@ class HelperBot(commands.Bot):
         """Decorator to register a handler to handle a custom_id for a button.
 
         Args:
-            custom_id_prefix (str): The custom ID that this handler will be for.
+            custom_id_prefix (str): The custom ID that this handler will be for. Matched against the part of
+                the custom ID before the first ":".
         """
+        _validate_custom_id_prefix(custom_id_prefix, self.button_handlers)
 
         # Basic form of a decorator except we're just using it to add the handler
         # to the relevant dictionary
@@ -138,8 +227,10 @@ class HelperBot(commands.Bot):
         """Decorator to register a handler to handle a custom_id for a selection menu.
 
         Args:
-            custom_id_prefix (str): The custom ID that this handler will be for.
+            custom_id_prefix (str): The custom ID that this handler will be for. Matched against the part of
+                the custom ID before the first ":".
         """
+        _validate_custom_id_prefix(custom_id_prefix, self.select_menu_handlers)
 
         # Basic form of a decorator except we're just using it to add the handler
         # to the relevant dictionary
@@ -149,29 +240,187 @@ class HelperBot(commands.Bot):
         return inner
 
 
+def _validate_custom_id_prefix(custom_id_prefix: str, handlers: dict):
+    if ":" in custom_id_prefix:
+        raise ValueError(f'Custom ID prefix "{custom_id_prefix}" can\'t contain ":".')
+
+    if custom_id_prefix in handlers:
+        # Expected when an extension is reloaded, the new handler replaces the old one.
+        logger.info(f"Replacing the handler for custom ID prefix {custom_id_prefix}.")
+
+
 class MongoDB:
-    def __init__(self, connection_string: str) -> None:
+    def __init__(
+        self, connection_string: str, *, flush_interval: float = 60.0, batch_size: int = 500
+    ) -> None:
         """Initializes the MongoDB connection.
 
         Args:
             connection_string (str): The URL to connect to MongoDB with.
+            flush_interval (float, optional): Seconds between writes of buffered counters. Defaults to 60.
+            batch_size (int, optional): Default number of documents per batch when reading whole
+                collections. Defaults to 500.
         """
+        self.batch_size = batch_size
         logger.info("Connecting to MongoDB.")
         self.client = motor_asyncio.AsyncIOMotorClient(connection_string, tlsCAFile=certifi.where())
         self.db = self.client.get_default_database("bloxlink_helper")
         logger.info(f"MongoDB initialized. Connected to database {self.db.name}")
 
+        # Only runs if the bot is started with watch_database, subscribers are added by the modules.
+        self.watcher = CollectionWatcher(self.db)
+
+        self.tag_cache = TagCache()
+        self.watcher.subscribe("tags", self._on_tag_change)
+
+        # Tag name -> uses that haven't been written yet.
+        self.tag_uses: CounterBuffer[str] = CounterBuffer(self._flush_tag_uses, interval=flush_interval)
+        # (month, staff position, staff id, counter) -> increments that haven't been written yet.
+        self.staff_metrics: CounterBuffer[tuple[str, str, str, str]] = CounterBuffer(
+            self._flush_staff_metrics, interval=flush_interval, max_keys=5_000
+        )
+
+    def start_buffers(self):
+        """Start periodically writing buffered counters to the database."""
+        self.tag_uses.start()
+        self.staff_metrics.start()
+
+    async def flush_buffers(self):
+        """Stop the periodic writes and write out every buffered counter."""
+        await self.tag_uses.stop()
+        await self.staff_metrics.stop()
+
+    async def ensure_indexes(self):
+        """Create any of the indexes in INDEXES that don't exist yet.
+
+        A failure is logged rather than raised, the queries still work without the indexes, just slower.
+        """
+        for collection, indexes in INDEXES.items():
+            try:
+                created = await self.db[collection].create_indexes(indexes)
+            except PyMongoError:
+                logger.exception(f"Could not ensure the indexes for the {collection} collection.")
+                continue
+
+            logger.info(f"Ensured indexes {', '.join(created)} on the {collection} collection.")
+
+    async def _stream(
+        self, collection: str, query: Optional[dict] = None, projection: Optional[list[str]] = None
+    ) -> AsyncIterator[dict]:
+        async for batch in self._stream_batches(collection, query, projection):
+            for document in batch:
+                yield document
+
+    async def _stream_batches(
+        self,
+        collection: str,
+        query: Optional[dict] = None,
+        projection: Optional[list[str]] = None,
+        batch_size: Optional[int] = None,
+    ) -> AsyncIterator[list[dict]]:
+        batch_size = self.batch_size if batch_size is None else batch_size
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1.")
+
+        # _id is always included, which also keeps an empty projection from meaning "every field".
+        fields = None if projection is None else {"_id": 1, **dict.fromkeys(projection, 1)}
+        # The cursor fetches as many documents from the server at a time as we hand out per batch, so no more
+        # than about one batch is held in memory on our side.
+        cursor = self.db[collection].find(query or {}, fields).batch_size(batch_size)
+
+        batch: list[dict] = []
+        async for document in cursor:
+            batch.append(document)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+
+        if batch:
+            yield batch
+
+    @staticmethod
+    def _project(document: dict, projection: Optional[list[str]]) -> dict:
+        # Matches what the database returns for an inclusion projection.
+        if projection is None:
+            return document
+        return {key: document[key] for key in ("_id", *projection) if key in document}
+
+    @staticmethod
+    def _tag_filter(name: str) -> dict:
+        name = name.lower()
+        return {
+            "$or": [
+                {"_id": name},
+                {"aliases": name},
+            ],
+        }
+
     ####
     ####################---------TAG METHODS-----------########################
     ####
-    async def get_all_tags(self) -> list:
+    async def load_tag_cache(self):
+        """Load every tag into the tag cache, which then serves tag reads."""
+        # Only the cache itself holds every tag, the batches just hand them over.
+        self.tag_cache.load(
+            [self._with_pending_uses(tag) async for batch in self.iter_tag_batches() for tag in batch]
+        )
+
+    async def _on_tag_change(self, change: CollectionChange):
+        if change.operation == "upsert" and change.document is not None:
+            # Copied, the change is shared with every other subscriber.
+            change = attrs.evolve(change, document=self._with_pending_uses(dict(change.document)))
+
+        self.tag_cache.apply_change(change)
+        if change.operation == "invalidate":
+            await self.load_tag_cache()
+
+    def _with_pending_uses(self, tag: dict) -> dict:
+        """Add the uses still waiting in tag_uses to a tag read from the database, before it is cached.
+
+        The cache counted them when they happened, replacing its copy with the stored one would lose them.
+        """
+        pending = self.tag_uses[tag["_id"]]
+        if pending:
+            tag["use_count"] = tag.get("use_count", 0) + pending
+        return tag
+
+    async def get_all_tags(self, projection: Optional[list[str]] = None) -> list:
         """Return a list of all the tags in the database.
 
+        Served from the tag cache when it is loaded, do not modify the returned tags.
+
+        Args:
+            projection (list[str], optional): Only include these fields (and _id) in each tag.
+                Defaults to every field.
+
         Returns:
             list: List of the tags, each tag is a dictionary.
         """
-        cursor = self.db["tags"].find()
-        return await cursor.to_list(None)
+        if self.tag_cache.loaded:
+            return [self._project(tag, projection) for tag in self.tag_cache.all()]
+
+        return [tag async for tag in self.iter_tags(projection)]
+
+    def iter_tags(self, projection: Optional[list[str]] = None) -> AsyncIterator[dict]:
+        """Stream every tag from the database, bypassing the tag cache.
+
+        Args:
+            projection (list[str], optional): Only include these fields (and _id) in each tag.
+                Defaults to every field.
+        """
+        return self._stream("tags", projection=projection)
+
+    def iter_tag_batches(
+        self, batch_size: Optional[int] = None, projection: Optional[list[str]] = None
+    ) -> AsyncIterator[list[dict]]:
+        """Stream every tag from the database in batches, bypassing the tag cache.
+
+        Args:
+            batch_size (int, optional): Tags per batch. Defaults to the batch size the class was created with.
+            projection (list[str], optional): Only include these fields (and _id) in each tag.
+                Defaults to every field.
+        """
+        return self._stream_batches("tags", projection=projection, batch_size=batch_size)
 
     async def get_tag(self, name: str) -> dict | None:
         """Get a single tag from the database
@@ -182,17 +431,27 @@ class MongoDB:
         Returns:
             dict | None: The tag data if it exists, otherwise None.
         """
-        name = name.lower()
-        query = {
-            "$or": [
-                {"_id": name},
-                {"aliases": name},
-            ],
-        }
+        if self.tag_cache.loaded:
+            return self.tag_cache.get(name)
 
-        cursor = await self.db["tags"].find_one(query)
+        cursor = await self.db["tags"].find_one(self._tag_filter(name))
         return cursor
 
+    async def search_tags(self, query: str, limit: Optional[int] = None) -> list[str]:
+        """Search the name, aliases and content of every tag.
+
+        Args:
+            query (str): Words that must all be found in a tag. The last one can be partially typed.
+            limit (int, optional): Most results to return. Defaults to all of them.
+
+        Returns:
+            list[str]: Names of the matching tags, best match first.
+        """
+        if not self.tag_cache.loaded:
+            await self.load_tag_cache()
+
+        return self.tag_cache.search(query, limit)
+
     async def update_tag(
         self,
         name: str,
@@ -244,18 +503,31 @@ class MongoDB:
             logger.warning(f"No data was found when updating the tag {name}.")
             return
 
-        filter_query = {
-            "$or": [
-                {"_id": name},
-                {"aliases": name},
-            ],
-        }
-
-        await self.db["tags"].update_one(
-            filter=filter_query,
+        updated = await self.db["tags"].find_one_and_update(
+            filter=self._tag_filter(name),
             update={"$set": data, "$setOnInsert": {"_id": name}},
             upsert=True,
+            return_document=ReturnDocument.AFTER,
         )
+        if updated is not None:
+            self.tag_cache.upsert(self._with_pending_uses(updated))
+
+    def incr_tag_use(self, name: str):
+        """Count a use of a tag. Written to the database in batches, see flush_buffers.
+
+        Args:
+            name (str): The name of the tag (not an alias).
+        """
+        self.tag_uses.incr(name)
+        self.tag_cache.add_uses(name)
+
+    async def _flush_tag_uses(self, uses: dict[str, int]):
+        # No upsert, a tag deleted since its last use should stay deleted.
+        await self.db["tags"].bulk_write(
+            [UpdateOne({"_id": name}, {"$inc": {"use_count": count}}) for name, count in uses.items()],
+            ordered=False,
+        )
+        logger.info(f"Wrote buffered uses for {len(uses)} tags.")
 
     async def delete_tag(self, name: str):
         """Removes a tag from the database based on a name or alias.
@@ -263,26 +535,24 @@ class MongoDB:
         Args:
             name (str): The name or alias of the tag.
         """
-        name = name.lower()
-        query = {
-            "$or": [
-                {"_id": name},
-                {"aliases": name},
-            ],
-        }
-        await self.db["tags"].delete_one(query)
+        deleted = await self.db["tags"].find_one_and_delete(self._tag_filter(name))
+        if deleted is not None:
+            self.tag_cache.remove(deleted["_id"])
 
     ####
     ####################---------STAFF METRIC METHODS-----------########################
     ####
-    async def update_staff_metric(
+    def update_staff_metric(
         self,
         staff_id: str,
         staff_pos: Literal["volunteer", "trial"],
         incr_message: bool = False,
         incr_tags: bool = False,
     ):
-        """Create a staff metric in the database"""
+        """Count a message or tag use towards a staff member's metrics for this month.
+
+        Written to the database in batches, see flush_buffers.
+        """
         now = datetime.now(timezone.utc)
         now_id = now.strftime("%Y-%m")
 
@@ -291,14 +561,23 @@ class MongoDB:
 
         staff_id = str(staff_id)
 
-        await self.db["metrics"].update_one(
-            filter={"_id": now_id},
-            update={"$inc": {f"{staff_pos}.{staff_id}.{'msg_count' if incr_message else 'tag_count'}": 1}},
-            upsert=True,
+        self.staff_metrics.incr((now_id, staff_pos, staff_id, "msg_count" if incr_message else "tag_count"))
+
+    async def _flush_staff_metrics(self, metrics: dict[tuple[str, str, str, str], int]):
+        # One update per month document, with every counter for that month in it.
+        months: dict[str, dict[str, int]] = {}
+        for (month, staff_pos, staff_id, counter), count in metrics.items():
+            months.setdefault(month, {})[f"{staff_pos}.{staff_id}.{counter}"] = count
+
+        await self.db["metrics"].bulk_write(
+            [UpdateOne({"_id": month}, {"$inc": incs}, upsert=True) for month, incs in months.items()],
+            ordered=False,
         )
+        logger.info(f"Wrote {len(metrics)} buffered staff metrics.")
 
     async def get_month_metrics(self, date: str) -> MonthlyVolunteerMetrics | None:
         """Return the metrics in the database for a given month. Includes trial and volunteer data."""
+        await self.staff_metrics.flush()
         cursor = await self.db["metrics"].find_one({"_id": date})
         if cursor:
             return MonthlyVolunteerMetrics.from_db(cursor)
@@ -408,14 +687,39 @@ class MongoDB:
             upsert=True,
         )
 
-    async def get_all_autoresponses(self) -> list:
+    async def get_all_autoresponses(self, projection: Optional[list[str]] = None) -> list:
         """Return a list of all the auto responses in the database.
 
+        Args:
+            projection (list[str], optional): Only include these fields (and _id) in each response.
+                Defaults to every field.
+
         Returns:
             list: List of the auto responses, each response is a dictionary.
         """
-        cursor = self.db["auto_response"].find()
-        return await cursor.to_list(None)
+        return [response async for response in self.iter_autoresponses(projection)]
+
+    def iter_autoresponses(self, projection: Optional[list[str]] = None) -> AsyncIterator[dict]:
+        """Stream every auto response from the database.
+
+        Args:
+            projection (list[str], optional): Only include these fields (and _id) in each response.
+                Defaults to every field.
+        """
+        return self._stream("auto_response", projection=projection)
+
+    def iter_autoresponse_batches(
+        self, batch_size: Optional[int] = None, projection: Optional[list[str]] = None
+    ) -> AsyncIterator[list[dict]]:
+        """Stream every auto response from the database in batches.
+
+        Args:
+            batch_size (int, optional): Responses per batch. Defaults to the batch size the class was created
+                with.
+            projection (list[str], optional): Only include these fields (and _id) in each response.
+                Defaults to every field.
+        """
+        return self._stream_batches("auto_response", projection=projection, batch_size=batch_size)
 
     async def get_autoresponse(self, name: str) -> dict | None:
         """Get a single auto response from the database
@@ -445,24 +749,53 @@ class MongoDB:
     ):
         return await self.db["config"].find_one({"_id": str(guild_id)}, {"responder_channels": 1})
 
+    async def get_allowlist_channels_by_guild(self) -> dict[str, list[str]]:
+        """Get the auto responder channels of every guild that has any, in one query.
+
+        Returns:
+            dict[str, list[str]]: Guild ID -> IDs of its auto responder channels.
+        """
+        return {
+            config["_id"]: config["responder_channels"]
+            async for config in self._stream(
+                "config", {"responder_channels": {"$exists": True}}, ["responder_channels"]
+            )
+        }
+
     async def add_allowlist_channel(
         self,
         guild_id: str,
         channel_id: str,
-    ):
-        await self.db["config"].update_one(
+    ) -> list[str]:
+        """Allow the auto responder in a channel.
+
+        Returns:
+            list[str]: Every auto responder channel in the guild, after the change.
+        """
+        updated = await self.db["config"].find_one_and_update(
             {"_id": str(guild_id)},
             update={"$addToSet": {"responder_channels": str(channel_id)}},
             upsert=True,
+            projection={"responder_channels": 1},
+            return_document=ReturnDocument.AFTER,
         )
+        return updated.get("responder_channels", []) if updated else []
 
     async def remove_allowlist_channel(
         self,
         guild_id: str,
         channel_id: str,
-    ):
-        await self.db["config"].update_one(
+    ) -> list[str]:
+        """Stop the auto responder from responding in a channel.
+
+        Returns:
+            list[str]: Every auto responder channel in the guild, after the change.
+        """
+        updated = await self.db["config"].find_one_and_update(
             {"_id": str(guild_id)},
             update={"$pull": {"responder_channels": str(channel_id)}},
             upsert=True,
+            projection={"responder_channels": 1},
+            return_document=ReturnDocument.AFTER,
         )
+        return updated.get("responder_channels", []) if updated else []
@@ -0,0 +1,132 @@
+import logging
+from enum import IntEnum
+from typing import Awaitable, Callable, Optional
+
+import attrs
+import discord
+
+from resources.constants import ADMIN_ROLES, TRIAL_ROLE
+from resources.responder_parsing import NormalizedMessage
+
+logger = logging.getLogger(__name__)
+
+STAFF_ROLES = frozenset(ADMIN_ROLES.values())
+# Roles that are never auto moderated or auto responded to.
+BYPASS_ROLES = frozenset({ADMIN_ROLES["hq_volunteers"], ADMIN_ROLES["dev"]})
+
+
+class StaffTier(IntEnum):
+    NONE = 0
+    TRIAL = 1
+    VOLUNTEER = 2
+
+
+@attrs.frozen
+class MessageContext:
+    """Everything the message stages need to know about a message, worked out once for all of them."""
+
+    message: discord.Message
+    author: discord.Member
+    guild: discord.Guild
+    role_ids: frozenset[int]
+    staff_tier: StaffTier
+    bypasses_automation: bool
+    is_command: bool
+    normalized_content: NormalizedMessage
+    allowlisted: bool
+
+
+# Returns True to stop any later stages from seeing the message.
+MessageStage = Callable[[MessageContext], Awaitable[Optional[bool]]]
+# Called with the guild and channel IDs of a message. Has to answer from memory, every message waits on it.
+AllowlistCheck = Callable[[int, int], bool]
+
+
+@attrs.define
+class _RegisteredStage:
+    name: str
+    priority: int
+    stage: MessageStage
+
+
+class MessagePipeline:
+    """Runs every guild message from a member through the registered stages, in priority order.
+
+    Replaces having one on_message listener per feature, which each repeated the same checks.
+
+    Stages run one after another, so a stage that awaits network calls delays every stage after it. Current
+    order: activity (0) and crypto spam deletion (10) decide from the message alone, the auto responder (20)
+    only awaits a reply once it has matched, and the developer ping warning (30) goes last because deciding
+    can take REST calls to fetch the replied to message and its author.
+    """
+
+    def __init__(self, command_prefix: str) -> None:
+        self.command_prefix = command_prefix
+        # Decides MessageContext.allowlisted. Set by the auto responder, which owns the allowlist.
+        self.allowlist_check: Optional[AllowlistCheck] = None
+
+        self._stages: list[_RegisteredStage] = []
+
+    def register(self, name: str, stage: MessageStage, *, priority: int = 100):
+        """Add a stage, replacing any stage with the same name.
+
+        Args:
+            name (str): Identifies the stage, for unregistering and logging.
+            stage (MessageStage): Called with the context of each message.
+            priority (int, optional): Stages with a lower priority run first. Defaults to 100.
+        """
+        self.unregister(name)
+        self._stages.append(_RegisteredStage(name, priority, stage))
+        self._stages.sort(key=lambda registered: registered.priority)
+
+    def unregister(self, name: str):
+        self._stages = [registered for registered in self._stages if registered.name != name]
+
+    async def build_context(self, message: discord.Message) -> Optional[MessageContext]:
+        """Work out the context of a message, or None if no stage should see it."""
+        if message.author.bot or not message.guild or not isinstance(message.author, discord.Member):
+            return None
+
+        role_ids = frozenset(role.id for role in message.author.roles)
+
+        if TRIAL_ROLE in role_ids:
+            staff_tier = StaffTier.TRIAL
+        elif not role_ids.isdisjoint(STAFF_ROLES):
+            staff_tier = StaffTier.VOLUNTEER
+        else:
+            staff_tier = StaffTier.NONE
+
+        allowlisted = self.allowlist_check is not None and self.allowlist_check(
+            message.guild.id, message.channel.id
+        )
+
+        return MessageContext(
+            message=message,
+            author=message.author,
+            guild=message.guild,
+            role_ids=role_ids,
+            staff_tier=staff_tier,
+            bypasses_automation=not role_ids.isdisjoint(BYPASS_ROLES),
+            is_command=message.content.startswith(self.command_prefix),
+            normalized_content=NormalizedMessage(message.content),
+            allowlisted=allowlisted,
+        )
+
+    async def dispatch(self, message: discord.Message):
+        if not self._stages:
+            return
+
+        context = await self.build_context(message)
+        if context is None:
+            return
+
+        for registered in list(self._stages):
+            try:
+                stop = await registered.stage(context)
+            except Exception:
+                # Stages used to be separate listeners, one failing shouldn't stop the others.
+                logger.exception(f"Message stage {registered.name} failed.")
+                continue
+
+            if stop:
+                break
@@ -1,6 +1,22 @@
 from typing import Optional
 
-from attrs import Factory, define, field
+from attrs import Factory, define, field, frozen
+
+
+@frozen
+class CustomID:
+    """A component custom_id, in the "prefix:arg:arg..." format that the bot's handlers are registered by."""
+
+    prefix: str
+    args: tuple[str, ...] = ()
+
+    @classmethod
+    def parse(cls, custom_id: str) -> "CustomID":
+        prefix, *args = custom_id.split(":")
+        return cls(prefix, tuple(args))
+
+    def __str__(self) -> str:
+        return ":".join((self.prefix, *self.args))
 
 
 @define(kw_only=True)
@@ -10,3 +26,7 @@ class MessageComponentData:
     id: Optional[str]
     values: Optional[list[str]] = field(default=Factory(list))
     resolved: Optional[dict] = field(default=Factory(dict))
+
+    @property
+    def parsed_custom_id(self) -> CustomID:
+        return CustomID.parse(self.custom_id)
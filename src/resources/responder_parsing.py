@@ -1,9 +1,19 @@
+import logging
 import re
+import unicodedata
 from enum import StrEnum
+from functools import lru_cache
+from typing import Generic, Iterable, Optional, TypeVar
 
 from resources.exceptions import InvalidTriggerFormat
+from resources.utils.aho_corasick import AhoCorasick
 
 COMMON_PUNCTUATION = {",", ".", "?", "!"}
+_PUNCTUATION_TABLE = str.maketrans("", "", "".join(COMMON_PUNCTUATION))
+TRIGGER_CACHE_SIZE = 4096
+_WORD_PATTERN = re.compile(r"\S+")
+
+T = TypeVar("T")
 
 
 class SpecialChar(StrEnum):
@@ -45,69 +55,63 @@ class SpecialChar(StrEnum):
     """
 
 
-def search_message_match(*, message: str, initial_trigger: str) -> bool:
+def search_message_match(
+    *, message: "str | NormalizedMessage", initial_trigger: "str | CompiledTrigger"
+) -> bool:
     """Search a message for a matching substring or trigger formatted string.
 
     Args:
-        message (str): _description_
-        initial_trigger (str): Given string to search for. Behavior changes based on presence of SpecialChar(s).
+        message (str | NormalizedMessage): The message to search through. Pass a NormalizedMessage when
+            checking the same message against many triggers, so it is only normalized once.
+        initial_trigger (str | CompiledTrigger): Given string to search for. Behavior changes based on
+            presence of SpecialChar(s). Can also be a trigger that was already compiled with compile_trigger.
 
     Returns:
         bool: If the given trigger string found a match.
     """
-    message = message.lower()
-    for punc in COMMON_PUNCTUATION:
-        message = message.replace(punc, "")
-    initial_trigger = initial_trigger.lower()
-
-    trigger_segments = (
-        initial_trigger.split(SpecialChar.SPLIT)
-        if SpecialChar.SPLIT in initial_trigger
-        else [initial_trigger]
-    )
+    if not isinstance(initial_trigger, CompiledTrigger):
+        initial_trigger = compile_trigger(initial_trigger)
 
-    scan_results = [_scan_message(message=message, trigger=trigger.strip()) for trigger in trigger_segments]
+    return initial_trigger.matches(NormalizedMessage.of(message))
 
-    return all(scan_results)
 
+def normalize_message(message: str) -> str:
+    """NFKC normalize and lowercase a message, then remove COMMON_PUNCTUATION.
 
-def _scan_message(*, message: str, trigger: str) -> bool:
-    validate_trigger_string(trigger)
-
-    if trigger.startswith(SpecialChar.EXPLICIT):
-        return message == _clean_trigger(trigger)
+    This is the form that triggers are matched against.
+    """
+    return unicodedata.normalize("NFKC", message).lower().translate(_PUNCTUATION_TABLE)
 
-    # Handle expansion
-    if SpecialChar.EXPAND in trigger:
-        # Splits & removes all empty strings found in the result (if any).
-        # We have already validated this will be successful (by the power of doing it twice! once above in validate_trigger_string)
-        keywords: list[str] = [*filter(None, trigger.split(SpecialChar.EXPAND))]
-        start = keywords[0]
-        end = keywords[-1]
 
-        return re.search(f"{start}.*{end}", message, re.IGNORECASE | re.DOTALL) is not None
+class NormalizedMessage:
+    """A message prepared for trigger matching once, so it can be checked against any number of triggers.
 
-    # Check for partial matching.
-    if trigger.startswith(SpecialChar.PARTIAL) and trigger.endswith(SpecialChar.PARTIAL):
-        return _clean_trigger(trigger) in message
+    Attributes:
+        raw (str): The original message content.
+        text (str): The content after normalize_message.
+        words (tuple[str, ...]): The whitespace separated words of text, in order.
+        word_spans (tuple[tuple[int, int], ...]): Start and end offsets in text of each word.
+        word_set (frozenset[str]): The distinct words of text.
+    """
 
-    # Had to use regex for everything 😔, darn substring matching edge cases that would be horrible to do otherwise
-    if trigger.startswith(SpecialChar.PARTIAL):
-        trigger = _clean_trigger(trigger, regex_escape=True)
+    __slots__ = ("raw", "text", "words", "word_spans", "word_set")
 
-        # enforces white space or end of message at end of match
-        return re.search(rf"{trigger}(\s+|$)", message, re.IGNORECASE | re.MULTILINE) is not None
+    def __init__(self, message: str) -> None:
+        self.raw = message
+        self.text = normalize_message(message)
 
-    if trigger.endswith(SpecialChar.PARTIAL):
-        trigger = _clean_trigger(trigger, regex_escape=True)
+        spans = [word.span() for word in _WORD_PATTERN.finditer(self.text)]
+        self.word_spans: tuple[tuple[int, int], ...] = tuple(spans)
+        self.words: tuple[str, ...] = tuple(self.text[start:end] for start, end in spans)
+        self.word_set: frozenset[str] = frozenset(self.words)
 
-        # enforces white space or start of message at start of match
-        return re.search(rf"(\s+|^){trigger}", message, re.IGNORECASE | re.MULTILINE) is not None
+    def __repr__(self) -> str:
+        return f"NormalizedMessage({self.raw!r})"
 
-    # Absolute string matching (no substrings)
-    # Clean in case there are special characters to be literally searched for.
-    trigger = _clean_trigger(trigger, regex_escape=True)
-    return re.search(rf"(\s+|^){trigger}(\s+|$)", message, re.IGNORECASE | re.MULTILINE) is not None
+    @classmethod
+    def of(cls, message: "str | NormalizedMessage") -> "NormalizedMessage":
+        """Normalize a message, unless it already has been."""
+        return message if isinstance(message, NormalizedMessage) else cls(message)
 
 
 def _clean_trigger(trigger: str, *, regex_escape=False) -> str:
@@ -170,3 +174,291 @@ def validate_trigger_string(trigger: str) -> bool:
                 )
 
     return True
+
+
+class _CompiledSegment:
+    """A single trigger segment (the text between `SpecialChar.SPLIT`s), validated and compiled once."""
+
+    __slots__ = ("literal", "literals", "pattern", "explicit", "word")
+
+    def __init__(self, trigger: str) -> None:
+        validate_trigger_string(trigger)
+
+        self.literal: str = ""
+        self.pattern: Optional[re.Pattern] = None
+        self.explicit = trigger.startswith(SpecialChar.EXPLICIT)
+        # Set when the segment has to match a single whole word, which is a set lookup instead of a search.
+        self.word: Optional[str] = None
+        # Plain substrings that must all appear in any message that this segment matches.
+        self.literals: tuple[str, ...] = ()
+
+        if self.explicit:
+            self.literal = _clean_trigger(trigger)
+            return
+
+        # Handle expansion
+        if SpecialChar.EXPAND in trigger:
+            # Splits & removes all empty strings found in the result (if any).
+            # We have already validated this will be successful in validate_trigger_string.
+            keywords: list[str] = [*filter(None, trigger.split(SpecialChar.EXPAND))]
+            start = keywords[0]
+            end = keywords[-1]
+
+            self.literals = (start, end)
+            self.pattern = re.compile(f"{re.escape(start)}.*{re.escape(end)}", re.IGNORECASE | re.DOTALL)
+            return
+
+        self.literal = _clean_trigger(trigger)
+        self.literals = (self.literal,) if self.literal else ()
+
+        # Check for partial matching.
+        if trigger.startswith(SpecialChar.PARTIAL) and trigger.endswith(SpecialChar.PARTIAL):
+            # Plain substring search, no pattern needed.
+            return
+
+        # Had to use regex for everything 😔, darn substring matching edge cases that would be horrible to do otherwise
+        escaped = re.escape(self.literal)
+
+        if trigger.startswith(SpecialChar.PARTIAL):
+            # enforces white space or end of message at end of match
+            self.pattern = re.compile(rf"{escaped}(\s+|$)", re.IGNORECASE | re.MULTILINE)
+            return
+
+        if trigger.endswith(SpecialChar.PARTIAL):
+            # enforces white space or start of message at start of match
+            self.pattern = re.compile(rf"(\s+|^){escaped}", re.IGNORECASE | re.MULTILINE)
+            return
+
+        # Absolute string matching (no substrings)
+        self.pattern = re.compile(rf"(\s+|^){escaped}(\s+|$)", re.IGNORECASE | re.MULTILINE)
+        if self.literal and _WORD_PATTERN.fullmatch(self.literal):
+            self.word = self.literal
+
+    def matches(self, message: "NormalizedMessage") -> bool:
+        if self.explicit:
+            return message.text == self.literal
+
+        if self.word is not None:
+            return self.word in message.word_set
+
+        if self.pattern is None:
+            return self.literal in message.text
+
+        return self.pattern.search(message.text) is not None
+
+
+class CompiledTrigger:
+    """A trigger string that has been validated, split into its segments and had its patterns built.
+
+    Get these from compile_trigger rather than creating them directly, so repeated compiles are cached.
+    """
+
+    __slots__ = ("trigger", "segments")
+
+    def __init__(self, trigger: str) -> None:
+        lowered = unicodedata.normalize("NFKC", trigger).lower()
+        trigger_segments = lowered.split(SpecialChar.SPLIT) if SpecialChar.SPLIT in lowered else [lowered]
+
+        self.trigger = trigger
+        self.segments: tuple[_CompiledSegment, ...] = tuple(
+            _CompiledSegment(segment.strip()) for segment in trigger_segments
+        )
+
+    def __repr__(self) -> str:
+        return f"CompiledTrigger({self.trigger!r})"
+
+    @property
+    def literals(self) -> set[str]:
+        """Plain substrings that must all appear in a message for this trigger to match it."""
+        return {literal for segment in self.segments for literal in segment.literals}
+
+    @property
+    def explicit_literal(self) -> Optional[str]:
+        """The text a message must equal if this trigger has an explicit segment, otherwise None."""
+        return next((segment.literal for segment in self.segments if segment.explicit), None)
+
+    def matches(self, message: NormalizedMessage) -> bool:
+        return all(segment.matches(message) for segment in self.segments)
+
+
+@lru_cache(maxsize=TRIGGER_CACHE_SIZE)
+def compile_trigger(trigger: str) -> CompiledTrigger:
+    """Validate and compile a trigger string. Raises InvalidTriggerFormat if the trigger is not valid.
+
+    Results are cached, so compiling a trigger when it is saved means that loading it later is free.
+    """
+    return CompiledTrigger(trigger)
+
+
+class TriggerMatcher(Generic[T]):
+    """Matches a message against every registered trigger string at once.
+
+    Triggers are validated, split and compiled a single time when they are added. The plain text that
+    each trigger needs to be present (the cleaned text of a segment, or the keywords around a
+    `SpecialChar.EXPAND`) goes into one Aho-Corasick automaton, so a message is scanned a single time to find
+    the triggers that could possibly match it. Only those go through the full matching rules, which are the
+    same as search_message_match. Explicit triggers are looked up by the whole message instead.
+
+    When multiple triggers match a message, the value of the trigger that was added first is returned.
+    """
+
+    def __init__(self, triggers: Optional[Iterable[tuple[str, T]]] = None) -> None:
+        self._entries: dict[int, tuple[CompiledTrigger, T]] = {}
+        self._positions: dict[str, int] = {}
+        self._next_position = 0
+
+        self._exact_index: dict[str, set[int]] = {}
+        self._literal_index: dict[str, set[int]] = {}
+        self._required_literals: dict[int, int] = {}
+        self._unindexed: set[int] = set()
+        self._automaton = AhoCorasick()
+
+        if triggers is not None:
+            self.rebuild(triggers)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, trigger: str) -> bool:
+        return trigger in self._positions
+
+    def rebuild(self, triggers: Iterable[tuple[str, T]]):
+        """Replace every trigger held by the matcher.
+
+        Args:
+            triggers (Iterable[tuple[str, T]]): Pairs of trigger strings and the value to return on a match.
+        """
+        self._entries.clear()
+        self._positions.clear()
+        self._next_position = 0
+
+        self._exact_index.clear()
+        self._literal_index.clear()
+        self._required_literals.clear()
+        self._unindexed.clear()
+        self._automaton.clear()
+
+        for trigger, value in triggers:
+            self.upsert(trigger, value)
+        self._automaton.rebuild()
+
+    def upsert(self, trigger: str, value: T):
+        """Add a trigger, or change the value of a trigger that was already added without changing its order.
+
+        Triggers that fail validation are logged and skipped rather than breaking every other trigger.
+        """
+        position = self._positions.get(trigger)
+        if position is not None:
+            compiled, _ = self._entries[position]
+            self._entries[position] = (compiled, value)
+            return
+
+        try:
+            compiled = compile_trigger(trigger)
+        except InvalidTriggerFormat as err:
+            logging.warning(f"Skipping the invalid trigger string {trigger!r}: {err}")
+            return
+
+        position = self._next_position
+        self._next_position += 1
+        self._positions[trigger] = position
+        self._entries[position] = (compiled, value)
+
+        explicit = compiled.explicit_literal
+        literals = compiled.literals
+        self._required_literals[position] = len(literals)
+
+        if explicit is not None:
+            self._exact_index.setdefault(explicit, set()).add(position)
+        elif not literals:
+            self._unindexed.add(position)
+        else:
+            for literal in literals:
+                self._literal_index.setdefault(literal, set()).add(position)
+                self._automaton.add(literal)
+
+    @property
+    def needs_compaction(self) -> bool:
+        """Whether triggers were added or removed since the automaton was last built, see compact."""
+        return self._automaton.needs_rebuild
+
+    async def compact(self):
+        """Rebuild the automaton with the triggers changed since the last build, in a thread.
+
+        Matching stays correct without this, it only keeps single edits from slowly adding up.
+        """
+        await self._automaton.rebuild_async()
+
+    def discard(self, trigger: str):
+        """Remove a trigger from the matcher, if it was added."""
+        position = self._positions.pop(trigger, None)
+        if position is None:
+            return
+
+        compiled, _ = self._entries.pop(position)
+        del self._required_literals[position]
+        self._unindexed.discard(position)
+
+        explicit = compiled.explicit_literal
+        if explicit is not None:
+            self._discard_from_index(self._exact_index, explicit, position)
+            return
+
+        for literal in compiled.literals:
+            if self._discard_from_index(self._literal_index, literal, position):
+                self._automaton.discard(literal)
+
+    def candidates(self, message: "str | NormalizedMessage") -> list[T]:
+        """List the values of the triggers whose required text is all found in the message, in added order.
+
+        These still need to be checked against the full matching rules.
+        """
+        message = NormalizedMessage.of(message)
+        return [self._entries[position][1] for position in self._candidate_positions(message.text)]
+
+    def match(self, message: "str | NormalizedMessage") -> Optional[T]:
+        """Find the first trigger that matches the given message.
+
+        Args:
+            message (str | NormalizedMessage): The raw message content, or the message already normalized.
+
+        Returns:
+            Optional[T]: The value stored with the matching trigger, None if nothing matched.
+        """
+        message = NormalizedMessage.of(message)
+
+        for position in self._candidate_positions(message.text):
+            compiled, value = self._entries[position]
+            if compiled.matches(message):
+                return value
+
+        return None
+
+    def _candidate_positions(self, message: str) -> list[int]:
+        candidates = set(self._unindexed)
+        candidates.update(self._exact_index.get(message, ()))
+
+        found_counts: dict[int, int] = {}
+        for literal in self._automaton.search(message):
+            for position in self._literal_index[literal]:
+                found_counts[position] = found_counts.get(position, 0) + 1
+
+        candidates.update(
+            position for position, count in found_counts.items() if count == self._required_literals[position]
+        )
+
+        return sorted(candidates)
+
+    @staticmethod
+    def _discard_from_index(index: dict[str, set[int]], key: str, position: int) -> bool:
+        """Remove a position from an index entry. Returns True if that emptied (and removed) the entry."""
+        positions = index.get(key)
+        if positions is None:
+            return False
+
+        positions.discard(position)
+        if positions:
+            return False
+
+        del index[key]
+        return True
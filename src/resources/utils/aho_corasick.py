@@ -0,0 +1,131 @@
+import asyncio
+from collections import deque
+from typing import Iterable
+
+# goto, fail and output tables of a built automaton.
+_Tables = tuple[list[dict[str, int]], list[int], list[tuple[str, ...]]]
+
+
+def _build(patterns: Iterable[str]) -> _Tables:
+    goto: list[dict[str, int]] = [{}]
+    outputs: list[list[str]] = [[]]
+
+    for pattern in patterns:
+        state = 0
+        for char in pattern:
+            next_state = goto[state].get(char)
+            if next_state is None:
+                next_state = len(goto)
+                goto[state][char] = next_state
+                goto.append({})
+                outputs.append([])
+            state = next_state
+        outputs[state].append(pattern)
+
+    # Breadth first so that every fail link points at an already finished (shallower) state.
+    fail = [0] * len(goto)
+    queue = deque(goto[0].values())
+    while queue:
+        state = queue.popleft()
+        for char, next_state in goto[state].items():
+            queue.append(next_state)
+
+            fallback = fail[state]
+            while fallback and char not in goto[fallback]:
+                fallback = fail[fallback]
+            fail[next_state] = goto[fallback].get(char, 0)
+            outputs[next_state].extend(outputs[fail[next_state]])
+
+    return goto, fail, [tuple(out) for out in outputs]
+
+
+class AhoCorasick:
+    """Multi-pattern substring search. Finds every added pattern inside a piece of text in a single pass.
+
+    Building the automaton takes time proportional to every pattern, so single edits don't rebuild it.
+    Patterns added since the last build are checked with plain substring searches, and removed ones are
+    filtered out of the results, until rebuild (or rebuild_async, which builds in a thread) folds them in.
+    Searching never rebuilds.
+    """
+
+    def __init__(self, patterns: list[str] | None = None) -> None:
+        self._patterns: set[str] = {pattern for pattern in patterns or [] if pattern}
+        # Added since the last build, not in the automaton yet.
+        self._pending: set[str] = set()
+
+        self._built_patterns: frozenset[str] = frozenset()
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._output: list[tuple[str, ...]] = [()]
+
+        self.rebuild()
+
+    def __len__(self) -> int:
+        return len(self._patterns)
+
+    def __contains__(self, pattern: str) -> bool:
+        return pattern in self._patterns
+
+    @property
+    def needs_rebuild(self) -> bool:
+        """Whether patterns were added or removed since the automaton was last built."""
+        return bool(self._pending) or len(self._built_patterns) != len(self._patterns) - len(self._pending)
+
+    def add(self, pattern: str):
+        """Add a pattern to search for. Empty patterns are ignored since they match everything."""
+        if pattern and pattern not in self._patterns:
+            self._patterns.add(pattern)
+            if pattern not in self._built_patterns:
+                self._pending.add(pattern)
+
+    def discard(self, pattern: str):
+        """Stop searching for a pattern, if it was added."""
+        self._patterns.discard(pattern)
+        self._pending.discard(pattern)
+
+    def clear(self):
+        self._patterns.clear()
+        self._pending.clear()
+        self._install(frozenset(), _build(()))
+
+    def rebuild(self):
+        """Build the automaton from the current patterns."""
+        patterns = frozenset(self._patterns)
+        self._install(patterns, _build(patterns))
+
+    async def rebuild_async(self):
+        """Build the automaton in a thread, so the event loop isn't blocked for the whole build.
+
+        Patterns changed while it builds stay pending, the automaton keeps answering correctly throughout.
+        """
+        patterns = frozenset(self._patterns)
+        tables = await asyncio.to_thread(_build, patterns)
+        self._install(patterns, tables)
+
+    def search(self, text: str) -> set[str]:
+        """Return every added pattern that appears at least once in the text."""
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+
+        found: set[str] = set()
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+
+            if output[state]:
+                found.update(output[state])
+
+        if len(self._built_patterns) != len(self._patterns) - len(self._pending):
+            # Some built patterns were removed since.
+            found.intersection_update(self._patterns)
+
+        found.update(pattern for pattern in self._pending if pattern in text)
+        return found
+
+    def _install(self, patterns: frozenset[str], tables: _Tables):
+        self._goto, self._fail, self._output = tables
+        self._built_patterns = patterns
+        self._pending = self._patterns - patterns
@@ -0,0 +1,148 @@
+import asyncio
+import copy
+import logging
+import time
+from typing import Optional
+
+import aiohttp
+
+from resources.exceptions import HelperError
+from resources.utils.single_flight import SingleFlight
+from resources.utils.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+BLOXLINK_API_URL = "https://api.blox.link/v4/public"
+
+
+class TokenBucket:
+    """Allows bursts of up to capacity calls, refilled at rate calls per second."""
+
+    def __init__(self, rate: float, capacity: int) -> None:
+        self.rate = rate
+        self.capacity = capacity
+
+        self._tokens = float(capacity)
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Wait until a call is allowed, then use it up."""
+        # Waiters queue on the lock, so they are let through in the order they arrived.
+        async with self._lock:
+            self._refill()
+            if self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._refill()
+
+            self._tokens -= 1
+
+    def pause(self, seconds: float):
+        """Hold every call back for a while, like when the API says we're being rate limited."""
+        self._refill()
+        self._tokens = min(self._tokens, 0) - seconds * self.rate
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+
+class BloxlinkAPI:
+    """Client for the public Bloxlink API of a single guild.
+
+    Requests are rate limited with a token bucket, responses are cached for a short time per Discord ID,
+    and lookups for an ID that is already being requested wait on that request. 429 responses are retried
+    after the time the API asks for.
+    """
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        api_key: str,
+        guild_id: int,
+        *,
+        base_url: str = BLOXLINK_API_URL,
+        rate: float = 1.0,
+        burst: int = 5,
+        ttl: float = 30.0,
+        timeout: float = 10.0,
+        max_retries: int = 2,
+    ) -> None:
+        """Initialize the client.
+
+        Args:
+            session (aiohttp.ClientSession): Session to send requests with.
+            api_key (str): Bloxlink API key for the guild.
+            guild_id (int): The guild the API key belongs to.
+            base_url (str, optional): Base URL of the API. Defaults to the public Bloxlink API.
+            rate (float, optional): Requests per second allowed on average. Defaults to 1.
+            burst (int, optional): Requests allowed at once before rate limiting kicks in. Defaults to 5.
+            ttl (float, optional): Seconds a response is reused for. Defaults to 30.
+            timeout (float, optional): Seconds to wait for a response. Defaults to 10.
+            max_retries (int, optional): Times a rate limited request is retried. Defaults to 2.
+        """
+        self.session = session
+        self.api_key = api_key
+        self.guild_id = guild_id
+        self.base_url = base_url
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.max_retries = max_retries
+
+        self._bucket = TokenBucket(rate, burst)
+        self._cache: TTLCache[int, dict] = TTLCache(ttl, max_size=1024)
+        self._in_flight: SingleFlight[int, dict] = SingleFlight()
+
+    def discord_to_roblox_url(self, user_id: int) -> str:
+        return f"{self.base_url}/guilds/{self.guild_id}/discord-to-roblox/{user_id}"
+
+    async def discord_to_roblox(self, user_id: int) -> dict:
+        """Look up the Roblox account linked to a Discord user.
+
+        Returns:
+            dict: The API response, which describes the error if the lookup failed. Safe to modify.
+
+        Raises:
+            HelperError: The API timed out, or kept rate limiting us after every retry.
+        """
+        response = self._cache.get(user_id)
+        if response is None:
+            response = await self._in_flight.run(user_id, lambda: self._request(user_id))
+
+        return copy.deepcopy(response)
+
+    async def _request(self, user_id: int) -> dict:
+        url = self.discord_to_roblox_url(user_id)
+
+        for attempt in range(self.max_retries + 1):
+            await self._bucket.acquire()
+
+            try:
+                async with self.session.get(
+                    url, headers={"Authorization": self.api_key}, timeout=self.timeout
+                ) as req:
+                    response = await req.json(content_type=None)
+                    status = req.status
+                    retry_after = req.headers.get("Retry-After")
+            except asyncio.TimeoutError as err:
+                raise HelperError("The Bloxlink API took too long to respond, try again later.") from err
+
+            if status != 429:
+                if status < 500:
+                    self._cache.set(user_id, response)
+                return response
+
+            delay = self._retry_delay(retry_after, response)
+            self._bucket.pause(delay)
+            logger.warning(f"Rate limited by the Bloxlink API (attempt {attempt + 1}), retrying in {delay}s.")
+
+        raise HelperError("The Bloxlink API is rate limiting us right now, try again in a few seconds.")
+
+    @staticmethod
+    def _retry_delay(retry_after: Optional[str], response) -> float:
+        for value in (retry_after, response.get("retry_after") if isinstance(response, dict) else None):
+            try:
+                return max(float(value), 0.0)  # type: ignore
+            except (TypeError, ValueError):
+                continue
+        return 1.0
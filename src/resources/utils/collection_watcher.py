@@ -0,0 +1,170 @@
+import asyncio
+import inspect
+import logging
+from typing import Any, Awaitable, Callable, Literal, Optional
+
+import attrs
+from pymongo.errors import OperationFailure, PyMongoError
+
+logger = logging.getLogger(__name__)
+
+# Returned by MongoDB when change streams are used on a server that isn't part of a replica set.
+CHANGE_STREAMS_UNSUPPORTED = 40573
+
+
+@attrs.frozen
+class CollectionChange:
+    """A single change to a document in a watched collection.
+
+    "invalidate" means the watcher may have missed changes, so anything cached from the collection
+    should be thrown away. document_id and document are None in that case.
+    """
+
+    collection: str
+    operation: Literal["upsert", "delete", "invalidate"]
+    document_id: Any = None
+    document: Optional[dict] = None
+
+
+ChangeHandler = Callable[[CollectionChange], Optional[Awaitable[None]]]
+
+
+class CollectionWatcher:
+    """Pushes changes from MongoDB collections to in-memory caches.
+
+    Uses a change stream when the server supports them (replica sets), otherwise falls back to polling
+    the collection and comparing it against the last copy that was seen.
+    """
+
+    def __init__(self, database, *, poll_interval: float = 30.0, retry_delay: float = 5.0) -> None:
+        """Initialize the watcher.
+
+        Args:
+            database: The (motor) database that holds the collections to watch.
+            poll_interval (float, optional): Seconds between polls when change streams are unavailable.
+                Defaults to 30.
+            retry_delay (float, optional): Seconds to wait before reconnecting after an error. Defaults to 5.
+        """
+        self.database = database
+        self.poll_interval = poll_interval
+        self.retry_delay = retry_delay
+
+        self._handlers: dict[str, list[ChangeHandler]] = {}
+        self._tasks: dict[str, asyncio.Task] = {}
+        self._started = False
+
+    def subscribe(self, collection: str, handler: ChangeHandler):
+        """Call a handler for every change to a collection. Handlers can be sync or async."""
+        self._handlers.setdefault(collection, []).append(handler)
+
+        if self._started and collection not in self._tasks:
+            self._tasks[collection] = asyncio.create_task(self._watch(collection))
+
+    def unsubscribe(self, collection: str, handler: ChangeHandler):
+        handlers = self._handlers.get(collection, [])
+        if handler in handlers:
+            handlers.remove(handler)
+
+    def start(self):
+        """Start watching every collection that has a subscriber."""
+        self._started = True
+        for collection in self._handlers:
+            task = self._tasks.get(collection)
+            if task is None or task.done():
+                self._tasks[collection] = asyncio.create_task(self._watch(collection))
+
+    async def stop(self):
+        self._started = False
+        tasks = list(self._tasks.values())
+        self._tasks.clear()
+
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _watch(self, collection: str):
+        resume_token = None
+        connected_before = False
+
+        while True:
+            try:
+                async with self.database[collection].watch(
+                    full_document="updateLookup", resume_after=resume_token
+                ) as stream:
+                    if connected_before and resume_token is None:
+                        # Reconnected without a way to resume, so changes in between were missed.
+                        await self._emit(CollectionChange(collection, "invalidate"))
+                    connected_before = True
+
+                    async for event in stream:
+                        resume_token = stream.resume_token
+                        change = self._parse_event(collection, event)
+                        if change is not None:
+                            await self._emit(change)
+
+                        if change is not None and change.operation == "invalidate":
+                            resume_token = None
+                            break
+
+            except OperationFailure as err:
+                if err.code == CHANGE_STREAMS_UNSUPPORTED:
+                    logger.info(f"Change streams aren't available, polling {collection} instead.")
+                    return await self._poll(collection)
+
+                logger.warning(f"Change stream for {collection} failed, reconnecting: {err}")
+                resume_token = None
+                await asyncio.sleep(self.retry_delay)
+
+            except PyMongoError as err:
+                logger.warning(f"Change stream for {collection} failed, reconnecting: {err}")
+                await asyncio.sleep(self.retry_delay)
+
+    async def _poll(self, collection: str):
+        snapshot: Optional[dict[Any, dict]] = None
+
+        while True:
+            try:
+                documents = {doc["_id"]: doc async for doc in self.database[collection].find()}
+            except PyMongoError as err:
+                logger.warning(f"Polling {collection} failed: {err}")
+                await asyncio.sleep(self.retry_delay)
+                continue
+
+            if snapshot is not None:
+                for doc_id, doc in documents.items():
+                    if snapshot.get(doc_id) != doc:
+                        await self._emit(CollectionChange(collection, "upsert", doc_id, doc))
+
+                for doc_id in snapshot.keys() - documents.keys():
+                    await self._emit(CollectionChange(collection, "delete", doc_id))
+
+            snapshot = documents
+            await asyncio.sleep(self.poll_interval)
+
+    @staticmethod
+    def _parse_event(collection: str, event: dict) -> Optional[CollectionChange]:
+        match event.get("operationType"):
+            case "insert" | "update" | "replace":
+                document = event.get("fullDocument")
+                doc_id = event["documentKey"]["_id"]
+                if document is None:
+                    # Deleted again before the lookup happened, a delete event will follow.
+                    return None
+                return CollectionChange(collection, "upsert", doc_id, document)
+
+            case "delete":
+                return CollectionChange(collection, "delete", event["documentKey"]["_id"])
+
+            case "drop" | "rename" | "dropDatabase" | "invalidate":
+                return CollectionChange(collection, "invalidate")
+
+        return None
+
+    async def _emit(self, change: CollectionChange):
+        for handler in list(self._handlers.get(change.collection, [])):
+            try:
+                result = handler(change)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception:
+                logger.exception(f"Change handler for {change.collection} failed on {change.operation}.")
@@ -0,0 +1,83 @@
+import asyncio
+import logging
+from collections import Counter
+from typing import Awaitable, Callable, Generic, Hashable, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+K = TypeVar("K", bound=Hashable)
+
+FlushCallback = Callable[[dict[K, int]], Awaitable[None]]
+
+
+class CounterBuffer(Generic[K]):
+    """Accumulates increments in memory and writes them out in batches.
+
+    Increments for the same key are summed, so a flush writes each key once no matter how many times it
+    was incremented. Flushes happen every interval, whenever max_keys different keys are pending, and when
+    the buffer is stopped. Counts from a failed flush are kept and retried with the next one.
+    """
+
+    def __init__(self, flush: FlushCallback[K], *, interval: float = 60.0, max_keys: int = 10_000) -> None:
+        """Initialize the buffer.
+
+        Args:
+            flush (FlushCallback[K]): Writes a batch of pending increments, keyed the same as incr.
+            interval (float, optional): Seconds between periodic flushes. Defaults to 60.
+            max_keys (int, optional): Flush early once this many keys are pending. Defaults to 10,000.
+        """
+        self.interval = interval
+        self.max_keys = max_keys
+
+        self._flush = flush
+        self._pending: Counter[K] = Counter()
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._early_flush: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def __getitem__(self, key: K) -> int:
+        """Increments for the key that have not been flushed yet."""
+        return self._pending[key]
+
+    def incr(self, key: K, amount: int = 1):
+        self._pending[key] += amount
+
+        if len(self._pending) >= self.max_keys and (self._early_flush is None or self._early_flush.done()):
+            self._early_flush = asyncio.create_task(self.flush())
+
+    def start(self):
+        """Start flushing periodically."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the periodic flushes and write out everything that is still pending."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+        await self.flush()
+
+    async def flush(self):
+        """Write every pending increment now."""
+        async with self._lock:
+            if not self._pending:
+                return
+
+            batch = dict(self._pending)
+            self._pending.clear()
+
+            try:
+                await self._flush(batch)
+            except Exception:
+                logger.exception(f"Flushing {len(batch)} buffered counters failed, retrying next flush.")
+                self._pending.update(batch)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.flush()
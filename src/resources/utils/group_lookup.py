@@ -0,0 +1,137 @@
+import asyncio
+from typing import Optional
+
+import aiohttp
+import attrs
+
+from resources.utils.single_flight import SingleFlight
+from resources.utils.ttl_cache import TTLCache
+
+GROUPS_API_URL = "https://groups.roblox.com"
+THUMBNAILS_API_URL = "https://thumbnails.roblox.com"
+
+
+@attrs.frozen
+class GroupRank:
+    rank: int
+    name: str
+
+
+@attrs.frozen
+class GroupInfo:
+    """What the Roblox APIs had to say about a group. Invalid groups keep the defaults."""
+
+    name: str = "Invalid group."
+    owner: str = "N/A"
+    member_count: int = 0
+    # None when the roles endpoint returned nothing at all.
+    ranks: Optional[tuple[GroupRank, ...]] = None
+    icon_url: Optional[str] = None
+
+
+class GroupLookup:
+    """Looks up Roblox groups, with the info, roles, and icon requests sent at the same time.
+
+    Parsed results are cached per group ID, and lookups for a group that is already being fetched wait on
+    that fetch.
+    """
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        *,
+        ttl: float = 300.0,
+        max_size: int = 512,
+        groups_url: str = GROUPS_API_URL,
+        thumbnails_url: str = THUMBNAILS_API_URL,
+    ) -> None:
+        """Initialize the lookup.
+
+        Args:
+            session (aiohttp.ClientSession): Session to send requests with.
+            ttl (float, optional): Seconds a group is cached for. Defaults to 300.
+            max_size (int, optional): Most groups kept in the cache. Defaults to 512.
+            groups_url (str, optional): Base URL of the groups API. Defaults to the Roblox API.
+            thumbnails_url (str, optional): Base URL of the thumbnails API. Defaults to the Roblox API.
+        """
+        self.session = session
+        self.groups_url = groups_url
+        self.thumbnails_url = thumbnails_url
+
+        self._cache: TTLCache[str, GroupInfo] = TTLCache(ttl, max_size=max_size)
+        self._in_flight: SingleFlight[str, GroupInfo] = SingleFlight()
+
+    async def get(self, group_id: int | str) -> GroupInfo:
+        group_id = str(group_id)
+
+        cached = self._cache.get(group_id)
+        if cached is not None:
+            return cached
+
+        return await self._in_flight.run(group_id, lambda: self._fetch(group_id))
+
+    async def _fetch(self, group_id: str) -> GroupInfo:
+        info_url = f"{self.groups_url}/v1/groups/{group_id}"
+
+        responses = await asyncio.gather(
+            self._get_json(info_url),
+            self._get_json(f"{info_url}/roles"),
+            self._get_json(
+                f"{self.thumbnails_url}/v1/groups/icons",
+                params={
+                    "groupIds": group_id,
+                    "size": "420x420",
+                    "format": "Png",
+                    "isCircular": "false",
+                },
+            ),
+        )
+
+        (info_status, info_data), (rank_status, rank_data), (thumbnail_status, thumbnail_data) = responses
+
+        group = self._parse(info_data, rank_data, thumbnail_data)
+        # A rate limit or server error says nothing about the group, so that result is only returned.
+        # Caching it would make a valid group look invalid until it expired.
+        if all(self._is_definitive(status) for status in (info_status, rank_status, thumbnail_status)):
+            self._cache.set(group_id, group)
+        return group
+
+    async def _get_json(self, url: str, params: Optional[dict] = None) -> tuple[int, dict | None]:
+        async with self.session.get(url, params=params) as req:
+            try:
+                data = await req.json(content_type=None)
+            except ValueError:
+                # Error pages aren't always JSON.
+                data = None
+            return req.status, data
+
+    @staticmethod
+    def _is_definitive(status: int) -> bool:
+        return 200 <= status < 300 or (400 <= status < 500 and status != 429)
+
+    @staticmethod
+    def _parse(info_data: dict | None, rank_data: dict | None, thumbnail_data: dict | None) -> GroupInfo:
+        fields = {}
+
+        if info_data:
+            if "name" in info_data:
+                fields["name"] = info_data["name"]
+            fields["member_count"] = info_data.get("memberCount", 0)
+
+            owner_data = info_data.get("owner", {})
+            if owner_data and "username" in owner_data:
+                fields["owner"] = owner_data["username"]
+
+        if rank_data:
+            fields["ranks"] = tuple(
+                GroupRank(rank=rank.get("rank", -1), name=rank.get("name", "Invalid Name"))
+                for rank in rank_data.get("roles", [])
+            )
+
+        if thumbnail_data is not None:
+            # Empty array is given for invalid IDs.
+            thumbnails = thumbnail_data.get("data", [])
+            if thumbnails:
+                fields["icon_url"] = thumbnails[0]["imageUrl"]
+
+        return GroupInfo(**fields)
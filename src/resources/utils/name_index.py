@@ -0,0 +1,116 @@
+from typing import Iterable
+
+# Below this trigram similarity a name isn't suggested, unless the query is part of it.
+MIN_SIMILARITY = 0.4
+
+
+def _trigrams(text: str, *, complete: bool = True) -> set[str]:
+    """Character trigrams of text, padded so the start (and end, when complete) of the text count too."""
+    padded = f"  {text} " if complete else f"  {text}"
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+class _TrieNode:
+    __slots__ = ("children", "names")
+
+    def __init__(self) -> None:
+        self.children: dict[str, _TrieNode] = {}
+        # Names that end at this node.
+        self.names: list[str] = []
+
+
+class NameIndex:
+    """Finds names for autocomplete without scoring every name.
+
+    Names that start with the query come from a prefix trie. Everything else is scored only if it shares a
+    character trigram with the query, using the trigram postings to count the shared trigrams.
+    """
+
+    def __init__(self, names: Iterable[str] = ()) -> None:
+        self._names: list[str] = []
+        self._trigram_counts: list[int] = []
+        self._postings: dict[str, list[int]] = {}
+        self._root = _TrieNode()
+
+        self.rebuild(names)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def rebuild(self, names: Iterable[str]):
+        """Replace every name in the index. Names are lowercased and deduplicated."""
+        self._names = sorted({name.lower() for name in names})
+        self._trigram_counts = []
+        self._postings = {}
+        self._root = _TrieNode()
+
+        for name_id, name in enumerate(self._names):
+            grams = _trigrams(name)
+            self._trigram_counts.append(len(grams))
+            for gram in grams:
+                self._postings.setdefault(gram, []).append(name_id)
+
+            node = self._root
+            for char in name:
+                node = node.children.setdefault(char, _TrieNode())
+            node.names.append(name)
+
+    def search(self, query: str, limit: int = 25) -> list[str]:
+        """Rank the names that best match what has been typed so far.
+
+        Order: names starting with the query (shortest first), then names containing it, then names that
+        are similar enough to it.
+        """
+        query = query.lower().strip()
+        if not query:
+            return self._names[:limit]
+
+        results = self._with_prefix(query, limit)
+        if len(results) >= limit:
+            return results
+
+        seen = set(results)
+        query_grams = _trigrams(query, complete=False)
+
+        shared: dict[int, int] = {}
+        for gram in query_grams:
+            for name_id in self._postings.get(gram, ()):
+                shared[name_id] = shared.get(name_id, 0) + 1
+
+        containing = []
+        similar = []
+        for name_id, count in shared.items():
+            name = self._names[name_id]
+            if name in seen:
+                continue
+
+            if query in name:
+                containing.append((name.index(query), len(name), name))
+                continue
+
+            similarity = 2 * count / (len(query_grams) + self._trigram_counts[name_id])
+            if similarity >= MIN_SIMILARITY:
+                similar.append((-similarity, name))
+
+        results.extend(name for *_, name in sorted(containing))
+        results.extend(name for _, name in sorted(similar))
+        return results[:limit]
+
+    def _with_prefix(self, prefix: str, limit: int) -> list[str]:
+        node = self._root
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return []
+
+        # Breadth first, so shorter names come first.
+        found: list[str] = []
+        level = [node]
+        while level and len(found) < limit:
+            next_level = []
+            for current in level:
+                found.extend(current.names)
+                next_level.extend(current.children[char] for char in sorted(current.children))
+            level = next_level
+
+        return found[:limit]
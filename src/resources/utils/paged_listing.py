@@ -0,0 +1,90 @@
+import logging
+import math
+from typing import Any, Awaitable, Callable, Generic, Iterable, Optional, TypeVar
+
+import attrs
+
+from resources.utils.single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+@attrs.frozen
+class Page(Generic[T]):
+    items: tuple[T, ...]
+    # Zero based.
+    index: int
+    page_count: int
+    total: int
+
+
+class PagedListing(Generic[T]):
+    """Serves pages from a sorted snapshot of a collection.
+
+    The snapshot is only rebuilt when the version of the collection it was built from changes, so flipping
+    pages is a slice of a list no matter how large the collection is.
+    """
+
+    def __init__(
+        self,
+        load: Callable[[], Awaitable[Iterable[T]]],
+        *,
+        version: Callable[[], Optional[int]],
+        page_size: int,
+        key: Optional[Callable[[T], Any]] = None,
+    ) -> None:
+        """Initialize the listing.
+
+        Args:
+            load (Callable[[], Awaitable[Iterable[T]]]): Fetches every item in the collection.
+            version (Callable[[], Optional[int]]): The current version of the collection, which has to change
+                whenever an item is added, removed or renamed. None when it can't be known, in which case
+                every page reloads the collection.
+            page_size (int): Items per page.
+            key (Callable[[T], Any], optional): Sort key for the items. Defaults to sorting the items themselves.
+        """
+        self.page_size = page_size
+        self._load = load
+        self._version = version
+        self._key = key
+
+        self._items: list[T] = []
+        self._snapshot_version: Optional[int] = None
+        self._loads: SingleFlight[str, list[T]] = SingleFlight()
+
+    async def items(self) -> list[T]:
+        """The sorted snapshot, rebuilt first if the collection changed. Do not modify it."""
+        version = self._version()
+        if version is None or version != self._snapshot_version:
+            await self._loads.run("snapshot", lambda: self._rebuild(version))
+        return self._items
+
+    async def page(self, index: int) -> Page[T]:
+        """Get a page of the listing. Out of range indexes get the closest page that exists."""
+        items = await self.items()
+        page_count = max(1, math.ceil(len(items) / self.page_size))
+        index = min(max(index, 0), page_count - 1)
+
+        offset = index * self.page_size
+        return Page(
+            items=tuple(items[offset : offset + self.page_size]),
+            index=index,
+            page_count=page_count,
+            total=len(items),
+        )
+
+    def invalidate(self):
+        """Rebuild the snapshot on the next page, whatever the version says."""
+        self._snapshot_version = None
+
+    async def _rebuild(self, version: Optional[int]) -> list[T]:
+        items = sorted(await self._load(), key=self._key)  # type: ignore
+
+        self._items = items
+        # Stamped with the version from before the load, so a change made during it is picked up next time.
+        self._snapshot_version = version
+
+        logger.debug(f"Rebuilt paged listing snapshot with {len(items)} items at version {version}.")
+        return items
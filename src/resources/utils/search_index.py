@@ -0,0 +1,125 @@
+import bisect
+import math
+import re
+import unicodedata
+from collections import Counter
+from typing import Hashable, Optional
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+# Standard BM25 parameters: how quickly repeated terms stop adding to the score, and how much longer
+# documents are penalized.
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def tokenize(text: str) -> list[str]:
+    return _TOKEN_PATTERN.findall(unicodedata.normalize("NFKC", text).lower())
+
+
+class SearchIndex:
+    """In-memory inverted index with BM25 ranking.
+
+    Every query term has to be found in a document for it to match. A term that isn't a whole word in any
+    document matches the words that start with it instead, so searches work while a word is half typed.
+    Documents can be added, replaced and removed one at a time.
+    """
+
+    def __init__(self) -> None:
+        self._postings: dict[str, dict[Hashable, int]] = {}
+        self._lengths: dict[Hashable, int] = {}
+        self._terms: dict[Hashable, Counter[str]] = {}
+        self._total_length = 0
+        # Sorted vocabulary for prefix lookups, rebuilt on the next search after the vocabulary changes.
+        self._vocabulary: Optional[list[str]] = None
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    def __contains__(self, doc_id: Hashable) -> bool:
+        return doc_id in self._lengths
+
+    def clear(self):
+        self._postings.clear()
+        self._lengths.clear()
+        self._terms.clear()
+        self._total_length = 0
+        self._vocabulary = None
+
+    def upsert(self, doc_id: Hashable, text: str):
+        """Index a document, replacing what was indexed for it before."""
+        self.remove(doc_id)
+
+        terms = Counter(tokenize(text))
+        self._terms[doc_id] = terms
+        self._lengths[doc_id] = sum(terms.values())
+        self._total_length += self._lengths[doc_id]
+
+        for term, count in terms.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                self._vocabulary = None
+            postings[doc_id] = count
+
+    def remove(self, doc_id: Hashable):
+        terms = self._terms.pop(doc_id, None)
+        if terms is None:
+            return
+
+        self._total_length -= self._lengths.pop(doc_id)
+        for term in terms:
+            postings = self._postings[term]
+            del postings[doc_id]
+            if not postings:
+                del self._postings[term]
+                self._vocabulary = None
+
+    def search(self, query: str, limit: Optional[int] = None) -> list[tuple[Hashable, float]]:
+        """Find the documents that contain every term of the query.
+
+        Returns:
+            list[tuple[Hashable, float]]: Document IDs and their scores, best match first.
+        """
+        query_terms = list(dict.fromkeys(tokenize(query)))
+        if not query_terms or not self._lengths:
+            return []
+
+        # Each query term becomes the index terms it matches, and the documents that have any of them.
+        expanded: list[list[str]] = []
+        matching: Optional[set[Hashable]] = None
+        for term in query_terms:
+            terms = self._expand(term)
+            docs = {doc_id for index_term in terms for doc_id in self._postings[index_term]}
+            matching = docs if matching is None else matching & docs
+            if not matching:
+                return []
+            expanded.append(terms)
+
+        assert matching is not None
+        average_length = self._total_length / len(self._lengths)
+        scores: dict[Hashable, float] = dict.fromkeys(matching, 0.0)
+
+        for terms in expanded:
+            for index_term in terms:
+                postings = self._postings[index_term]
+                idf = math.log(1 + (len(self._lengths) - len(postings) + 0.5) / (len(postings) + 0.5))
+
+                for doc_id in matching.intersection(postings):
+                    frequency = postings[doc_id]
+                    length_norm = 1 - BM25_B + BM25_B * self._lengths[doc_id] / average_length
+                    scores[doc_id] += idf * frequency * (BM25_K1 + 1) / (frequency + BM25_K1 * length_norm)
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], str(item[0])))
+        return ranked if limit is None else ranked[:limit]
+
+    def _expand(self, term: str) -> list[str]:
+        if term in self._postings:
+            return [term]
+
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self._postings)
+
+        start = bisect.bisect_left(self._vocabulary, term)
+        end = bisect.bisect_left(self._vocabulary, term + "\U0010ffff")
+        return self._vocabulary[start:end]
@@ -0,0 +1,42 @@
+import asyncio
+from typing import Awaitable, Callable, Generic, Hashable, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class SingleFlight(Generic[K, V]):
+    """Coalesces concurrent calls for the same key, so the work behind them only runs once.
+
+    The first caller for a key starts the work, and everyone else who asks for that key before it finishes
+    awaits the same result (or exception). Nothing is cached after the work completes.
+    """
+
+    def __init__(self) -> None:
+        self._in_flight: dict[K, asyncio.Future[V]] = {}
+
+    def __contains__(self, key: K) -> bool:
+        return key in self._in_flight
+
+    async def run(self, key: K, func: Callable[[], Awaitable[V]]) -> V:
+        """Run func for the key, or wait on the call that is already running for it.
+
+        Args:
+            key (K): What identifies identical work.
+            func (Callable[[], Awaitable[V]]): Starts the work. Only called if nothing is in flight for key.
+
+        Returns:
+            V: The result of the shared call.
+        """
+        future = self._in_flight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(func())
+            self._in_flight[key] = future
+            future.add_done_callback(lambda done: self._forget(key, done))
+
+        # Shielded so that one caller being cancelled doesn't cancel the work for everyone else.
+        return await asyncio.shield(future)
+
+    def _forget(self, key: K, future: asyncio.Future[V]):
+        if self._in_flight.get(key) is future:
+            del self._in_flight[key]
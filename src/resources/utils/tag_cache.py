@@ -0,0 +1,117 @@
+import copy
+import logging
+from typing import Iterable
+
+from resources.utils.collection_watcher import CollectionChange
+from resources.utils.search_index import SearchIndex
+
+logger = logging.getLogger(__name__)
+
+
+class TagCache:
+    """In-memory copy of the tags collection, indexed by every tag name and alias.
+
+    Lookups (including ones for names that don't exist) are a single dict access. Documents are stored
+    exactly as they are in the database.
+    """
+
+    def __init__(self) -> None:
+        self.loaded = False
+        # Bumped whenever a tag is added, removed or replaced, so indexes built from the cache know to refresh.
+        self.version = 0
+        self._tags: dict[str, dict] = {}
+        # Every name and alias (lowercase) -> the name of the tag it belongs to.
+        self._lookup: dict[str, str] = {}
+        # Full text index over the names, aliases and content of every tag.
+        self._search_index = SearchIndex()
+
+    def __len__(self) -> int:
+        return len(self._tags)
+
+    def __contains__(self, name: str) -> bool:
+        return name.lower() in self._lookup
+
+    def load(self, documents: Iterable[dict]):
+        """Replace the cache contents with every tag in the collection."""
+        self._tags = {doc["_id"]: doc for doc in documents}
+        self._rebuild_lookup()
+
+        self._search_index.clear()
+        for document in self._tags.values():
+            self._search_index.upsert(document["_id"], self._search_text(document))
+
+        self.loaded = True
+        self.version += 1
+
+        logger.info(f"Tag cache loaded with {len(self._tags)} tags and {len(self._lookup)} names.")
+
+    def get(self, name: str) -> dict | None:
+        """Get a tag by its name or one of its aliases.
+
+        Returns:
+            dict | None: A copy of the tag document (safe to modify), or None if no tag has that name.
+        """
+        tag_name = self._lookup.get(name.lower())
+        if tag_name is None:
+            return None
+        return copy.deepcopy(self._tags[tag_name])
+
+    def all(self) -> list[dict]:
+        """Every cached tag document. These are the cached objects themselves, do not modify them."""
+        return list(self._tags.values())
+
+    def upsert(self, document: dict):
+        """Add or replace a tag with the document as it is now stored in the database."""
+        previous = self._tags.get(document["_id"])
+        self._tags[document["_id"]] = document
+        self._search_index.upsert(document["_id"], self._search_text(document))
+        self.version += 1
+
+        if previous is not None and previous.get("aliases") != document.get("aliases"):
+            # Removed aliases have to go, and another tag could have been shadowed by one.
+            self._rebuild_lookup()
+        else:
+            self._index(document)
+
+    def search(self, query: str, limit: int | None = None) -> list[str]:
+        """Names of the tags whose name, aliases or content contain every word of the query, best first."""
+        return [name for name, _ in self._search_index.search(query, limit)]  # type: ignore
+
+    def add_uses(self, name: str, amount: int = 1):
+        """Bump the use count of a cached tag, for uses that haven't been written to the database yet."""
+        document = self._tags.get(name)
+        if document is not None:
+            document["use_count"] = document.get("use_count", 0) + amount
+
+    def remove(self, name: str):
+        """Remove a tag by its name."""
+        if self._tags.pop(name, None) is not None:
+            self._rebuild_lookup()
+            self._search_index.remove(name)
+            self.version += 1
+
+    def apply_change(self, change: CollectionChange):
+        """Keep the cache in line with a change made to the tags collection elsewhere."""
+        match change.operation:
+            case "upsert":
+                self.upsert(change.document or {"_id": change.document_id})
+            case "delete":
+                self.remove(change.document_id)
+            case "invalidate":
+                # Can't reload from here, so stop trusting the cache until it is loaded again.
+                self.loaded = False
+
+    @staticmethod
+    def _search_text(document: dict) -> str:
+        return " ".join([document["_id"], *(document.get("aliases") or []), document.get("content", "")])
+
+    def _index(self, document: dict):
+        self._lookup[document["_id"]] = document["_id"]
+        for alias in document.get("aliases") or []:
+            # Names win over aliases, like the first match of the database query would.
+            self._lookup.setdefault(alias, document["_id"])
+
+    def _rebuild_lookup(self):
+        self._lookup = {name: name for name in self._tags}
+        for document in self._tags.values():
+            self._index(document)
@@ -1,26 +1,82 @@
-import asyncio
+import time
+from collections import OrderedDict
+from typing import Hashable, Literal, Optional
 
 
 class TimedUserCooldown:
     """Handles logic for applying a cooldown for the bot responding to users. Spam prevention basically.
 
     Works best with cogs, since those are initialized once on startup.
+
+    Cooldowns are stored as expiry timestamps. Every cooldown lasts the same amount of time, so the oldest
+    entry always expires first and expired entries are swept from the front as checks come in.
     """
 
-    def __init__(self, cooldown_duration: int = 10) -> None:
+    def __init__(
+        self,
+        cooldown_duration: float = 10,
+        *,
+        scope: Literal["user", "channel", "guild"] = "user",
+        max_entries: int = 10_000,
+    ) -> None:
+        """Initialize the cooldown.
+
+        Args:
+            cooldown_duration (float, optional): Seconds a user stays on cooldown. Defaults to 10.
+            scope (Literal["user", "channel", "guild"], optional): Whether a cooldown applies to the user
+                everywhere, or only in the channel or guild it started in. Defaults to "user".
+            max_entries (int, optional): Most cooldowns tracked at once. Past this, the ones closest to
+                expiring are dropped early. Defaults to 10,000.
+        """
         self.response_cooldown = cooldown_duration
-        self.recently_responded_users: set[int] = set()
-
-    async def _add_user(self, user_id: int):
-        """Adds user to be on cooldown, then removes after self.response_cooldown duration."""
-        self.recently_responded_users.add(user_id)
-        await asyncio.sleep(self.response_cooldown)
-        self.recently_responded_users.discard(user_id)
-
-    def check_for_user(self, user_id: int) -> bool:
-        """See if a user is on cooldown (True) or not (False). Automatically puts user on cooldown when False."""
-        if not user_id in self.recently_responded_users:
-            asyncio.create_task(self._add_user(user_id=user_id))
-            return False
-        else:
+        self.scope = scope
+        self.max_entries = max_entries
+
+        # Cooldown key -> monotonic time it expires at, oldest first.
+        self._expires_at: OrderedDict[Hashable, float] = OrderedDict()
+
+    def __len__(self) -> int:
+        self._sweep(time.monotonic())
+        return len(self._expires_at)
+
+    def check_for_user(
+        self, user_id: int, *, channel_id: Optional[int] = None, guild_id: Optional[int] = None
+    ) -> bool:
+        """See if a user is on cooldown (True) or not (False). Automatically puts user on cooldown when False.
+
+        Args:
+            user_id (int): The user to check.
+            channel_id (int, optional): Channel the user is in, needed for the channel scope.
+            guild_id (int, optional): Guild the user is in, needed for the guild scope.
+        """
+        key = self._key(user_id, channel_id, guild_id)
+        now = time.monotonic()
+        self._sweep(now)
+
+        if key in self._expires_at:
             return True
+
+        self._expires_at[key] = now + self.response_cooldown
+        if len(self._expires_at) > self.max_entries:
+            self._expires_at.popitem(last=False)
+
+        return False
+
+    def reset(self, user_id: int, *, channel_id: Optional[int] = None, guild_id: Optional[int] = None):
+        """Take a user off cooldown."""
+        self._expires_at.pop(self._key(user_id, channel_id, guild_id), None)
+
+    def _key(self, user_id: int, channel_id: Optional[int], guild_id: Optional[int]) -> Hashable:
+        match self.scope:
+            case "channel":
+                return (user_id, channel_id)
+            case "guild":
+                return (user_id, guild_id)
+        return user_id
+
+    def _sweep(self, now: float):
+        while self._expires_at:
+            key, expires_at = next(iter(self._expires_at.items()))
+            if expires_at > now:
+                break
+            del self._expires_at[key]
@@ -0,0 +1,79 @@
+import asyncio
+import hashlib
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import attrs
+from googletrans import Translator
+
+from resources.utils.single_flight import SingleFlight
+from resources.utils.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+
+@attrs.frozen
+class TranslationResult:
+    text: str
+    src: str
+    dest: str
+
+
+class TranslationService:
+    """Translates text without blocking the event loop.
+
+    googletrans only has a blocking client, so one shared client is run on a small thread pool.
+    Results are cached by (text hash, destination language), and identical requests that arrive while a
+    translation is running wait on that translation instead of starting their own.
+    """
+
+    def __init__(
+        self,
+        translator: Optional[Translator] = None,
+        *,
+        max_workers: int = 2,
+        cache_size: int = 1024,
+        cache_ttl: float = 86400.0,
+    ) -> None:
+        """Initialize the service.
+
+        Args:
+            translator (Translator, optional): The client to translate with. Defaults to a new Translator.
+            max_workers (int, optional): Most translations running at once. Defaults to 2.
+            cache_size (int, optional): Most translations kept in the cache. Defaults to 1024.
+            cache_ttl (float, optional): Seconds a translation is reused for. Defaults to a day.
+        """
+        self.translator = translator or Translator()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="translate")
+        self._cache: TTLCache[tuple[str, str], TranslationResult] = TTLCache(cache_ttl, max_size=cache_size)
+        self._in_flight: SingleFlight[tuple[str, str], TranslationResult] = SingleFlight()
+
+    async def translate(self, text: str, dest: str = "en") -> TranslationResult:
+        """Translate text, detecting the language it is in.
+
+        Args:
+            text (str): What to translate.
+            dest (str, optional): Language code to translate to. Defaults to "en".
+
+        Returns:
+            TranslationResult: The translated text and the detected source language.
+        """
+        key = (hashlib.sha256(text.encode()).hexdigest(), dest)
+
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+
+        return await self._in_flight.run(key, lambda: self._translate(key, text, dest))
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _translate(self, key: tuple[str, str], text: str, dest: str) -> TranslationResult:
+        loop = asyncio.get_running_loop()
+        translation = await loop.run_in_executor(self._executor, self.translator.translate, text, dest)
+
+        result = TranslationResult(text=translation.text, src=translation.src, dest=dest)
+        self._cache.set(key, result)
+        return result
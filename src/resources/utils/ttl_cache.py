@@ -0,0 +1,63 @@
+import time
+from collections import OrderedDict
+from typing import Generic, Hashable, Optional, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+_MISSING = object()
+
+
+class TTLCache(Generic[K, V]):
+    """A size-bounded mapping whose entries expire a set number of seconds after they were stored.
+
+    Expired entries are dropped when they are next looked up. Once max_size is reached, the least recently
+    used entry is evicted to make room.
+    """
+
+    def __init__(self, ttl: float, *, max_size: int = 1024) -> None:
+        """Initialize the cache.
+
+        Args:
+            ttl (float): Seconds an entry stays valid for.
+            max_size (int, optional): Most entries kept at once. Defaults to 1024.
+        """
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: OrderedDict[K, tuple[float, V]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: K) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def get(self, key: K, default=None) -> Optional[V]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return default
+
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: K, value: V, *, ttl: Optional[float] = None):
+        """Store a value, optionally with a different ttl than the cache default."""
+        self._entries[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def pop(self, key: K, default=None) -> Optional[V]:
+        entry = self._entries.pop(key, None)
+        if entry is None or entry[0] <= time.monotonic():
+            return default
+        return entry[1]
+
+    def clear(self):
+        self._entries.clear()
@@ -0,0 +1,78 @@
+import asyncio
+import logging
+from typing import Iterable
+
+import discord
+
+from resources.utils.single_flight import SingleFlight
+from resources.utils.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+
+class UserResolver:
+    """Resolves many user IDs to usernames at once.
+
+    Names come from a TTL cache shared across calls, then from the client's user cache, and only the
+    remaining IDs are fetched over REST, concurrently but limited to max_concurrency requests at a time.
+    """
+
+    def __init__(
+        self, client: discord.Client, *, ttl: float = 3600.0, max_concurrency: int = 5, max_size: int = 4096
+    ) -> None:
+        """Initialize the resolver.
+
+        Args:
+            client (discord.Client): The client to look users up with.
+            ttl (float, optional): Seconds a resolved name is reused for. Defaults to 3600.
+            max_concurrency (int, optional): Most user fetches in flight at once. Defaults to 5.
+            max_size (int, optional): Most names kept in the cache. Defaults to 4096.
+        """
+        self.client = client
+        self._names: TTLCache[int, str] = TTLCache(ttl, max_size=max_size)
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._fetches: SingleFlight[int, str | None] = SingleFlight()
+
+    async def resolve_names(self, user_ids: Iterable[int]) -> dict[int, str]:
+        """Get the username for each ID.
+
+        Returns:
+            dict[int, str]: Username by user ID. Users that couldn't be found are left out.
+        """
+        names: dict[int, str] = {}
+        missing: list[int] = []
+
+        for user_id in dict.fromkeys(user_ids):
+            name = self._names.get(user_id)
+            if name is None:
+                user = self.client.get_user(user_id)
+                if user is not None:
+                    name = user.name
+                    self._names.set(user_id, name)
+
+            if name is None:
+                missing.append(user_id)
+            else:
+                names[user_id] = name
+
+        if missing:
+            fetched = await asyncio.gather(
+                *(
+                    self._fetches.run(user_id, lambda user_id=user_id: self._fetch_name(user_id))
+                    for user_id in missing
+                )
+            )
+            names.update({user_id: name for user_id, name in zip(missing, fetched) if name is not None})
+
+        return names
+
+    async def _fetch_name(self, user_id: int) -> str | None:
+        async with self._semaphore:
+            try:
+                user = await self.client.fetch_user(user_id)
+            except discord.HTTPException as err:
+                logger.warning(f"Could not fetch user {user_id}: {err}")
+                return None
+
+        self._names.set(user_id, user.name)
+        return user.name
@@ -0,0 +1,134 @@
+"""Trigger matching benchmarks against synthetic trigger sets.
+
+Run with `pytest --benchmark`. Results are compared against baselines.json, and a case fails when its
+throughput drops below REGRESSION_TOLERANCE of the baseline. Run with `pytest --update-baselines` to save
+new baselines after an intended change, or when moving to a different machine.
+"""
+
+import json
+import time
+from pathlib import Path
+from typing import Callable
+
+import pytest
+
+import resources.responder_parsing as tr
+
+BASELINES_PATH = Path(__file__).with_name("baselines.json")
+# A case fails when it handles fewer messages per second than this fraction of its baseline.
+REGRESSION_TOLERANCE = 0.5
+
+TRIGGER_SET_SIZES = [10, 100, 1_000, 10_000]
+# Checking each trigger one by one gets slow fast, it only runs on the smaller sets.
+NAIVE_MAX_SIZE = 1_000
+MESSAGE_COUNT = 2_000
+
+pytestmark = pytest.mark.benchmark
+
+
+def measure(messages: list[str], handle: Callable[[str], object]) -> dict[str, float]:
+    latencies = []
+    started = time.perf_counter()
+    for message in messages:
+        message_started = time.perf_counter_ns()
+        handle(message)
+        latencies.append(time.perf_counter_ns() - message_started)
+    total = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "messages_per_second": round(len(messages) / total, 1),
+        "p50_us": round(latencies[len(latencies) // 2] / 1_000, 2),
+        "p99_us": round(latencies[int(len(latencies) * 0.99)] / 1_000, 2),
+    }
+
+
+@pytest.fixture(scope="module")
+def baselines(request: pytest.FixtureRequest):
+    saved = json.loads(BASELINES_PATH.read_text()) if BASELINES_PATH.exists() else {}
+    results: dict[str, dict[str, float]] = {}
+
+    yield saved, results
+
+    if request.config.getoption("--update-baselines") and results:
+        BASELINES_PATH.write_text(json.dumps({**saved, **results}, indent=4, sort_keys=True) + "\n")
+
+
+def check_against_baseline(config: pytest.Config, baselines, name: str, result: dict[str, float]):
+    saved, results = baselines
+    results[name] = result
+    print(f"\n{name}: {result}")
+
+    if config.getoption("--update-baselines"):
+        return
+
+    baseline = saved.get(name)
+    if baseline is None:
+        pytest.skip(f"No baseline for {name}, run with --update-baselines to save one.")
+
+    minimum = baseline["messages_per_second"] * REGRESSION_TOLERANCE
+    assert result["messages_per_second"] >= minimum, (
+        f"{name} handled {result['messages_per_second']} messages/s, "
+        f"below {REGRESSION_TOLERANCE:.0%} of the {baseline['messages_per_second']} baseline."
+    )
+
+
+@pytest.fixture(scope="module")
+def corpus(make_trigger_corpus):
+    return make_trigger_corpus(TRIGGER_SET_SIZES, MESSAGE_COUNT)
+
+
+@pytest.mark.parametrize("size", TRIGGER_SET_SIZES)
+def test_trigger_matcher(pytestconfig, corpus, baselines, size: int):
+    """The auto responder's matching: normalize the message once, then one TriggerMatcher lookup."""
+    triggers, messages = corpus
+    matcher = tr.TriggerMatcher((trigger, trigger) for trigger in triggers[size])
+
+    result = measure(messages, lambda message: matcher.match(tr.NormalizedMessage(message)))
+    check_against_baseline(pytestconfig, baselines, f"trigger_matcher[{size}]", result)
+
+
+@pytest.mark.parametrize("size", TRIGGER_SET_SIZES)
+def test_trigger_matcher_after_edit(pytestconfig, corpus, baselines, size: int):
+    """A responder edit right before every message: the message mustn't pay for rebuilding the automaton."""
+    triggers, messages = corpus
+    # Start every case from the same compile cache, whichever cases ran before it.
+    tr.compile_trigger.cache_clear()
+    matcher = tr.TriggerMatcher((trigger, trigger) for trigger in triggers[size])
+
+    # Compiled before timing, this measures the edit itself and the next match, not compiling the trigger.
+    edited_triggers = [f"{trigger} edited" for trigger in triggers[max(TRIGGER_SET_SIZES)][:MESSAGE_COUNT]]
+    for trigger in edited_triggers:
+        tr.compile_trigger(trigger)
+    edited = iter(edited_triggers)
+
+    def handle(message: str):
+        trigger = next(edited)
+        matcher.upsert(trigger, trigger)
+        result = matcher.match(tr.NormalizedMessage(message))
+        matcher.discard(trigger)
+        return result
+
+    result = measure(messages, handle)
+    check_against_baseline(pytestconfig, baselines, f"trigger_matcher_after_edit[{size}]", result)
+
+
+@pytest.mark.parametrize("size", [size for size in TRIGGER_SET_SIZES if size <= NAIVE_MAX_SIZE])
+def test_search_message_match(pytestconfig, corpus, baselines, size: int):
+    """Every trigger checked in turn with search_message_match, the way matching used to be done."""
+    triggers, messages = corpus
+    compiled = [tr.compile_trigger(trigger) for trigger in triggers[size]]
+
+    def handle(message: str):
+        normalized = tr.NormalizedMessage(message)
+        return next(
+            (
+                trigger
+                for trigger in compiled
+                if tr.search_message_match(message=normalized, initial_trigger=trigger)
+            ),
+            None,
+        )
+
+    result = measure(messages, handle)
+    check_against_baseline(pytestconfig, baselines, f"search_message_match[{size}]", result)
@@ -0,0 +1,233 @@
+import random
+from types import SimpleNamespace
+from typing import Any, Callable, Iterable, Optional
+
+import pytest
+
+import resources.helper_bot as helper_bot
+from resources.helper_bot import MongoDB
+
+
+def pytest_addoption(parser: pytest.Parser):
+    parser.addoption("--benchmark", action="store_true", help="Run the benchmarks in tests/benchmarks.")
+    parser.addoption(
+        "--update-baselines",
+        action="store_true",
+        help="Save the benchmark results as the new baselines instead of comparing against them.",
+    )
+
+
+def pytest_configure(config: pytest.Config):
+    config.addinivalue_line("markers", "benchmark: timing test, only runs with --benchmark.")
+
+
+def pytest_collection_modifyitems(config: pytest.Config, items: list[pytest.Item]):
+    if config.getoption("--benchmark") or config.getoption("--update-baselines"):
+        return
+
+    skip = pytest.mark.skip(reason="benchmarks only run with --benchmark")
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(skip)
+
+
+# ------------ TRIGGER CORPUS ------------
+
+TRIGGER_CORPUS_SEED = 1312
+
+
+def make_vocabulary(rng: random.Random, size: int = 3_000) -> list[str]:
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    words = {"".join(rng.choices(letters, k=rng.randint(3, 9))) for _ in range(size)}
+    return sorted(words)
+
+
+def make_triggers(rng: random.Random, vocabulary: list[str], count: int) -> list[str]:
+    """Make a set of unique triggers, mixing every trigger form."""
+    forms: list[Callable[[], str]] = [
+        lambda: rng.choice(vocabulary),
+        lambda: " ".join(rng.sample(vocabulary, 2)),
+        lambda: f"*{rng.choice(vocabulary)}",
+        lambda: f"{rng.choice(vocabulary)}*",
+        lambda: f"*{rng.choice(vocabulary)}*",
+        lambda: f"{rng.choice(vocabulary)} ... {rng.choice(vocabulary)}",
+        lambda: f"{rng.choice(vocabulary)}, {rng.choice(vocabulary)}",
+        lambda: f"{rng.choice(vocabulary)}*, *{rng.choice(vocabulary)}",
+        lambda: f"={' '.join(rng.sample(vocabulary, 2))}",
+    ]
+
+    triggers: dict[str, None] = {}
+    while len(triggers) < count:
+        triggers[rng.choice(forms)()] = None
+    return list(triggers)
+
+
+def make_messages(rng: random.Random, vocabulary: list[str], triggers: list[str], count: int) -> list[str]:
+    """Make support-channel sized messages. About a third of them contain the text of a trigger."""
+    messages = []
+    for _ in range(count):
+        words = rng.choices(vocabulary, k=rng.randint(3, 40))
+        if rng.random() < 0.33:
+            trigger = rng.choice(triggers).lstrip("=").replace("*", "").replace("...", "")
+            words.insert(rng.randint(0, len(words)), trigger)
+
+        message = " ".join(words).capitalize()
+        messages.append(message + rng.choice(["", "?", "!", "."]))
+    return messages
+
+
+@pytest.fixture(scope="session")
+def make_trigger_corpus() -> Callable[[list[int], int], tuple[dict[int, list[str]], list[str]]]:
+    """Factory for a synthetic trigger corpus, the same on every run.
+
+    Call it with the trigger set sizes and message count. Returns trigger set size -> triggers, and messages
+    made from the largest set.
+    """
+
+    def make(sizes: list[int], message_count: int) -> tuple[dict[int, list[str]], list[str]]:
+        rng = random.Random(TRIGGER_CORPUS_SEED)
+        vocabulary = make_vocabulary(rng)
+        triggers = {size: make_triggers(rng, vocabulary, size) for size in sizes}
+        messages = make_messages(rng, vocabulary, triggers[max(sizes)], message_count)
+        return triggers, messages
+
+    return make
+
+
+# ------------ FAKE DATABASE ------------
+
+
+class FakeCursor:
+    def __init__(self, documents: list[dict]) -> None:
+        self._documents = iter(documents)
+        self.fetch_size = None
+
+    def batch_size(self, size: int):
+        self.fetch_size = size
+        return self
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._documents)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class FakeCollection:
+    """In-memory stand in for a motor collection, supporting the queries and updates MongoDB sends."""
+
+    def __init__(self, documents: Iterable[dict] = ()) -> None:
+        self.documents: list[dict] = [dict(document) for document in documents]
+        # Every find (query, projection) and bulk write request, in order.
+        self.finds: list[tuple[Optional[dict], Optional[dict]]] = []
+        self.requests: list = []
+        self.cursor: Optional[FakeCursor] = None
+
+    def find(self, query=None, projection=None):
+        self.finds.append((query, projection))
+        documents = [self._project(doc, projection) for doc in self.documents if self._matches(doc, query)]
+        self.cursor = FakeCursor(documents)
+        return self.cursor
+
+    async def find_one(self, query=None, projection=None):
+        return next(
+            (self._project(doc, projection) for doc in self.documents if self._matches(doc, query)), None
+        )
+
+    async def find_one_and_update(self, filter, update, upsert=False, projection=None, return_document=None):
+        document = next((doc for doc in self.documents if self._matches(doc, filter)), None)
+        if document is None:
+            if not upsert:
+                return None
+            document = dict(update.get("$setOnInsert", {}))
+            self.documents.append(document)
+
+        self._apply(document, update)
+        return self._project(document, projection)
+
+    async def find_one_and_delete(self, filter):
+        document = next((doc for doc in self.documents if self._matches(doc, filter)), None)
+        if document is not None:
+            self.documents.remove(document)
+        return document
+
+    async def bulk_write(self, requests, ordered=True):
+        self.requests.extend(requests)
+        for request in requests:
+            await self.find_one_and_update(request._filter, request._doc, upsert=bool(request._upsert))
+
+    async def create_indexes(self, indexes):
+        return [index.document["name"] for index in indexes]
+
+    @classmethod
+    def _matches(cls, document: dict, query: Optional[dict]) -> bool:
+        for key, expected in (query or {}).items():
+            if key == "$or":
+                if not any(cls._matches(document, clause) for clause in expected):
+                    return False
+                continue
+
+            value = document.get(key)
+            if value != expected and not (isinstance(value, list) and expected in value):
+                return False
+        return True
+
+    @staticmethod
+    def _apply(document: dict, update: dict):
+        for key, value in update.get("$set", {}).items():
+            document[key] = value
+        for key, amount in update.get("$inc", {}).items():
+            document[key] = document.get(key, 0) + amount
+
+    @staticmethod
+    def _project(document: dict, projection: Optional[dict]) -> dict:
+        if projection is None:
+            return dict(document)
+        return {key: value for key, value in document.items() if key == "_id" or key in projection}
+
+
+class FakeDatabase(dict):
+    """Collection name -> FakeCollection, created on first use like real collections."""
+
+    name = "helper_test"
+
+    def __missing__(self, name: str) -> FakeCollection:
+        collection = self[name] = FakeCollection()
+        return collection
+
+
+class FakeClient:
+    def __init__(self, *args, **kwargs) -> None:
+        self.database = FakeDatabase()
+
+    def get_default_database(self, default: str) -> FakeDatabase:
+        return self.database
+
+
+@pytest.fixture
+def make_db(monkeypatch: pytest.MonkeyPatch) -> Callable[..., MongoDB]:
+    """Factory for MongoDB instances backed by in-memory collections, built through the real __init__.
+
+    Call it with collection name -> documents, plus any MongoDB keyword arguments.
+    """
+    # Only helper_bot's reference is swapped, tests can still open real clients through motor.
+    monkeypatch.setattr(helper_bot, "motor_asyncio", SimpleNamespace(AsyncIOMotorClient=FakeClient))
+
+    def make(collections: Optional[dict[str, Iterable[dict]]] = None, **kwargs: Any) -> MongoDB:
+        db = MongoDB("mongodb://localhost", **kwargs)
+        for name, documents in (collections or {}).items():
+            db.db[name] = FakeCollection(documents)
+        return db
+
+    return make
+
+
+@pytest.fixture
+def restore_instance():
+    """Put back the global bot instance after a test creates its own HelperBot."""
+    instance = helper_bot.instance
+    yield
+    helper_bot.instance = instance
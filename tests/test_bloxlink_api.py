@@ -0,0 +1,99 @@
+import asyncio
+
+import aiohttp
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from resources.exceptions import HelperError
+from resources.utils.bloxlink_api import BloxlinkAPI, TokenBucket
+
+GUILD_ID = 123
+
+
+class FakeBloxlink:
+    """Stand-in for the Bloxlink API. Rate limits the first `limited` requests it gets."""
+
+    def __init__(self, *, limited: int = 0, delay: float = 0.0):
+        self.limited = limited
+        self.delay = delay
+        self.requests: list[str] = []
+
+    async def discord_to_roblox(self, request: web.Request):
+        self.requests.append(request.match_info["user_id"])
+        await asyncio.sleep(self.delay)
+
+        if request.headers.get("Authorization") != "key":
+            return web.json_response({"error": "Unauthorized"}, status=401)
+
+        if self.limited:
+            self.limited -= 1
+            return web.json_response(
+                {"error": "Too many requests"}, status=429, headers={"Retry-After": "0.01"}
+            )
+
+        return web.json_response({"robloxID": "1", "resolved": {}})
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/guilds/{guild_id}/discord-to-roblox/{user_id}", self.discord_to_roblox)
+        return app
+
+
+async def with_client(fake: FakeBloxlink, func, **options):
+    async with TestServer(fake.app()) as server, aiohttp.ClientSession() as session:
+        client = BloxlinkAPI(
+            session, "key", GUILD_ID, base_url=str(server.make_url("")).rstrip("/"), **options
+        )
+        return await func(client)
+
+
+def test_responses_are_cached_and_deduplicated():
+    fake = FakeBloxlink(delay=0.02)
+
+    async def run(client: BloxlinkAPI):
+        responses = await asyncio.gather(*(client.discord_to_roblox(1) for _ in range(5)))
+        responses.append(await client.discord_to_roblox(1))
+        return responses
+
+    responses = asyncio.run(with_client(fake, run))
+
+    assert all(response["robloxID"] == "1" for response in responses)
+    assert fake.requests == ["1"]
+
+
+def test_rate_limited_requests_are_retried():
+    fake = FakeBloxlink(limited=2)
+
+    response = asyncio.run(with_client(fake, lambda client: client.discord_to_roblox(1)))
+
+    assert response["robloxID"] == "1"
+    assert fake.requests == ["1", "1", "1"]
+
+
+def test_gives_up_after_retries():
+    fake = FakeBloxlink(limited=10)
+
+    with pytest.raises(HelperError):
+        asyncio.run(with_client(fake, lambda client: client.discord_to_roblox(1), max_retries=1))
+    assert len(fake.requests) == 2
+
+
+def test_timeout():
+    fake = FakeBloxlink(delay=0.2)
+
+    with pytest.raises(HelperError):
+        asyncio.run(with_client(fake, lambda client: client.discord_to_roblox(1), timeout=0.05))
+
+
+def test_token_bucket_limits_rate():
+    async def run():
+        bucket = TokenBucket(rate=100, capacity=2)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        for _ in range(4):
+            await bucket.acquire()
+        return loop.time() - started
+
+    # Two calls are free, the other two wait 10ms each.
+    assert asyncio.run(run()) >= 0.015
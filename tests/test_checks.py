@@ -0,0 +1,87 @@
+import asyncio
+from types import SimpleNamespace
+
+import discord
+
+from resources import checks
+
+
+class FakeResponse:
+    status = 404
+    reason = "Not Found"
+
+
+class FakeGuild:
+    def __init__(self, members):
+        self.id = checks.BLOXLINK_GUILD
+        self.members = members
+        self.fetches = 0
+
+    def get_member(self, user_id):
+        return None
+
+    async def fetch_member(self, user_id):
+        self.fetches += 1
+        if user_id not in self.members:
+            raise discord.NotFound(FakeResponse(), "Unknown Member")
+        return SimpleNamespace(roles=[SimpleNamespace(id=role) for role in self.members[user_id]])
+
+
+def fake_interaction(user_id, interaction=None):
+    return SimpleNamespace(
+        user=SimpleNamespace(id=user_id), guild=SimpleNamespace(id=1), interaction=interaction
+    )
+
+
+def test_bloxlink_roles_are_cached(monkeypatch):
+    guild = FakeGuild({10: [checks.TRIAL_ROLE]})
+    monkeypatch.setattr(checks, "bot", SimpleNamespace(get_guild=lambda guild_id: guild))
+    checks._bloxlink_roles.clear()
+
+    async def run():
+        first = await checks._lookup_staff_roles(fake_interaction(10))
+        second = await checks._lookup_staff_roles(fake_interaction(10))
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first == second == frozenset({checks.TRIAL_ROLE})
+    assert guild.fetches == 1
+
+    checks._bloxlink_roles.pop(10)  # as if the entry expired
+    asyncio.run(checks._lookup_staff_roles(fake_interaction(10)))
+    assert guild.fetches == 2
+
+
+def test_missing_members_are_cached(monkeypatch):
+    guild = FakeGuild({})
+    monkeypatch.setattr(checks, "bot", SimpleNamespace(get_guild=lambda guild_id: guild))
+    checks._bloxlink_roles.clear()
+
+    async def run():
+        return [await checks._lookup_staff_roles(fake_interaction(20)) for _ in range(3)]
+
+    # Not a member of the current guild either, so there is nothing to check against.
+    assert asyncio.run(run()) == [None, None, None]
+    assert guild.fetches == 1
+
+
+def test_staff_roles_are_looked_up_once_per_interaction(monkeypatch):
+    lookups = []
+
+    async def lookup_staff_roles(ctx):
+        lookups.append(ctx)
+        return frozenset({checks.TRIAL_ROLE})
+
+    monkeypatch.setattr(checks, "_lookup_staff_roles", lookup_staff_roles)
+
+    async def run(ctx):
+        # Stacked checks on one command.
+        return await checks.is_staff_or_trial(ctx), await checks.is_staff(ctx)
+
+    ctx = fake_interaction(30, interaction=SimpleNamespace(extras={}))
+    assert asyncio.run(run(ctx)) == (True, False)
+    assert lookups == [ctx]
+
+    # The next interaction looks them up again.
+    asyncio.run(run(fake_interaction(30, interaction=SimpleNamespace(extras={}))))
+    assert len(lookups) == 2
@@ -0,0 +1,97 @@
+import asyncio
+
+from pymongo.errors import OperationFailure
+
+from resources.utils.collection_watcher import (
+    CHANGE_STREAMS_UNSUPPORTED,
+    CollectionChange,
+    CollectionWatcher,
+)
+
+
+class FakeChangeStream:
+    def __init__(self, events: list[dict]):
+        self.events = events
+        self.resume_token = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if not self.events:
+            # Real streams block until something changes.
+            await asyncio.sleep(3600)
+        event = self.events.pop(0)
+        self.resume_token = {"_data": len(self.events)}
+        return event
+
+
+class FakeCollection:
+    """Local stand-in for a motor collection, holding documents in a dict."""
+
+    def __init__(self, documents: list[dict], events: list[dict] | None = None):
+        self.documents = {doc["_id"]: doc for doc in documents}
+        self.events = events
+
+    def watch(self, **kwargs):
+        if self.events is None:
+            raise OperationFailure("not a replica set", code=CHANGE_STREAMS_UNSUPPORTED)
+        return FakeChangeStream(self.events)
+
+    async def find(self):
+        for doc in list(self.documents.values()):
+            yield dict(doc)
+
+
+async def collect_changes(database: dict, collection: str, action, *, wait: float = 0.05):
+    changes: list[CollectionChange] = []
+    watcher = CollectionWatcher(database, poll_interval=0.01)
+    watcher.subscribe(collection, changes.append)
+    watcher.start()
+
+    await asyncio.sleep(wait)
+    await action()
+    await asyncio.sleep(wait)
+    await watcher.stop()
+
+    return changes
+
+
+def test_polling_fallback_reports_changes():
+    tags = FakeCollection([{"_id": "verify", "content": "a"}, {"_id": "roles", "content": "b"}])
+
+    async def edit():
+        tags.documents["verify"] = {"_id": "verify", "content": "c"}
+        tags.documents["link"] = {"_id": "link", "content": "d"}
+        del tags.documents["roles"]
+
+    changes = asyncio.run(collect_changes({"tags": tags}, "tags", edit))
+
+    assert CollectionChange("tags", "upsert", "verify", {"_id": "verify", "content": "c"}) in changes
+    assert CollectionChange("tags", "upsert", "link", {"_id": "link", "content": "d"}) in changes
+    assert CollectionChange("tags", "delete", "roles") in changes
+    assert len(changes) == 3
+
+
+def test_change_stream_events_are_translated():
+    events = [
+        {"operationType": "update", "documentKey": {"_id": "a"}, "fullDocument": {"_id": "a", "x": 1}},
+        {"operationType": "delete", "documentKey": {"_id": "b"}},
+        {"operationType": "update", "documentKey": {"_id": "c"}, "fullDocument": None},
+    ]
+    config = FakeCollection([], events)
+
+    async def nothing(): ...
+
+    changes = asyncio.run(collect_changes({"config": config}, "config", nothing))
+
+    assert changes == [
+        CollectionChange("config", "upsert", "a", {"_id": "a", "x": 1}),
+        CollectionChange("config", "delete", "b"),
+    ]
@@ -0,0 +1,63 @@
+import asyncio
+
+from resources.utils.counter_buffer import CounterBuffer
+
+
+def test_increments_are_summed_per_key():
+    flushed = []
+
+    async def flush(batch):
+        flushed.append(batch)
+
+    async def run():
+        buffer = CounterBuffer(flush, interval=3600)
+        buffer.start()
+        for _ in range(5):
+            buffer.incr("verify")
+        buffer.incr("roles", 2)
+
+        await buffer.stop()
+
+    asyncio.run(run())
+    assert flushed == [{"verify": 5, "roles": 2}]
+
+
+def test_failed_flush_is_retried():
+    flushed = []
+    fail = True
+
+    async def flush(batch):
+        if fail:
+            raise RuntimeError("database is down")
+        flushed.append(batch)
+
+    async def run():
+        nonlocal fail
+        buffer = CounterBuffer(flush)
+        buffer.incr("verify")
+        await buffer.flush()
+        assert buffer["verify"] == 1
+
+        fail = False
+        buffer.incr("verify")
+        await buffer.flush()
+        assert len(buffer) == 0
+
+    asyncio.run(run())
+    assert flushed == [{"verify": 2}]
+
+
+def test_flushes_early_at_max_keys():
+    flushed = []
+
+    async def flush(batch):
+        flushed.append(batch)
+
+    async def run():
+        buffer = CounterBuffer(flush, interval=3600, max_keys=3)
+        for key in range(3):
+            buffer.incr(key)
+        await asyncio.sleep(0)
+
+    asyncio.run(run())
+    assert flushed == [{0: 1, 1: 1, 2: 1}]
@@ -0,0 +1,20 @@
+from resources.models.interaction_data import CustomID, MessageComponentData
+
+
+def test_parse_round_trip():
+    custom_id = CustomID.parse("tag_all:123:0:4")
+
+    assert custom_id.prefix == "tag_all"
+    assert custom_id.args == ("123", "0", "4")
+    assert str(custom_id) == "tag_all:123:0:4"
+
+
+def test_parse_without_args():
+    assert CustomID.parse("premium_support") == CustomID("premium_support")
+
+
+def test_prefixes_that_share_a_start_stay_separate():
+    data = MessageComponentData(custom_id="ar_all2:1", component_type=2, id=None)
+
+    assert data.parsed_custom_id.prefix == "ar_all2"
+    assert data.parsed_custom_id.prefix != "ar_all"
@@ -0,0 +1,115 @@
+import asyncio
+
+import aiohttp
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from resources.utils.group_lookup import GroupLookup, GroupRank
+
+DELAY = 0.05
+
+
+def make_app(hits: list[str], rate_limited: int = 0) -> web.Application:
+    # The first rate_limited info requests get a 429.
+    remaining_limits = [rate_limited]
+
+    async def info(request: web.Request):
+        hits.append("info")
+        await asyncio.sleep(DELAY)
+        if remaining_limits[0]:
+            remaining_limits[0] -= 1
+            return web.json_response({"errors": [{"code": 0, "message": "Too many requests"}]}, status=429)
+        if request.match_info["group_id"] != "1":
+            return web.json_response({"errors": [{"code": 1, "message": "Group is invalid"}]}, status=400)
+        return web.json_response({"name": "Bloxlink", "memberCount": 10, "owner": {"username": "justin"}})
+
+    async def roles(request: web.Request):
+        hits.append("roles")
+        await asyncio.sleep(DELAY)
+        return web.json_response({"roles": [{"name": "Guest", "rank": 0}, {"name": "Owner", "rank": 255}]})
+
+    async def icons(request: web.Request):
+        hits.append("icons")
+        await asyncio.sleep(DELAY)
+        if request.query["groupIds"] != "1":
+            return web.json_response({"data": []})
+        return web.json_response({"data": [{"imageUrl": "https://example.com/icon.png"}]})
+
+    app = web.Application()
+    app.router.add_get("/v1/groups/icons", icons)
+    app.router.add_get("/v1/groups/{group_id}", info)
+    app.router.add_get("/v1/groups/{group_id}/roles", roles)
+    return app
+
+
+async def with_lookup(hits, func, *, rate_limited: int = 0):
+    async with TestServer(make_app(hits, rate_limited)) as server, aiohttp.ClientSession() as session:
+        base_url = str(server.make_url("")).rstrip("/")
+        lookup = GroupLookup(session, groups_url=base_url, thumbnails_url=base_url)
+        return await func(lookup)
+
+
+def test_requests_run_concurrently():
+    hits = []
+
+    async def lookup_once(lookup: GroupLookup):
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        group = await lookup.get(1)
+        return group, loop.time() - started
+
+    group, elapsed = asyncio.run(with_lookup(hits, lookup_once))
+
+    assert group.name == "Bloxlink"
+    assert group.owner == "justin"
+    assert group.member_count == 10
+    assert group.ranks == (GroupRank(0, "Guest"), GroupRank(255, "Owner"))
+    assert group.icon_url == "https://example.com/icon.png"
+    assert sorted(hits) == ["icons", "info", "roles"]
+    assert elapsed < DELAY * 2.5
+
+
+def test_lookups_are_cached_and_coalesced():
+    hits = []
+
+    async def lookup_many(lookup: GroupLookup):
+        groups = await asyncio.gather(*(lookup.get(1) for _ in range(5)))
+        groups.append(await lookup.get("1"))
+        return groups
+
+    groups = asyncio.run(with_lookup(hits, lookup_many))
+
+    assert len(set(groups)) == 1
+    assert len(hits) == 3
+
+
+def test_invalid_group():
+    group = asyncio.run(with_lookup([], lambda lookup: lookup.get(2)))
+
+    assert group.name == "Invalid group."
+    assert group.owner == "N/A"
+    assert group.icon_url is None
+
+
+def test_rate_limited_lookups_are_not_cached():
+    hits = []
+
+    async def lookup_thrice(lookup: GroupLookup):
+        return await lookup.get(1), await lookup.get(1), await lookup.get(1)
+
+    limited, retried, cached = asyncio.run(with_lookup(hits, lookup_thrice, rate_limited=1))
+
+    assert limited.name == "Invalid group."
+    assert retried.name == cached.name == "Bloxlink"
+    assert hits.count("info") == 2
+
+
+def test_invalid_group_is_cached():
+    hits = []
+
+    async def lookup_twice(lookup: GroupLookup):
+        await lookup.get(2)
+        return await lookup.get(2)
+
+    asyncio.run(with_lookup(hits, lookup_twice))
+    assert hits.count("info") == 1
@@ -0,0 +1,85 @@
+import asyncio
+from types import SimpleNamespace
+
+import discord
+
+from resources.constants import ADMIN_ROLES, TRIAL_ROLE
+from resources.message_pipeline import MessageContext, MessagePipeline, StaffTier
+
+
+class FakeMember(discord.Member):
+    def __init__(self, role_ids=(), *, is_bot=False):
+        self._fake_roles = [SimpleNamespace(id=role_id) for role_id in role_ids]
+        self._fake_bot = is_bot
+
+    @property
+    def roles(self):  # type: ignore
+        return self._fake_roles
+
+    @property
+    def bot(self):  # type: ignore
+        return self._fake_bot
+
+
+def fake_message(content="Hello, World!", role_ids=(), *, is_bot=False):
+    return SimpleNamespace(
+        content=content,
+        author=FakeMember(role_ids, is_bot=is_bot),
+        guild=SimpleNamespace(id=1),
+        channel=SimpleNamespace(id=2),
+    )
+
+
+def test_context():
+    pipeline = MessagePipeline(".")
+
+    def allowlisted(guild_id, channel_id):
+        return (guild_id, channel_id) == (1, 2)
+
+    pipeline.allowlist_check = allowlisted
+
+    context = asyncio.run(pipeline.build_context(fake_message(role_ids=[TRIAL_ROLE])))  # type: ignore
+    assert context is not None
+    assert context.staff_tier is StaffTier.TRIAL
+    assert context.normalized_content.text == "hello world"
+    assert context.allowlisted
+    assert not context.is_command
+    assert not context.bypasses_automation
+
+    context = asyncio.run(pipeline.build_context(fake_message(".tag", [ADMIN_ROLES["dev"]])))  # type: ignore
+    assert context is not None
+    assert context.staff_tier is StaffTier.VOLUNTEER
+    assert context.is_command
+    assert context.bypasses_automation
+
+
+def test_stages_run_in_priority_order_and_short_circuit():
+    pipeline = MessagePipeline(".")
+    calls = []
+
+    def stage(name, stop=False):
+        async def run(context: MessageContext):
+            calls.append(name)
+            if name == "broken":
+                raise RuntimeError
+            return stop
+
+        return run
+
+    pipeline.register("last", stage("last"), priority=50)
+    pipeline.register("stops", stage("stops", stop=True), priority=20)
+    pipeline.register("first", stage("first"), priority=0)
+    pipeline.register("broken", stage("broken"), priority=10)
+
+    asyncio.run(pipeline.dispatch(fake_message()))  # type: ignore
+    assert calls == ["first", "broken", "stops"]
+
+    calls.clear()
+    pipeline.unregister("stops")
+    asyncio.run(pipeline.dispatch(fake_message()))  # type: ignore
+    assert calls == ["first", "broken", "last"]
+
+
+def test_bots_are_ignored():
+    pipeline = MessagePipeline(".")
+    assert asyncio.run(pipeline.build_context(fake_message(is_bot=True))) is None  # type: ignore
@@ -0,0 +1,128 @@
+import asyncio
+import os
+import uuid
+
+import pytest
+from motor import motor_asyncio
+
+from resources.helper_bot import MongoDB
+from resources.utils.collection_watcher import CollectionChange
+
+# Point this at a local mongod (e.g. mongodb://localhost:27017) to run the query plan tests.
+MONGODB_TEST_URL = os.environ.get("MONGODB_TEST_URL")
+
+TAGS = [
+    {"_id": "verify", "content": "Run /verify.", "aliases": ["v", "link"], "use_count": 3},
+    {"_id": "roles", "content": "Run /getrole.", "aliases": ["getrole"], "use_count": 1},
+]
+
+
+def test_projection_is_sent_to_the_database(make_db):
+    db = make_db({"tags": TAGS})
+    tags = db.db["tags"]
+
+    async def run():
+        assert await db.get_all_tags() == TAGS
+        await db.get_all_tags(projection=["aliases"])
+        await db.get_all_tags(projection=[])
+
+    asyncio.run(run())
+    assert [projection for _, projection in tags.finds] == [None, {"_id": 1, "aliases": 1}, {"_id": 1}]
+
+
+def test_projection_applies_to_cached_tags(make_db):
+    db = make_db({"tags": TAGS})
+    tags = db.db["tags"]
+    db.tag_cache.load(TAGS)
+
+    async def run():
+        return await db.get_all_tags(projection=["aliases", "missing"])
+
+    assert asyncio.run(run()) == [
+        {"_id": "verify", "aliases": ["v", "link"]},
+        {"_id": "roles", "aliases": ["getrole"]},
+    ]
+    assert tags.finds == []
+
+
+def test_editing_a_tag_keeps_its_buffered_uses(make_db):
+    db = make_db({"tags": [{"_id": "verify", "content": "Run /verify.", "use_count": 5}]})
+
+    async def run():
+        await db.load_tag_cache()
+        db.incr_tag_use("verify")
+        db.incr_tag_use("verify")
+        await db.update_tag("verify", content="Run /verify again.")
+        assert db.tag_cache.get("verify")["use_count"] == 7
+
+        await db.tag_uses.flush()
+
+    asyncio.run(run())
+    assert db.db["tags"].documents[0]["use_count"] == 7
+    assert db.tag_cache.get("verify")["use_count"] == 7
+
+
+def test_watched_edit_keeps_buffered_uses(make_db):
+    db = make_db({"tags": [{"_id": "verify", "content": "Run /verify.", "use_count": 5}]})
+    stored = {"_id": "verify", "content": "Run /verify again.", "use_count": 5}
+
+    async def run():
+        await db.load_tag_cache()
+        db.incr_tag_use("verify")
+        await db._on_tag_change(CollectionChange("tags", "upsert", "verify", stored))
+
+    asyncio.run(run())
+    assert db.tag_cache.get("verify") == {**stored, "use_count": 6}
+    # The change is shared with the other subscribers, so it isn't modified.
+    assert stored["use_count"] == 5
+
+
+def _index_names(plan) -> set[str]:
+    """Every index used anywhere in an explained query plan."""
+    if isinstance(plan, dict):
+        names = {plan["indexName"]} if "indexName" in plan else set()
+        return names.union(*(_index_names(value) for value in plan.values()))
+    if isinstance(plan, list):
+        return set().union(*(_index_names(value) for value in plan))
+    return set()
+
+
+def test_batches(make_db):
+    db = make_db({"auto_response": [{"_id": str(i)} for i in range(5)]})
+    responders = db.db["auto_response"]
+
+    async def run(batch_size=None):
+        return [[doc["_id"] for doc in batch] async for batch in db.iter_autoresponse_batches(batch_size)]
+
+    assert asyncio.run(run(2)) == [["0", "1"], ["2", "3"], ["4"]]
+    assert responders.cursor.fetch_size == 2
+    assert asyncio.run(run()) == [["0", "1", "2", "3", "4"]]
+    assert responders.cursor.fetch_size == 500
+
+    responders.documents = []
+    assert asyncio.run(run(2)) == []
+
+    with pytest.raises(ValueError):
+        asyncio.run(run(-1))
+
+
+@pytest.mark.skipif(not MONGODB_TEST_URL, reason="Set MONGODB_TEST_URL to run tests against a real database.")
+def test_tag_lookup_uses_the_aliases_index(make_db):
+    async def run():
+        client = motor_asyncio.AsyncIOMotorClient(MONGODB_TEST_URL)
+        db = make_db()
+        db.db = client[f"helper_test_{uuid.uuid4().hex[:8]}"]
+
+        try:
+            await db.ensure_indexes()
+            await db.db["tags"].insert_many([dict(tag) for tag in TAGS])
+
+            assert (await db.get_tag("LINK"))["_id"] == "verify"
+            explained = await db.db["tags"].find(MongoDB._tag_filter("link")).explain()
+            return explained["queryPlanner"]["winningPlan"]
+        finally:
+            await client.drop_database(db.db.name)
+
+    plan = asyncio.run(run())
+    assert "aliases" in _index_names(plan)
+    assert "COLLSCAN" not in str(plan)
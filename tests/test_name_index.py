@@ -0,0 +1,38 @@
+from resources.utils.name_index import NameIndex
+
+NAMES = ["verify", "verification", "reverify", "roles", "role-sync", "premium", "bind", "binds", "unbind"]
+
+
+def test_prefix_matches_come_first_shortest_first():
+    index = NameIndex(NAMES)
+    assert index.search("ver")[:2] == ["verify", "verification"]
+    assert index.search("bin")[:2] == ["bind", "binds"]
+
+
+def test_containing_then_similar():
+    index = NameIndex(NAMES)
+    results = index.search("bind")
+
+    assert results[:3] == ["bind", "binds", "unbind"]
+    assert "verify" not in results
+
+
+def test_typos_still_match():
+    index = NameIndex(NAMES)
+    assert index.search("premuim")[0] == "premium"
+    assert index.search("verfy")[0] == "verify"
+
+
+def test_empty_query_and_limit():
+    index = NameIndex(NAMES)
+    assert index.search("") == sorted(NAMES)
+    assert len(index.search("", limit=3)) == 3
+    assert index.search("zzzz") == []
+
+
+def test_rebuild():
+    index = NameIndex(NAMES)
+    index.rebuild(["Verify", "support"])
+
+    assert len(index) == 2
+    assert index.search("ver") == ["verify"]
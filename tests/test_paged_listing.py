@@ -0,0 +1,85 @@
+import asyncio
+
+from resources.utils.paged_listing import PagedListing
+
+
+class FakeCollection:
+    def __init__(self, names: list[str]) -> None:
+        self.names = names
+        self.version = 0
+        self.loads = 0
+
+    async def load(self) -> list[str]:
+        self.loads += 1
+        await asyncio.sleep(0)
+        return list(self.names)
+
+
+def test_pages_come_from_one_sorted_snapshot():
+    async def run():
+        collection = FakeCollection([f"tag{i:02}" for i in reversed(range(25))])
+        listing = PagedListing(collection.load, version=lambda: collection.version, page_size=10)
+
+        first = await listing.page(0)
+        assert first.items == tuple(f"tag{i:02}" for i in range(10))
+        assert (first.index, first.page_count, first.total) == (0, 3, 25)
+
+        last = await listing.page(2)
+        assert last.items == ("tag20", "tag21", "tag22", "tag23", "tag24")
+        assert (await listing.page(7)).index == 2
+        assert (await listing.page(-1)).index == 0
+        assert collection.loads == 1
+
+    asyncio.run(run())
+
+
+def test_rebuilds_when_the_version_changes():
+    async def run():
+        collection = FakeCollection(["b", "a"])
+        listing = PagedListing(collection.load, version=lambda: collection.version, page_size=10)
+        assert await listing.items() == ["a", "b"]
+
+        collection.names.append("c")
+        assert await listing.items() == ["a", "b"]
+
+        collection.version += 1
+        assert await listing.items() == ["a", "b", "c"]
+        assert collection.loads == 2
+
+        listing.invalidate()
+        await listing.items()
+        assert collection.loads == 3
+
+    asyncio.run(run())
+
+
+def test_without_a_version_every_page_loads():
+    async def run():
+        collection = FakeCollection(["a"])
+        listing = PagedListing(collection.load, version=lambda: None, page_size=10)
+        await listing.page(0)
+        await listing.page(0)
+        assert collection.loads == 2
+
+    asyncio.run(run())
+
+
+def test_concurrent_pages_share_a_load_and_empty_listing_has_one_page():
+    async def run():
+        collection = FakeCollection([])
+        listing = PagedListing(collection.load, version=lambda: collection.version, page_size=10)
+
+        pages = await asyncio.gather(*(listing.page(0) for _ in range(5)))
+        assert collection.loads == 1
+        assert pages[0].items == () and pages[0].page_count == 1
+
+    asyncio.run(run())
+
+
+def test_sort_key():
+    async def run():
+        collection = FakeCollection(["bb", "a", "ccc"])
+        listing = PagedListing(collection.load, version=lambda: 0, page_size=2, key=len)
+        assert (await listing.page(1)).items == ("ccc",)
+
+    asyncio.run(run())
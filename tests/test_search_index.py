@@ -0,0 +1,53 @@
+from resources.utils.search_index import SearchIndex, tokenize
+from resources.utils.tag_cache import TagCache
+
+
+def make_index() -> SearchIndex:
+    index = SearchIndex()
+    index.upsert("verify", "verify Run /verify to link your Roblox account.")
+    index.upsert("roles", "roles Run /getrole to update your roles. Roles come from your binds.")
+    index.upsert("premium", "premium Premium gives your server extra roles and faster updates.")
+    return index
+
+
+def test_tokenize():
+    assert tokenize("Run /verify, NOW!") == ["run", "verify", "now"]
+    assert tokenize("ｖｅｒｉｆｙ") == ["verify"]
+
+
+def test_every_term_has_to_match():
+    index = make_index()
+    assert [doc for doc, _ in index.search("your roles")] == ["roles", "premium"]
+    assert [doc for doc, _ in index.search("roblox roles")] == []
+    assert index.search("") == []
+
+
+def test_partial_last_word_matches_by_prefix():
+    index = make_index()
+    assert [doc for doc, _ in index.search("link rob")] == ["verify"]
+    assert {doc for doc, _ in index.search("upd")} == {"roles", "premium"}
+
+
+def test_incremental_updates():
+    index = make_index()
+    index.upsert("verify", "verify Use the verification page.")
+    assert index.search("roblox") == []
+    assert [doc for doc, _ in index.search("verification")] == ["verify"]
+
+    index.remove("roles")
+    assert "roles" not in index
+    assert [doc for doc, _ in index.search("roles")] == ["premium"]
+    index.remove("roles")
+    assert len(index) == 2
+
+
+def test_tag_cache_search_follows_changes():
+    cache = TagCache()
+    cache.load([{"_id": "verify", "aliases": ["link"], "content": "Run /verify."}])
+    assert cache.search("link") == ["verify"]
+
+    cache.upsert({"_id": "roles", "aliases": [], "content": "Run /getrole to link roles."})
+    assert cache.search("link") == ["verify", "roles"]
+
+    cache.remove("verify")
+    assert cache.search("link") == ["roles"]
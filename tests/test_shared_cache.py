@@ -0,0 +1,204 @@
+import asyncio
+
+import pytest
+from pymongo.errors import ServerSelectionTimeoutError
+
+import modules.auto_response.shared_cache as cache
+from resources.models.autoresponse import AutoResponse
+from resources.utils.collection_watcher import CollectionChange
+
+
+@pytest.fixture(autouse=True)
+def loaded_cache():
+    responders = [
+        AutoResponse(name="verify", response_message="a", author="1", message_triggers=["verify", "*link*"]),
+        AutoResponse(name="roles", response_message="b", author="1", message_triggers=["roles", "*link*"]),
+    ]
+    cache.stored_trigger_map.clear()
+    for ar in responders:
+        for tr in ar.message_triggers:
+            cache.stored_trigger_map[tr] = ar
+    cache.trigger_matcher.rebuild(cache.stored_trigger_map.items())
+
+    yield
+
+    cache.stored_trigger_map.clear()
+    cache.trigger_matcher.rebuild([])
+    cache.autoresponder_channels.clear()
+
+
+def test_upsert_patches_one_responder():
+    ar = cache.get_cached_responder("VERIFY")
+    assert ar is not None
+
+    ar.message_triggers = ["how do i verify"]
+    ar.response_message = "c"
+    cache.upsert_responder(ar)
+
+    assert "verify" not in cache.stored_trigger_map
+    assert cache.trigger_matcher.match("How do I verify?").response_message == "c"
+    assert cache.trigger_matcher.match("roles please").name == "roles"
+
+
+def test_disabled_responder_stays_cached_but_never_matches():
+    ar = cache.get_cached_responder("roles")
+    ar.enabled = False
+    cache.upsert_responder(ar)
+
+    assert cache.stored_trigger_map["roles"] is ar
+    assert cache.trigger_matcher.match("roles") is None
+
+
+def test_remove_gives_shared_triggers_back():
+    cache.remove_responder("roles")
+
+    assert cache.get_cached_responder("roles") is None
+    assert cache.stored_trigger_map["*link*"].name == "verify"
+    assert cache.trigger_matcher.match("unlinked").name == "verify"
+
+
+def test_upsert_before_load_is_ignored():
+    cache.stored_trigger_map.clear()
+    cache.upsert_responder(
+        AutoResponse(name="new", response_message="d", author="1", message_triggers=["new"])
+    )
+
+    assert not cache.stored_trigger_map
+
+
+class FakeDB:
+    def __init__(self, responders: list[dict]):
+        self.responders = responders
+        self.reads = 0
+
+    async def iter_autoresponse_batches(self, batch_size=None):
+        self.reads += 1
+        await asyncio.sleep(0.01)
+        yield [dict(x) for x in self.responders]
+
+
+def test_concurrent_loads_share_one_read():
+    db = FakeDB([{"_id": "verify", "response_message": "a", "author": "1", "message_triggers": ["verify"]}])
+    cache.stored_trigger_map.clear()
+
+    async def burst():
+        await asyncio.gather(*(cache.ensure_trigger_map(db) for _ in range(20)))
+
+    asyncio.run(burst())
+
+    assert db.reads == 1
+    assert cache.trigger_matcher.match("verify").name == "verify"
+
+
+def test_load_racing_a_write_is_discarded():
+    db = FakeDB([{"_id": "verify", "response_message": "a", "author": "1", "message_triggers": ["verify"]}])
+    cache.stored_trigger_map.clear()
+
+    async def race():
+        load = asyncio.create_task(cache.ensure_trigger_map(db))
+        await asyncio.sleep(0.005)  # while the read is in progress
+        cache.remove_responder("verify")
+        await load
+
+    asyncio.run(race())
+
+    assert not cache.stored_trigger_map
+
+
+def test_database_changes_patch_the_cache():
+    doc = {"_id": "roles", "response_message": "e", "author": "2", "message_triggers": ["get roles"]}
+    cache.apply_responder_change(CollectionChange("auto_response", "upsert", "roles", doc))
+    cache.apply_responder_change(CollectionChange("auto_response", "delete", "verify"))
+
+    assert doc["_id"] == "roles"  # the change's document isn't modified
+    assert cache.trigger_matcher.match("get roles").response_message == "e"
+    assert cache.trigger_matcher.match("verify") is None
+
+
+class FakeConfigDB:
+    def __init__(self, guild_channels: dict[str, list[str]]):
+        self.guild_channels = guild_channels
+        self.reads = 0
+
+    async def get_allowlist_channels_by_guild(self) -> dict[str, list[str]]:
+        self.reads += 1
+        await asyncio.sleep(0.01)
+        return self.guild_channels
+
+
+def test_allowlist_is_loaded_for_every_guild_at_once():
+    db = FakeConfigDB({"1": ["10", "11"], "2": ["20"]})
+
+    asyncio.run(cache.load_allowlist_channels(db))
+
+    assert db.reads == 1
+    assert cache.is_allowlisted(1, 11)
+    assert cache.is_allowlisted(2, 20)
+    assert not cache.is_allowlisted(1, 20)
+    assert not cache.is_allowlisted(3, 10)
+
+
+def test_allowlist_changes_only_touch_one_guild():
+    asyncio.run(cache.load_allowlist_channels(FakeConfigDB({"1": ["10"], "2": ["20"]})))
+
+    cache.set_allowlist_channels("1", ["12"])
+    cache.apply_config_change(CollectionChange("config", "upsert", "3", {"_id": "3", "moderation": "5"}))
+    cache.apply_config_change(CollectionChange("config", "delete", "2"))
+
+    assert not cache.is_allowlisted(1, 10) and cache.is_allowlisted(1, 12)
+    assert not cache.is_allowlisted(2, 20)
+    assert not cache.is_allowlisted(3, 5)
+
+
+def test_allowlist_change_during_load_is_kept():
+    db = FakeConfigDB({"1": ["10"], "2": ["20"]})
+
+    async def race():
+        load = asyncio.create_task(cache.load_allowlist_channels(db))
+        await asyncio.sleep(0.005)  # while the read is in progress
+        cache.set_allowlist_channels(1, [11])
+        await load
+
+    asyncio.run(race())
+
+    assert cache.is_allowlisted(1, 11) and not cache.is_allowlisted(1, 10)
+    assert cache.is_allowlisted(2, 20)
+
+
+class FlakyConfigDB(FakeConfigDB):
+    def __init__(self, guild_channels: dict[str, list[str]], failures: int):
+        super().__init__(guild_channels)
+        self.failures = failures
+
+    async def get_allowlist_channels_by_guild(self) -> dict[str, list[str]]:
+        if self.failures:
+            self.failures -= 1
+            raise ServerSelectionTimeoutError("No servers found.")
+        return await super().get_allowlist_channels_by_guild()
+
+
+def test_allowlist_load_is_retried_until_it_works():
+    db = FlakyConfigDB({"1": ["10"]}, failures=2)
+
+    with pytest.raises(ServerSelectionTimeoutError):
+        asyncio.run(cache.load_allowlist_channels(db))
+    assert not cache.is_allowlisted(1, 10)
+
+    asyncio.run(asyncio.wait_for(cache.retry_allowlist_load(db, initial_delay=0.001), timeout=5))
+    assert db.failures == 0
+    assert cache.is_allowlisted(1, 10)
+
+
+def test_edits_are_compacted_in_the_background():
+    async def edit():
+        cache.upsert_responder(
+            AutoResponse(name="premium", response_message="f", author="1", message_triggers=["*premium*"])
+        )
+        assert cache.trigger_matcher.needs_compaction
+        assert cache.trigger_matcher.match("is premium worth it").name == "premium"
+        await cache._compaction
+
+    asyncio.run(edit())
+
+    assert not cache.trigger_matcher.needs_compaction
+    assert cache.trigger_matcher.match("is premium worth it").name == "premium"
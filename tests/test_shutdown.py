@@ -0,0 +1,73 @@
+import asyncio
+import signal
+
+import discord
+import pytest
+
+from resources.helper_bot import HelperBot
+
+
+@pytest.mark.parametrize("sig", [signal.SIGTERM, signal.SIGINT])
+def test_stop_signal_flushes_buffered_counters(make_db, restore_instance, sig: signal.Signals):
+    db = make_db()
+
+    async def run():
+        bot = HelperBot(".", "", [], intents=discord.Intents.none(), sync_commands=False)
+        bot.db = db
+
+        async def start(token: str):
+            # Counted while running, then the process is told to stop before the next periodic flush.
+            db.start_buffers()
+            db.incr_tag_use("verify")
+            db.update_staff_metric("1", "volunteer", incr_message=True)
+            signal.raise_signal(sig)
+
+            while not bot.is_closed():
+                await asyncio.sleep(0.01)
+
+        bot.start = start  # type: ignore
+        try:
+            await asyncio.wait_for(bot.serve("token"), timeout=5)
+        finally:
+            await bot.aiohttp.close()
+
+    asyncio.run(run())
+
+    assert len(db.db["tags"].requests) == 1
+    assert db.db["tags"].requests[0]._doc == {"$inc": {"use_count": 1}}
+    assert db.db["metrics"].requests[0]._doc["$inc"] == {"volunteer.1.msg_count": 1}
+
+
+def test_repeated_stop_signals_close_once(make_db, restore_instance):
+    closes = []
+
+    async def run():
+        bot = HelperBot(".", "", [], intents=discord.Intents.none(), sync_commands=False)
+        bot.db = make_db()
+        close = bot.close
+
+        async def counting_close():
+            closes.append(asyncio.current_task())
+            await close()
+
+        async def start(token: str):
+            # Ctrl-C pressed twice before the first close got to run.
+            signal.raise_signal(signal.SIGINT)
+            signal.raise_signal(signal.SIGINT)
+
+            while not bot.is_closed():
+                await asyncio.sleep(0.01)
+
+        bot.close = counting_close  # type: ignore
+        bot.start = start  # type: ignore
+        try:
+            await asyncio.wait_for(bot.serve("token"), timeout=5)
+        finally:
+            await bot.aiohttp.close()
+
+        return asyncio.current_task(), bot._shutdown_task
+
+    serve_task, shutdown_task = asyncio.run(run())
+    # serve closes again on its way out, every other close came from a signal.
+    assert [task for task in closes if task is not serve_task] == [shutdown_task]
+    assert shutdown_task.done()
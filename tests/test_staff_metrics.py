@@ -0,0 +1,19 @@
+import asyncio
+
+
+def test_metrics_are_written_once_per_month(make_db):
+    db = make_db()
+
+    async def run():
+        for _ in range(3):
+            db.update_staff_metric("1", "volunteer", incr_message=True)
+        db.update_staff_metric("1", "volunteer", incr_tags=True)
+        db.update_staff_metric("2", "trial", incr_message=True)
+        await db.staff_metrics.flush()
+
+    asyncio.run(run())
+
+    metrics = db.db["metrics"]
+    assert len(metrics.requests) == 1
+    update = metrics.requests[0]._doc["$inc"]
+    assert update == {"volunteer.1.msg_count": 3, "volunteer.1.tag_count": 1, "trial.2.msg_count": 1}
@@ -0,0 +1,33 @@
+import asyncio
+
+import discord
+from pymongo.errors import ServerSelectionTimeoutError
+
+from resources.helper_bot import HelperBot
+
+
+class UnreachableCollection:
+    async def create_indexes(self, indexes):
+        raise ServerSelectionTimeoutError("No servers found.")
+
+    def find(self, *args, **kwargs):
+        raise ServerSelectionTimeoutError("No servers found.")
+
+
+def test_startup_survives_an_unreachable_database(make_db, restore_instance):
+    db = make_db()
+    db.db["tags"] = UnreachableCollection()
+
+    async def run():
+        bot = HelperBot(".", "", [], intents=discord.Intents.none(), sync_commands=False)
+        bot.db = db
+
+        try:
+            await bot.setup_hook()
+        finally:
+            await db.flush_buffers()
+            await bot.aiohttp.close()
+
+        return db.tag_cache.loaded
+
+    assert asyncio.run(run()) is False
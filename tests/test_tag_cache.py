@@ -0,0 +1,57 @@
+from resources.utils.collection_watcher import CollectionChange
+from resources.utils.tag_cache import TagCache
+
+
+def make_cache() -> TagCache:
+    cache = TagCache()
+    cache.load(
+        [
+            {"_id": "verify", "content": "a", "aliases": ["v", "link"], "use_count": 0},
+            {"_id": "link", "content": "b", "aliases": [], "use_count": 0},
+        ]
+    )
+    return cache
+
+
+def test_lookup_by_name_and_alias():
+    cache = make_cache()
+    assert cache.get("VERIFY")["content"] == "a"
+    assert cache.get("v")["_id"] == "verify"
+    assert cache.get("missing") is None
+    assert "missing" not in cache
+
+
+def test_name_wins_over_alias():
+    cache = make_cache()
+    assert cache.get("link")["_id"] == "link"
+
+    cache.remove("link")
+    assert cache.get("link")["_id"] == "verify"
+
+
+def test_get_returns_copy():
+    cache = make_cache()
+    cache.get("verify")["aliases"].append("x")
+    assert cache.get("x") is None
+
+
+def test_upsert_drops_removed_aliases():
+    cache = make_cache()
+    cache.upsert({"_id": "verify", "content": "a", "aliases": ["ver"], "use_count": 0})
+
+    assert cache.get("v") is None
+    assert cache.get("ver")["_id"] == "verify"
+
+
+def test_apply_change():
+    cache = make_cache()
+    cache.apply_change(
+        CollectionChange("tags", "upsert", "new", {"_id": "new", "content": "c", "aliases": ["n"]})
+    )
+    cache.apply_change(CollectionChange("tags", "delete", "verify"))
+
+    assert cache.get("n")["_id"] == "new"
+    assert cache.get("v") is None
+
+    cache.apply_change(CollectionChange("tags", "invalidate"))
+    assert not cache.loaded
@@ -0,0 +1,37 @@
+import time
+
+from resources.utils.timed_user_cooldown import TimedUserCooldown
+
+
+def test_cooldown_expires(monkeypatch):
+    now = 1000.0
+    monkeypatch.setattr(time, "monotonic", lambda: now)
+
+    cooldown = TimedUserCooldown(10)
+    assert cooldown.check_for_user(1) is False
+    assert cooldown.check_for_user(1) is True
+    assert cooldown.check_for_user(2) is False
+
+    now += 10
+    assert len(cooldown) == 0
+    assert cooldown.check_for_user(1) is False
+
+
+def test_channel_scope():
+    cooldown = TimedUserCooldown(10, scope="channel")
+    assert cooldown.check_for_user(1, channel_id=5) is False
+    assert cooldown.check_for_user(1, channel_id=5) is True
+    assert cooldown.check_for_user(1, channel_id=6) is False
+
+    cooldown.reset(1, channel_id=5)
+    assert cooldown.check_for_user(1, channel_id=5) is False
+
+
+def test_memory_cap_drops_oldest():
+    cooldown = TimedUserCooldown(10, max_entries=2)
+    for user_id in (1, 2, 3):
+        cooldown.check_for_user(user_id)
+
+    assert len(cooldown) == 2
+    assert cooldown.check_for_user(3) is True
+    assert cooldown.check_for_user(1) is False
@@ -0,0 +1,57 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+from resources.utils.translation import TranslationService
+
+
+class FakeTranslator:
+    def __init__(self):
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def translate(self, text, dest="en"):
+        with self.lock:
+            self.calls.append((text, dest))
+        time.sleep(0.05)
+        return SimpleNamespace(text=text.upper(), src="es")
+
+
+def test_translations_are_cached_and_coalesced():
+    translator = FakeTranslator()
+    service = TranslationService(translator)
+
+    async def run():
+        results = await asyncio.gather(*(service.translate("hola") for _ in range(5)))
+        results.append(await service.translate("hola"))
+        results.append(await service.translate("hola", dest="fr"))
+        return results
+
+    results = asyncio.run(run())
+    service.close()
+
+    assert {result.text for result in results} == {"HOLA"}
+    assert results[-1].dest == "fr"
+    assert translator.calls == [("hola", "en"), ("hola", "fr")]
+
+
+def test_translation_does_not_block_the_loop():
+    service = TranslationService(FakeTranslator())
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.005)
+
+    async def run():
+        task = asyncio.create_task(ticker())
+        await service.translate("hola")
+        task.cancel()
+
+    asyncio.run(run())
+    service.close()
+
+    assert ticks > 3
@@ -1,9 +1,11 @@
+import asyncio
 from contextlib import nullcontext
 
 import pytest
 
 import resources.responder_parsing as tr
 from resources.exceptions import InvalidTriggerFormat
+from resources.utils.aho_corasick import AhoCorasick
 
 BASE_MESSAGE = (
     "help I can't verify every time i try i get a message saying you need to verify your account am i banned"
@@ -45,6 +47,8 @@ def test_partial_trigger(trigger_str: str, expected):
         ("verify...message", nullcontext(True)),
         ("account...need", nullcontext(False)),
         ("banned ... help", nullcontext(False)),
+        ("can't v.rify ... banned", nullcontext(False)),  # expand keywords are not regex
+        ("(help ... banned", nullcontext(False)),
         ("ver* ... message", pytest.raises(InvalidTriggerFormat, match="Cannot perform partial")),
         (
             "verify ... message ... account",
@@ -115,3 +119,140 @@ def test_absolute_trigger(trigger_str: str, expected):
 )
 def test_explicit_trigger(trigger_str: str, expected):
     assert tr.search_message_match(message=BASE_MESSAGE, initial_trigger=trigger_str) == expected
+
+
+@pytest.mark.parametrize(
+    "trigger_str",
+    [
+        "ban*",
+        "*ned",
+        "*help ",
+        "help I can*",
+        "*ify every",
+        "*ver*",
+        "*ou nee*",
+        "*ver",
+        "rif*",
+        "*hel",
+        "verify ... need",
+        "can't verify...message saying",
+        "banned ... help",
+        "help, verify",
+        "ban*, help",
+        "help...verify, *count",
+        "help, bloxlink",
+        "I CAN'T VERIFY",
+        "am I banned",
+        "am I banned?",
+        "I am banned",
+        "Ban",
+        "john cena",
+        "= help I can't verify every time i try i get a message saying you need to verify your account am i banned",
+        "=help",
+    ],
+)
+def test_matcher_agrees_with_search(trigger_str: str):
+    matcher = tr.TriggerMatcher([(trigger_str, trigger_str)])
+    expected = tr.search_message_match(message=BASE_MESSAGE, initial_trigger=trigger_str)
+
+    assert (matcher.match(BASE_MESSAGE) == trigger_str) == expected
+
+
+def test_matcher_returns_first_added_match():
+    matcher = tr.TriggerMatcher([("john cena", 0), ("*ver*", 1), ("banned", 2), ("=help", 3)])
+    assert matcher.match(BASE_MESSAGE) == 1
+    assert matcher.match("Help!") == 3
+    assert matcher.match("nothing to see here") is None
+
+
+def test_compiled_trigger_is_accepted_and_cached():
+    compiled = tr.compile_trigger("help...verify, *count")
+    assert tr.compile_trigger("help...verify, *count") is compiled
+    assert len(compiled.segments) == 2
+    assert tr.search_message_match(message=BASE_MESSAGE, initial_trigger=compiled)
+
+
+def test_matcher_skips_invalid_triggers():
+    matcher = tr.TriggerMatcher([("...", 0), ("verify ... message ... account", 1), ("banned", 2)])
+    assert len(matcher) == 1
+    assert matcher.match(BASE_MESSAGE) == 2
+
+
+def test_matcher_candidates_need_every_literal():
+    matcher = tr.TriggerMatcher(
+        [("*ver", 0), ("help, bloxlink", 1), ("verify ... need", 2), ("a.c ... need", 3), ("=help", 4)]
+    )
+    # "*ver" fails the full check, but its literal is in the message.
+    assert matcher.candidates(BASE_MESSAGE) == [0, 2]
+    assert matcher.candidates("Help?") == [4]
+
+
+def test_aho_corasick_finds_overlapping_patterns():
+    patterns = ["he", "she", "his", "hers", "ers", "rs", "xyz"]
+    text = "ushers and his"
+    automaton = AhoCorasick(patterns)
+
+    assert automaton.search(text) == {pattern for pattern in patterns if pattern in text}
+
+    automaton.discard("she")
+    automaton.add("and")
+    assert automaton.search(text) == {"he", "hers", "ers", "rs", "his", "and"}
+
+
+def test_aho_corasick_edits_dont_rebuild():
+    automaton = AhoCorasick(["he", "she", "hers"])
+    assert not automaton.needs_rebuild
+
+    automaton.discard("she")
+    automaton.add("and")
+    automaton.add("")
+    assert automaton.needs_rebuild
+    assert automaton._built_patterns == {"he", "she", "hers"}
+    assert automaton.search("ushers and") == {"he", "hers", "and"}
+
+    # Removed and added back before a rebuild, it's still in the automaton.
+    automaton.add("she")
+    assert automaton.search("ushers") == {"he", "she", "hers"}
+
+    asyncio.run(automaton.rebuild_async())
+    assert not automaton.needs_rebuild
+    assert automaton.search("ushers and") == {"he", "she", "hers", "and"}
+
+
+def test_normalized_message():
+    message = tr.NormalizedMessage("Hello,  World!\nHow are you?")
+
+    assert message.text == "hello  world\nhow are you"
+    assert message.words == ("hello", "world", "how", "are", "you")
+    assert message.word_spans[1] == (7, 12)
+    assert tr.NormalizedMessage.of(message) is message
+
+
+def test_normalized_message_nfkc():
+    # Fullwidth letters, like the ones NFKC normalization removes from new triggers.
+    assert tr.search_message_match(message="how do I ｖｅｒｉｆｙ", initial_trigger="verify")
+    assert tr.search_message_match(message="how do I verify", initial_trigger="ｖｅｒｉｆｙ")
+
+
+def test_matcher_accepts_normalized_message():
+    matcher = tr.TriggerMatcher([("verify", 1), ("=help", 2)])
+
+    assert matcher.match(tr.NormalizedMessage("How do I verify?")) == 1
+    assert matcher.match(tr.NormalizedMessage("Help!")) == 2
+
+
+def test_matcher_agrees_with_search_message_match(make_trigger_corpus):
+    """The benchmark corpus doubles as a larger correctness check."""
+    triggers, messages = make_trigger_corpus([300], 300)
+    matcher = tr.TriggerMatcher((trigger, trigger) for trigger in triggers[300])
+
+    for message in messages:
+        expected = next(
+            (
+                trigger
+                for trigger in triggers[300]
+                if tr.search_message_match(message=message, initial_trigger=trigger)
+            ),
+            None,
+        )
+        assert matcher.match(message) == expected
@@ -0,0 +1,34 @@
+import time
+
+from resources.utils.ttl_cache import TTLCache
+
+
+def test_entries_expire():
+    cache = TTLCache(60)
+    cache.set("a", 1)
+    cache.set("b", 2, ttl=0)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert "b" not in cache
+
+
+def test_least_recently_used_is_evicted():
+    cache = TTLCache(60, max_size=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert "a" in cache
+    assert "b" not in cache
+    assert len(cache) == 2
+
+
+def test_monotonic_expiry(monkeypatch):
+    now = time.monotonic()
+    cache = TTLCache(10)
+    cache.set("a", 1)
+
+    monkeypatch.setattr(time, "monotonic", lambda: now + 11)
+    assert cache.get("a") is None
@@ -0,0 +1,60 @@
+import asyncio
+
+import discord
+
+from resources.utils.user_resolver import UserResolver
+
+
+class FakeUser:
+    def __init__(self, user_id):
+        self.id = user_id
+        self.name = f"user{user_id}"
+
+
+class FakeResponse:
+    status = 404
+    reason = "Not Found"
+
+
+class FakeClient:
+    def __init__(self, cached=()):
+        self.cached = set(cached)
+        self.fetched = []
+        self.in_flight = 0
+        self.most_in_flight = 0
+
+    def get_user(self, user_id):
+        return FakeUser(user_id) if user_id in self.cached else None
+
+    async def fetch_user(self, user_id):
+        self.fetched.append(user_id)
+        self.in_flight += 1
+        self.most_in_flight = max(self.most_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+
+        if user_id == 404:
+            raise discord.NotFound(FakeResponse(), "Unknown User")
+        return FakeUser(user_id)
+
+
+def test_resolves_from_cache_then_rest():
+    client = FakeClient(cached={1})
+    resolver = UserResolver(client, max_concurrency=2)
+
+    names = asyncio.run(resolver.resolve_names([1, 2, 3, 4, 404, 2]))
+
+    assert names == {1: "user1", 2: "user2", 3: "user3", 4: "user4"}
+    assert sorted(client.fetched) == [2, 3, 4, 404]
+    assert client.most_in_flight == 2
+
+
+def test_names_are_reused_across_calls():
+    client = FakeClient()
+    resolver = UserResolver(client)
+
+    asyncio.run(resolver.resolve_names([5, 6]))
+    names = asyncio.run(resolver.resolve_names([5, 6]))
+
+    assert names == {5: "user5", 6: "user6"}
+    assert client.fetched == [5, 6]